@@ -45,6 +45,10 @@ class ServerManagerMod(_BaseQuickLookup):
 		remoteIPLookup: str,
 		serverTTL: list,
 		remotePreferIPv6: bool = False,
+		happyEyeballs: bool = False,
+		remoteLookupCache: bool = True,
+		remoteLookupFallbackTTL: float = 60.0,
+		listenerOptions: dict | None = None,
 		**kwargs,
 	) -> 'ServerManagerMod':
 		localNet = ipaddress.ip_network(localNet)
@@ -93,6 +97,10 @@ class ServerManagerMod(_BaseQuickLookup):
 			remoteIPLookup=remoteIPLookup,
 			serverTTL=serverTTL,
 			remotePreferIPv6=remotePreferIPv6,
+			happyEyeballs=happyEyeballs,
+			remoteLookupCache=remoteLookupCache,
+			remoteLookupFallbackTTL=remoteLookupFallbackTTL,
+			listenerOptions=listenerOptions,
 		)
 
 	def __init__(
@@ -104,6 +112,10 @@ class ServerManagerMod(_BaseQuickLookup):
 		remoteIPLookup: _BaseQuickLookup,
 		serverTTL: Tuple[int, str],
 		remotePreferIPv6: bool = False,
+		happyEyeballs: bool = False,
+		remoteLookupCache: bool = True,
+		remoteLookupFallbackTTL: float = 60.0,
+		listenerOptions: dict | None = None,
 	) -> None:
 		super(ServerManagerMod, self).__init__()
 
@@ -115,6 +127,10 @@ class ServerManagerMod(_BaseQuickLookup):
 			remoteIPLookup=remoteIPLookup,
 			serverTTL=serverTTL,
 			remotePreferIPv6=remotePreferIPv6,
+			happyEyeballs=happyEyeballs,
+			remoteLookupCache=remoteLookupCache,
+			remoteLookupFallbackTTL=remoteLookupFallbackTTL,
+			listenerOptions=listenerOptions,
 		)
 
 		if localNet.version == 4:
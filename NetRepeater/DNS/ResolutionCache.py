@@ -0,0 +1,243 @@
+#!/usr/bin/env python3
+# -*- coding:utf-8 -*-
+###
+# Copyright (c) 2025 Haofan Zheng
+# Use of this source code is governed by an MIT-style
+# license that can be found in the LICENSE file or at
+# https://opensource.org/licenses/MIT.
+###
+
+
+import collections
+import ipaddress
+import logging
+import threading
+import time
+
+from typing import Dict, List, Tuple, Union
+
+import dns.name
+import dns.rdataclass
+import dns.rdatatype
+
+from ModularDNS.Downstream.QuickLookup import QuickLookup as _IPAddrLookup
+from ModularDNS.MsgEntry.QuestionEntry import QuestionEntry as _DNSQuestionEntry
+
+
+_IP_ADDRESS_TYPES = Union[ ipaddress.IPv4Address, ipaddress.IPv6Address ]
+
+# the sender of the questions asked to find out the TTLs
+_LOCAL_SENDER = ('127.0.0.1', 0)
+
+
+class _CacheEntry(object):
+
+	__slots__ = (
+		'addr',
+		'refreshAt',
+		'expireAt',
+		'isRefreshing',
+	)
+
+	def __init__(
+		self,
+		addr: _IP_ADDRESS_TYPES,
+		refreshAt: float,
+		expireAt: float,
+	) -> None:
+		super(_CacheEntry, self).__init__()
+
+		self.addr = addr
+		self.refreshAt = refreshAt
+		self.expireAt = expireAt
+		self.isRefreshing = False
+
+
+class ResolutionCache(object):
+	'''
+	Cache the addresses looked up through a `QuickLookup` for as long as
+	the TTLs of their records say, with the same `LookupIpAddr` interface,
+	so the lookup is hit once per TTL instead of once per connection.
+
+	QuickLookup does not report TTLs, so the question, for the preferred
+	address family only, is asked through `HandleQuestion` instead, and
+	the smallest TTL of the answer (including its CNAME records) is used,
+	between `minTTL` and `maxTTL`. Lookups without `HandleQuestion`, and
+	names without an address of the preferred family, are looked up with
+	`LookupIpAddr` instead, and kept for `fallbackTTL` seconds.
+
+	A name looked up again after `refreshAhead` of its TTL has passed is
+	refreshed in the background, so names in use do not expire; others
+	expire and are looked up again on their next use. At most `maxSize`
+	names are kept. Failed lookups are not cached.
+	'''
+
+	def __init__(
+		self,
+		lookup: _IPAddrLookup,
+		fallbackTTL: float = 60.0,
+		minTTL: float = 1.0,
+		maxTTL: float = 3600.0,
+		refreshAhead: float = 0.8,
+		maxSize: int = 4096,
+	) -> None:
+		super(ResolutionCache, self).__init__()
+
+		if not (0.0 < refreshAhead <= 1.0):
+			raise ValueError(f'Invalid refreshAhead: {refreshAhead}')
+
+		self._lookup = lookup
+		self._fallbackTTL = fallbackTTL
+		self._minTTL = minTTL
+		self._maxTTL = maxTTL
+		self._refreshAhead = refreshAhead
+		self._maxSize = maxSize
+
+		self._lock = threading.Lock()
+		# (domain, preferIPv6) -> entry, least recently used first
+		self._entries: collections.OrderedDict[
+			Tuple[str, bool], _CacheEntry
+		] = collections.OrderedDict()
+
+		self._numHits = 0
+		self._numMisses = 0
+		self._numRefreshes = 0
+
+		self._logger = logging.getLogger(
+			f'{__name__}.{self.__class__.__name__}'
+		)
+
+		self._isTTLSupported = callable(getattr(lookup, 'HandleQuestion', None))
+		if not self._isTTLSupported:
+			self._logger.warning(
+				f'{type(lookup).__name__} does not report TTLs; '
+				f'caching for {fallbackTTL}s instead'
+			)
+
+	def _AskWithTTL(
+		self,
+		domain: str,
+		preferIPv6: bool,
+	) -> Tuple[_IP_ADDRESS_TYPES, float] | None:
+		'''
+		:return: The address and its TTL; None if there is no address of
+			the preferred family.
+		'''
+		rdType = dns.rdatatype.AAAA if preferIPv6 else dns.rdatatype.A
+		question = _DNSQuestionEntry(
+			name=dns.name.from_text(domain),
+			rdCls=dns.rdataclass.IN,
+			rdType=rdType,
+		)
+		entries = self._lookup.HandleQuestion(
+			question,
+			senderAddr=_LOCAL_SENDER,
+			recDepthStack=[],
+		)
+
+		addr = None
+		ttl = None
+		for entry in entries:
+			ttl = entry.ttl if ttl is None else min(ttl, entry.ttl)
+			if (addr is None) and (entry.rdType == rdType):
+				addr = ipaddress.ip_address(entry.dataList[0].address)
+		return None if addr is None else (addr, ttl)
+
+	def _Resolve(
+		self,
+		domain: str,
+		preferIPv6: bool,
+	) -> Tuple[_IP_ADDRESS_TYPES, float]:
+		if self._isTTLSupported:
+			try:
+				answer = self._AskWithTTL(domain, preferIPv6)
+			except Exception as e:
+				# e.g., no record of the family; LookupIpAddr will tell
+				self._logger.debug(
+					f'Failed to look up {domain} with its TTL: {type(e).__name__}: {e}'
+				)
+				answer = None
+			if answer is not None:
+				addr, ttl = answer
+				return addr, min(max(ttl, self._minTTL), self._maxTTL)
+
+		addr = self._lookup.LookupIpAddr(
+			domain=domain,
+			recDepthStack=[],
+			preferIPv6=preferIPv6,
+		)
+		return addr, self._fallbackTTL
+
+	def _Store(
+		self,
+		key: Tuple[str, bool],
+		addr: _IP_ADDRESS_TYPES,
+		ttl: float,
+	) -> None:
+		now = time.monotonic()
+		entry = _CacheEntry(
+			addr=addr,
+			refreshAt=now + ttl * self._refreshAhead,
+			expireAt=now + ttl,
+		)
+		with self._lock:
+			self._entries[key] = entry
+			self._entries.move_to_end(key)
+			while len(self._entries) > self._maxSize:
+				self._entries.popitem(last=False)
+
+	def _Refresh(self, key: Tuple[str, bool], entry: _CacheEntry) -> None:
+		try:
+			addr, ttl = self._Resolve(*key)
+		except Exception as e:
+			# keep the cached address until it expires
+			self._logger.debug(f'Failed to refresh {key[0]}: {e}')
+			with self._lock:
+				entry.isRefreshing = False
+			return
+		self._Store(key, addr, ttl)
+
+	def LookupIpAddr(
+		self,
+		domain: str,
+		recDepthStack: List[ Tuple[ int, str ] ],
+		preferIPv6: bool = False,
+	) -> _IP_ADDRESS_TYPES:
+		key = (domain, preferIPv6)
+		now = time.monotonic()
+		with self._lock:
+			entry = self._entries.get(key)
+			if (entry is not None) and (now < entry.expireAt):
+				self._numHits += 1
+				self._entries.move_to_end(key)
+				isRefreshDue = (
+					(now >= entry.refreshAt) and (not entry.isRefreshing)
+				)
+				if isRefreshDue:
+					entry.isRefreshing = True
+					self._numRefreshes += 1
+				addr = entry.addr
+			else:
+				self._numMisses += 1
+				entry = None
+
+		if entry is None:
+			addr, ttl = self._Resolve(domain, preferIPv6)
+			self._Store(key, addr, ttl)
+		elif isRefreshDue:
+			threading.Thread(
+				target=self._Refresh,
+				args=(key, entry),
+				name='ResolutionCacheRefresh',
+				daemon=True,
+			).start()
+		return addr
+
+	def GetStats(self) -> Dict[str, int]:
+		with self._lock:
+			return {
+				'names': len(self._entries),
+				'hits': self._numHits,
+				'misses': self._numMisses,
+				'refreshes': self._numRefreshes,
+			}
@@ -21,10 +21,12 @@ from ModularDNS.Downstream.QuickLookup import QuickLookup as _IPAddrLookup
 
 from ..Inbound.FindCreator import FindServerCreator
 from ..Inbound.LegacyServer import Server
+from ..Inbound.Server.ListenerOptions import ListenerOptions
 from ..Outbound.FindCreator import FindConnector
 from ..Outbound.Handler import HandlerConnector
 from ..Utils.IfaceSetup.IPManager import CreateIPManager
 from ..Utils.RandIPGenerator import RandIPGenerator
+from .ResolutionCache import ResolutionCache
 
 
 _IP_ADDRESS_TYPES   = Union[ ipaddress.IPv4Address,   ipaddress.IPv6Address   ]
@@ -40,6 +42,8 @@ def CreateServerWithRemoteHostName(
 	remotePort: int,
 	remoteIPLookup: _IPAddrLookup,
 	remotePreferIPv6: bool,
+	happyEyeballs: bool = False,
+	listenerOptions: dict | None = None,
 ) -> Server:
 	def _ipLookup(hostname: str) -> _IP_ADDRESS_TYPES:
 		return remoteIPLookup.LookupIpAddr(
@@ -48,19 +52,48 @@ def CreateServerWithRemoteHostName(
 			preferIPv6=remotePreferIPv6
 		)
 
+	def _ipsLookup(hostname: str) -> List[_IP_ADDRESS_TYPES]:
+		# one address of each family, if the name has both
+		addrs = []
+		lastError = None
+		for preferIPv6 in (remotePreferIPv6, not remotePreferIPv6):
+			try:
+				addrs.append(remoteIPLookup.LookupIpAddr(
+					domain=hostname,
+					recDepthStack=[],
+					preferIPv6=preferIPv6
+				))
+			except Exception as e:
+				lastError = e
+		if not addrs:
+			raise lastError
+		return addrs
+
 	inSvrCreator = FindServerCreator(proto)
 	outConnectorCls = FindConnector(proto)['dynamic']
 
+	connectorKwargs = {}
+	if happyEyeballs:
+		connectorKwargs = {
+			'addrsLookup': _ipsLookup,
+			'preferIPv6': remotePreferIPv6,
+		}
 	connector: HandlerConnector = outConnectorCls(
 		hostName=remoteHost,
 		port=remotePort,
 		addrLookup=_ipLookup,
+		**connectorKwargs,
 	)
 
+	serverKwargs = {}
+	if listenerOptions is not None:
+		# e.g., {"backlog": 128, "acceptBatch": 16}
+		serverKwargs['listenerOptions'] = ListenerOptions.FromConfig(listenerOptions)
 	server: Server = inSvrCreator(
 		address=localHost,
 		port=localPort,
 		handlerConnector=connector,
+		**serverKwargs,
 	)
 
 	return server
@@ -78,6 +111,8 @@ class ServiceItem(KeyValueItem):
 		remotePort: int,
 		remoteIPLookup: _IPAddrLookup,
 		remotePreferIPv6: bool,
+		happyEyeballs: bool = False,
+		listenerOptions: dict | None = None,
 	) -> None:
 		super(ServiceItem, self).__init__()
 
@@ -92,6 +127,8 @@ class ServiceItem(KeyValueItem):
 		self._remotePort       = remotePort
 		self._remoteIPLookup   = remoteIPLookup
 		self._remotePreferIPv6 = remotePreferIPv6
+		self._happyEyeballs    = happyEyeballs
+		self._listenerOptions  = listenerOptions
 
 		# create server
 		self._server = CreateServerWithRemoteHostName(
@@ -102,6 +139,8 @@ class ServiceItem(KeyValueItem):
 			remotePort=self._remotePort,
 			remoteIPLookup=self._remoteIPLookup,
 			remotePreferIPv6=self._remotePreferIPv6,
+			happyEyeballs=self._happyEyeballs,
+			listenerOptions=self._listenerOptions,
 		)
 		self._server.ThreadedServeUntilTerminate()
 
@@ -132,6 +171,8 @@ class ServerItem(KeyValueItem):
 		remoteHost: str,
 		remoteIPLookup: _IPAddrLookup,
 		remotePreferIPv6: bool = False,
+		happyEyeballs: bool = False,
+		listenerOptions: dict | None = None,
 	) -> None:
 		super(ServerItem, self).__init__()
 
@@ -142,6 +183,8 @@ class ServerItem(KeyValueItem):
 		self._remoteHost       = remoteHost
 		self._remoteIPLookup   = remoteIPLookup
 		self._remotePreferIPv6 = remotePreferIPv6
+		self._happyEyeballs    = happyEyeballs
+		self._listenerOptions  = listenerOptions
 
 		self._protoAndPorts = protoAndPorts
 
@@ -174,6 +217,8 @@ class ServerItem(KeyValueItem):
 				remotePort=remotePort,
 				remoteIPLookup=self._remoteIPLookup,
 				remotePreferIPv6=self._remotePreferIPv6,
+				happyEyeballs=self._happyEyeballs,
+				listenerOptions=self._listenerOptions,
 			)
 			self._services.append(service)
 
@@ -206,6 +251,10 @@ class ServerManager(Terminable):
 		remoteIPLookup: _IPAddrLookup,
 		serverTTL: Tuple[int, str],
 		remotePreferIPv6: bool = False,
+		happyEyeballs: bool = False,
+		remoteLookupCache: bool = True,
+		remoteLookupFallbackTTL: float = 60.0,
+		listenerOptions: dict | None = None,
 	) -> None:
 		super(ServerManager, self).__init__()
 
@@ -215,8 +264,17 @@ class ServerManager(Terminable):
 
 		self._protoAndPorts  = protoAndPorts
 
+		# the lookups to validate names, and those made by the connectors
+		# for every connection, are answered from the same cache
 		self._remoteIPLookup   = remoteIPLookup
+		if remoteLookupCache:
+			self._remoteIPLookup = ResolutionCache(
+				remoteIPLookup,
+				fallbackTTL=remoteLookupFallbackTTL,
+			)
 		self._remotePreferIPv6 = remotePreferIPv6
+		self._happyEyeballs    = happyEyeballs
+		self._listenerOptions  = listenerOptions
 
 		self._serverTTL = serverTTL
 
@@ -224,8 +282,12 @@ class ServerManager(Terminable):
 			network=self._localNet,
 		)
 
+		# every access to the cache, and to the servers in it, is made with
+		# this lock held; lookups come from many handler threads at once,
+		# which really run in parallel on the free-threaded build
 		self._cacheLock = LockwSLD()
 		self._cache = MultiKeyUniTTLValueCache(ttl=self._serverTTL)
+		self._isTerminated = False
 
 		self._logger = logging.getLogger(
 			f'{__name__}.{self.__class__.__name__}'
@@ -276,6 +338,8 @@ class ServerManager(Terminable):
 				remoteHost=hostName,
 				remoteIPLookup=self._remoteIPLookup,
 				remotePreferIPv6=self._remotePreferIPv6,
+				happyEyeballs=self._happyEyeballs,
+				listenerOptions=self._listenerOptions,
 			)
 			# try to put the server item into the cache
 			try:
@@ -295,11 +359,15 @@ class ServerManager(Terminable):
 
 	def LookupOrCreateServer(self, hostName: str) -> _IP_ADDRESS_TYPES:
 		with self._cacheLock:
+			if self._isTerminated:
+				# a server created now would never be terminated
+				raise RuntimeError('The server manager has been terminated')
 			serverItem = self._LookupOrCreateServerLockHeld(hostName)
 			return serverItem.GetServerIP()
 
 	def Terminate(self) -> None:
 		# terminate all servers
 		with self._cacheLock:
+			self._isTerminated = True
 			self._cache.Terminate()
 
@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+# -*- coding:utf-8 -*-
+###
+# Copyright (c) 2025 Haofan Zheng
+# Use of this source code is governed by an MIT-style
+# license that can be found in the LICENSE file or at
+# https://opensource.org/licenses/MIT.
+###
+
+
+import collections
+import selectors
+import socket
+import ssl
+import threading
+import time
+
+from typing import Deque, Dict, Tuple
+
+from ...Utils.Selector import ConnectionSelector
+
+
+def IsReadable(sock: socket.socket) -> bool:
+	'''
+	Check, without blocking, whether a socket has anything to read (or has
+	been closed); unlike `select.select`, not limited to fds below 1024.
+	'''
+	try:
+		with ConnectionSelector() as selector:
+			selector.register(sock, selectors.EVENT_READ)
+			return bool(selector.select(0))
+	except (OSError, ValueError):
+		# e.g., the socket has been closed
+		return True
+
+
+def IsIdleConnAlive(sock: socket.socket) -> bool:
+	'''
+	Check, without blocking, that an idle connection has not been closed
+	by the peer. An idle connection with anything to read is either closed
+	or out of sync, so it is not reusable either way.
+	'''
+	if isinstance(sock, ssl.SSLSocket) and sock.pending():
+		return False
+	return not IsReadable(sock)
+
+
+class KeepAlivePool(object):
+	'''
+	Idle keep-alive connections to one backend, so that later requests
+	can skip connecting (and the TLS handshake).
+	At most `maxIdle` connections are kept, each for at most `idleTimeout`
+	seconds; the most recently used one is handed out first.
+	'''
+
+	def __init__(
+		self,
+		maxIdle: int = 32,
+		idleTimeout: float = 30.0,
+	) -> None:
+		super(KeepAlivePool, self).__init__()
+
+		self._maxIdle = maxIdle
+		self._idleTimeout = idleTimeout
+
+		# (socket, time it became idle), oldest first
+		self._idle: Deque[Tuple[socket.socket, float]] = collections.deque()
+		self._idleLock = threading.Lock()
+
+		self._numHits = 0
+		self._numMisses = 0
+
+	def Acquire(self) -> socket.socket | None:
+		'''
+		Take a live idle connection out of the pool; None if there is none.
+		'''
+		now = time.monotonic()
+		while True:
+			with self._idleLock:
+				if not self._idle:
+					self._numMisses += 1
+					return None
+				sock, idleSince = self._idle.pop()
+
+			if (now - idleSince <= self._idleTimeout) and IsIdleConnAlive(sock):
+				with self._idleLock:
+					self._numHits += 1
+				return sock
+			sock.close()
+
+	def Release(self, sock: socket.socket) -> None:
+		'''Put a connection, done with its last response, back to the pool.'''
+		now = time.monotonic()
+		toClose = []
+		with self._idleLock:
+			self._idle.append((sock, now))
+			while (
+				(len(self._idle) > self._maxIdle) or
+				(now - self._idle[0][1] > self._idleTimeout)
+			):
+				toClose.append(self._idle.popleft()[0])
+
+		for sock in toClose:
+			sock.close()
+
+	def GetStats(self) -> Dict[str, int]:
+		with self._idleLock:
+			return {
+				'idle': len(self._idle),
+				'hits': self._numHits,
+				'misses': self._numMisses,
+			}
+
+	def close(self) -> None:
+		with self._idleLock:
+			idle = list(self._idle)
+			self._idle.clear()
+		for sock, _ in idle:
+			sock.close()
@@ -0,0 +1,258 @@
+#!/usr/bin/env python3
+# -*- coding:utf-8 -*-
+###
+# Copyright (c) 2025 Haofan Zheng
+# Use of this source code is governed by an MIT-style
+# license that can be found in the LICENSE file or at
+# https://opensource.org/licenses/MIT.
+###
+
+
+import re
+import socket
+
+from typing import Dict, List
+
+from .Reader import SocketReader
+
+
+# how the end of a message body is found
+BODY_NONE = 'none'
+BODY_LENGTH = 'length'
+BODY_CHUNKED = 'chunked'
+BODY_UNTIL_CLOSE = 'until-close'
+
+# field names (RFC 9110, section 5.1)
+_TOKEN_RE = re.compile(r"[!#$%&'*+.^_`|~0-9A-Za-z-]+")
+_CHUNK_SIZE_RE = re.compile(rb'[0-9A-Fa-f]+')
+
+
+class HTTPHead(object):
+	'''
+	The start line and header fields of an HTTP/1.x message.
+	The raw bytes are kept, so the message can be forwarded unchanged.
+	'''
+
+	def __init__(self, raw: bytes) -> None:
+		super(HTTPHead, self).__init__()
+
+		self.raw = raw
+
+		lines = raw.decode('latin-1').split('\r\n')
+		self.startLine = lines[0].split(' ', 2)
+		if len(self.startLine) < 2:
+			raise ValueError(f'Malformed HTTP start line: {lines[0]!r}')
+
+		self.headers: Dict[str, List[str]] = {}
+		for line in lines[1:]:
+			if not line:
+				continue
+			if line[0] in ' \t':
+				# obs-fold, which not every recipient unfolds the same way
+				raise ValueError(f'Folded HTTP header line: {line!r}')
+			name, sep, value = line.partition(':')
+			# no whitespace before the colon (RFC 9112, section 5.1)
+			if (
+				(not sep) or
+				(not _TOKEN_RE.fullmatch(name)) or
+				('\r' in value) or
+				('\n' in value)
+			):
+				raise ValueError(f'Malformed HTTP header line: {line!r}')
+			self.headers.setdefault(name.lower(), []).append(value.strip(' \t'))
+
+	def GetHeader(self, name: str) -> str | None:
+		values = self.headers.get(name)
+		return None if values is None else ', '.join(values)
+
+	def GetTokens(self, name: str) -> List[str]:
+		value = self.GetHeader(name)
+		if value is None:
+			return []
+		return [ token.strip().lower() for token in value.split(',') ]
+
+	def HasTransferEncoding(self) -> bool:
+		return 'transfer-encoding' in self.headers
+
+	def IsChunked(self) -> bool:
+		tokens = self.GetTokens('transfer-encoding')
+		return bool(tokens) and (tokens[-1] == 'chunked')
+
+	def GetContentLength(self) -> int | None:
+		value = self.GetHeader('content-length')
+		if value is None:
+			return None
+		# repeated (but equal) values are folded into a list
+		values = { v.strip(' \t') for v in value.split(',') }
+		for v in values:
+			if not (v.isascii() and v.isdigit()):
+				raise ValueError(f'Invalid Content-Length: {value}')
+		if len(values) != 1:
+			raise ValueError(f'Conflicting Content-Length: {value}')
+		return int(values.pop())
+
+	def _CheckFraming(self) -> None:
+		'''
+		Reject the framings that recipients may disagree on, which request
+		smuggling relies on (RFC 9112, section 6.3).
+		'''
+		if self.HasTransferEncoding() and ('content-length' in self.headers):
+			raise ValueError('Both Transfer-Encoding and Content-Length are present')
+		self.GetContentLength()
+
+	def IsKeepAlive(self, version: str) -> bool:
+		connection = self.GetTokens('connection')
+		if 'close' in connection:
+			return False
+		if version == 'HTTP/1.0':
+			return 'keep-alive' in connection
+		return True
+
+
+class HTTPRequestHead(HTTPHead):
+
+	def __init__(self, raw: bytes) -> None:
+		super(HTTPRequestHead, self).__init__(raw)
+
+		if len(self.startLine) != 3:
+			raise ValueError(f'Malformed HTTP request line: {self.startLine}')
+		self.method = self.startLine[0].upper()
+		self.version = self.startLine[2]
+
+		self._CheckFraming()
+
+	def _CheckFraming(self) -> None:
+		super(HTTPRequestHead, self)._CheckFraming()
+
+		tokens = self.GetTokens('transfer-encoding')
+		if tokens and ((tokens[-1] != 'chunked') or (tokens.count('chunked') > 1)):
+			raise ValueError(
+				f'Transfer-Encoding does not end with chunked: {tokens}'
+			)
+
+	def GetBodyFraming(self) -> str:
+		if self.IsChunked():
+			return BODY_CHUNKED
+		if self.GetContentLength():
+			return BODY_LENGTH
+		return BODY_NONE
+
+	def IsKeepAliveRequest(self) -> bool:
+		return self.IsKeepAlive(self.version)
+
+
+class HTTPResponseHead(HTTPHead):
+
+	def __init__(self, raw: bytes) -> None:
+		super(HTTPResponseHead, self).__init__(raw)
+
+		self.version = self.startLine[0]
+		self.status = int(self.startLine[1])
+
+		self._CheckFraming()
+
+	def IsInterim(self) -> bool:
+		'''1xx responses other than 101 are followed by the final response.'''
+		return (100 <= self.status < 200) and (self.status != 101)
+
+	def GetBodyFraming(self, requestMethod: str) -> str:
+		if (
+			(requestMethod == 'HEAD') or
+			(100 <= self.status < 200) or
+			(self.status in (204, 304))
+		):
+			return BODY_NONE
+		if (requestMethod == 'CONNECT') and (200 <= self.status < 300):
+			return BODY_NONE
+		if self.IsChunked():
+			return BODY_CHUNKED
+		if self.HasTransferEncoding():
+			return BODY_UNTIL_CLOSE
+		if self.GetContentLength() is not None:
+			return BODY_LENGTH
+		return BODY_UNTIL_CLOSE
+
+	def IsKeepAliveResponse(self) -> bool:
+		return self.IsKeepAlive(self.version)
+
+
+def ReadHead(reader: SocketReader, maxSize: int) -> bytes | None:
+	'''
+	Read the head of a message, skipping empty lines in front of it.
+
+	:return: The raw head, or None if the peer closed the connection
+		before sending anything.
+	'''
+	while True:
+		raw = reader.ReadUntil(b'\r\n\r\n', maxSize)
+		if raw is None:
+			return None
+		# tolerate the stray CRLF some clients send after a body
+		raw = raw.lstrip(b'\r\n')
+		if raw:
+			return raw
+
+
+def ForwardBody(
+	reader: SocketReader,
+	dst: socket.socket,
+	framing: str,
+	contentLength: int | None,
+	readSize: int,
+	maxLineSize: int,
+) -> None:
+	'''
+	Forward a message body from `reader` to `dst`, as is, stopping right
+	at its end.
+	'''
+	if framing == BODY_NONE:
+		return
+
+	if framing == BODY_LENGTH:
+		_ForwardExactly(reader, dst, contentLength, readSize)
+		return
+
+	if framing == BODY_UNTIL_CLOSE:
+		while True:
+			data = reader.Read(readSize)
+			if not data:
+				return
+			dst.sendall(data)
+
+	# chunked: chunk-size line, chunk data, CRLF; and trailers after the
+	# last (empty) chunk
+	while True:
+		line = reader.ReadUntil(b'\r\n', maxLineSize)
+		if line is None:
+			raise ConnectionError('Connection closed mid-message')
+		dst.sendall(line)
+
+		sizeField = line[:-2].split(b';', 1)[0].rstrip(b' \t')
+		if not _CHUNK_SIZE_RE.fullmatch(sizeField):
+			raise ValueError(f'Malformed chunk size line: {line!r}')
+		chunkSize = int(sizeField, 16)
+		if chunkSize == 0:
+			break
+		_ForwardExactly(reader, dst, chunkSize + 2, readSize)
+
+	while True:
+		line = reader.ReadUntil(b'\r\n', maxLineSize)
+		if line is None:
+			raise ConnectionError('Connection closed mid-message')
+		dst.sendall(line)
+		if line == b'\r\n':
+			return
+
+
+def _ForwardExactly(
+	reader: SocketReader,
+	dst: socket.socket,
+	size: int,
+	readSize: int,
+) -> None:
+	while size > 0:
+		data = reader.Read(min(size, readSize))
+		if not data:
+			raise ConnectionError('Connection closed mid-message')
+		dst.sendall(data)
+		size -= len(data)
@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+# -*- coding:utf-8 -*-
+###
+# Copyright (c) 2025 Haofan Zheng
+# Use of this source code is governed by an MIT-style
+# license that can be found in the LICENSE file or at
+# https://opensource.org/licenses/MIT.
+###
+
+
+import selectors
+import socket
+import ssl
+
+from ...Utils.Selector import ConnectionSelector
+from ...Utils.TerminateWaker import TerminateWaker
+
+
+class ServerTerminating(Exception):
+	pass
+
+
+class SocketReader(object):
+	'''
+	Buffered reads from a (TLS) socket, for parsing line based protocols.
+	Waiting for data ends after `timeout` seconds, or as soon as the
+	`terminateWaker` is set.
+	'''
+
+	def __init__(
+		self,
+		sock: socket.socket,
+		readSize: int = 16384,
+		timeout: float | None = None,
+		terminateWaker: TerminateWaker | None = None,
+	) -> None:
+		super(SocketReader, self).__init__()
+
+		self.sock = sock
+		self._readSize = readSize
+		self._timeout = timeout
+		self._terminateWaker = terminateWaker
+
+		self._buf = bytearray()
+
+		self._selector = ConnectionSelector()
+		self._selector.register(sock, selectors.EVENT_READ)
+		if terminateWaker is not None:
+			self._selector.register(terminateWaker, selectors.EVENT_READ)
+
+	def close(self) -> None:
+		self._selector.close()
+
+	def NumBuffered(self) -> int:
+		return len(self._buf)
+
+	def _Fill(self) -> bool:
+		'''
+		Read more data into the buffer.
+
+		:return: False if the peer has closed the connection.
+		'''
+		isPending = isinstance(self.sock, ssl.SSLSocket) and self.sock.pending()
+		if not isPending:
+			events = self._selector.select(self._timeout)
+			if not events:
+				raise TimeoutError('Timed out waiting for data')
+			for key, mask in events:
+				if key.fileobj is self._terminateWaker:
+					raise ServerTerminating()
+
+		data = self.sock.recv(self._readSize)
+		if not data:
+			return False
+		self._buf += data
+		return True
+
+	def ReadUntil(self, delimiter: bytes, maxSize: int) -> bytes | None:
+		'''
+		Read up to and including `delimiter`.
+
+		:return: The data read, or None if the peer closed the connection
+			before sending anything.
+		'''
+		searchStart = 0
+		while True:
+			pos = self._buf.find(delimiter, searchStart)
+			if pos >= 0:
+				end = pos + len(delimiter)
+				data = bytes(self._buf[:end])
+				del self._buf[:end]
+				return data
+
+			if len(self._buf) > maxSize:
+				raise ValueError(f'Line or header exceeds {maxSize} bytes')
+			searchStart = max(0, len(self._buf) - len(delimiter) + 1)
+
+			if not self._Fill():
+				if self._buf:
+					raise ConnectionError('Connection closed mid-message')
+				return None
+
+	def Read(self, maxSize: int) -> bytes:
+		'''
+		Read up to `maxSize` bytes.
+
+		:return: The data read; empty if the peer closed the connection.
+		'''
+		if not self._buf:
+			if not self._Fill():
+				return b''
+		data = bytes(self._buf[:maxSize])
+		del self._buf[:maxSize]
+		return data
+
+	def TakeBuffered(self) -> bytes:
+		'''Take everything that has been read but not consumed yet.'''
+		data = bytes(self._buf)
+		self._buf.clear()
+		return data
@@ -0,0 +1,387 @@
+#!/usr/bin/env python3
+# -*- coding:utf-8 -*-
+###
+# Copyright (c) 2025 Haofan Zheng
+# Use of this source code is governed by an MIT-style
+# license that can be found in the LICENSE file or at
+# https://opensource.org/licenses/MIT.
+###
+
+
+import logging
+import socket
+import ssl
+import threading
+
+from typing import Any, Tuple
+
+from PyNetworkLib.Server.TCP.PyHandlerBase import PyHandlerBase
+from PyNetworkLib.Server.Utils.HandlerState import HandlerState
+
+from ..HTTP.KeepAlivePool import KeepAlivePool
+from ..HTTP.Message import (
+	BODY_LENGTH,
+	BODY_NONE,
+	BODY_UNTIL_CLOSE,
+	ForwardBody,
+	HTTPRequestHead,
+	HTTPResponseHead,
+	ReadHead,
+)
+from ..HTTP.Reader import ServerTerminating, SocketReader
+from ..Relay.Copy import CopyRelay
+from ...Utils.TerminateWaker import TerminateWaker
+from .HandlerDict import HandlerBase, HandlerDict
+
+
+_BAD_REQUEST_RESP = (
+	b'HTTP/1.1 400 Bad Request\r\n'
+	b'Content-Length: 0\r\n'
+	b'Connection: close\r\n'
+	b'\r\n'
+)
+
+# methods that can be sent again without changing their effect
+# (RFC 9110, section 9.2.2)
+_IDEMPOTENT_METHODS = frozenset((
+	'GET',
+	'HEAD',
+	'OPTIONS',
+	'TRACE',
+	'PUT',
+	'DELETE',
+))
+# the largest request body kept to be sent again on a new connection
+_MAX_REPLAY_BODY_SIZE = 65536
+
+
+class _BackendClosed(ConnectionError):
+	pass
+
+
+# how a pooled connection, closed by the backend, fails
+_STALE_CONN_ERRORS = (
+	_BackendClosed,
+	BrokenPipeError,
+	ConnectionResetError,
+	ssl.SSLEOFError,
+)
+
+
+class _BodyRecorder(object):
+	'''
+	Send a request body to a backend, keeping a copy of it, unless it is
+	larger than `maxSize`.
+	'''
+
+	def __init__(self, dst: socket.socket, maxSize: int) -> None:
+		super(_BodyRecorder, self).__init__()
+
+		self._dst = dst
+		self._maxSize = maxSize
+		self._body: bytearray | None = bytearray()
+
+	def sendall(self, data: bytes) -> None:
+		if self._body is not None:
+			if len(self._body) + len(data) > self._maxSize:
+				self._body = None
+			else:
+				self._body += data
+		self._dst.sendall(data)
+
+	def GetBody(self) -> bytes | None:
+		return None if self._body is None else bytes(self._body)
+
+class HTTPRepeatHandler(HandlerBase):
+	'''
+	Relay HTTP/1.x connections request by request, so that backend
+	connections can be kept alive and shared by later client connections.
+
+	Backend connections are made by `downstreamHandler` (e.g., a
+	`tcp_repeat` or `tls_repeat` handler), and kept in a `KeepAlivePool`
+	between requests. Messages are forwarded unchanged; only their framing
+	is parsed, to find where each one ends.
+	Upgraded connections (e.g., WebSocket) and CONNECT tunnels are relayed
+	opaquely once established, and their backend connections not reused.
+	'''
+
+	@classmethod
+	def FromConfig(
+		cls,
+		handlersDict: HandlerDict,
+		*,
+		downstreamHandler: str,
+		maxIdle: int = 32,
+		idleTimeout: float = 30.0,
+		clientIdleTimeout: float = 60.0,
+		backendTimeout: float = 60.0,
+		maxHeaderSize: int = 65536,
+		readSize: int = 16384,
+		pollInterval: float = 0.1,
+	) -> 'HTTPRepeatHandler':
+		return cls(
+			downstreamHandler=handlersDict.GetHandler(downstreamHandler),
+			maxIdle=maxIdle,
+			idleTimeout=idleTimeout,
+			clientIdleTimeout=clientIdleTimeout,
+			backendTimeout=backendTimeout,
+			maxHeaderSize=maxHeaderSize,
+			readSize=readSize,
+			pollInterval=pollInterval,
+		)
+
+	def __init__(
+		self,
+		downstreamHandler: HandlerBase,
+		maxIdle: int = 32,
+		idleTimeout: float = 30.0,
+		clientIdleTimeout: float = 60.0,
+		backendTimeout: float = 60.0,
+		maxHeaderSize: int = 65536,
+		readSize: int = 16384,
+		pollInterval: float = 0.1,
+	) -> None:
+		super(HTTPRepeatHandler, self).__init__()
+
+		if not hasattr(downstreamHandler, 'ConnectDownstream'):
+			raise TypeError(
+				f'{type(downstreamHandler).__name__} cannot be used as an HTTP backend'
+			)
+
+		self._downstreamHdlr = downstreamHandler
+		# e.g., whether Fast Open was used is known once data was sent
+		self._recordBackend = getattr(downstreamHandler, 'RecordDownstream', None)
+		self._clientIdleTimeout = clientIdleTimeout
+		self._backendTimeout = backendTimeout
+		self._maxHeaderSize = maxHeaderSize
+		self._readSize = readSize
+		self._pollInterval = pollInterval
+
+		self.pool = KeepAlivePool(maxIdle=maxIdle, idleTimeout=idleTimeout)
+
+	def Terminate(self) -> None:
+		self.pool.close()
+
+	def _ForwardBody(
+		self,
+		reader: SocketReader,
+		dst: socket.socket,
+		framing: str,
+		head: HTTPRequestHead | HTTPResponseHead,
+	) -> None:
+		ForwardBody(
+			reader,
+			dst,
+			framing,
+			head.GetContentLength() if framing == BODY_LENGTH else None,
+			self._readSize,
+			self._maxHeaderSize,
+		)
+
+	def _ReadResponseHead(self, backendReader: SocketReader) -> HTTPResponseHead:
+		respRaw = ReadHead(backendReader, self._maxHeaderSize)
+		if respRaw is None:
+			raise _BackendClosed('Backend closed the connection')
+		return HTTPResponseHead(respRaw)
+
+	def _SendRequest(
+		self,
+		req: HTTPRequestHead,
+		clientReader: SocketReader,
+		terminateWaker: TerminateWaker | None,
+	) -> Tuple[socket.socket, SocketReader, HTTPResponseHead, bool]:
+		'''
+		Send the request to a backend connection, from the pool if possible,
+		and read the head of the first response.
+		A pooled connection may have been closed by the backend while it was
+		idle, which only shows once the request has been sent; if it fails
+		before any response, the request is sent again on a new connection,
+		as long as it has no body, or it is idempotent and its body was small
+		enough to be kept.
+
+		:return: The backend connection, its reader, the response head, and
+			whether the request body was sent (the backend may answer an
+			`Expect: 100-continue` request without it).
+		'''
+		reqFraming = req.GetBodyFraming()
+		isExpectContinue = (
+			(reqFraming != BODY_NONE) and
+			('100-continue' in req.GetTokens('expect'))
+		)
+		isReplayable = (
+			(reqFraming == BODY_NONE) or (req.method in _IDEMPOTENT_METHODS)
+		)
+		isBodyPending = reqFraming != BODY_NONE
+		# the body sent, if it can be sent again
+		body: bytes | None = b''
+
+		for isRetry in (False, True):
+			backend = None if isRetry else self.pool.Acquire()
+			isPooled = backend is not None
+			if backend is None:
+				backend = self._downstreamHdlr.ConnectDownstream()
+			backendReader = SocketReader(
+				backend,
+				readSize=self._readSize,
+				timeout=self._backendTimeout,
+				terminateWaker=terminateWaker,
+			)
+
+			isRespStarted = False
+			try:
+				backend.sendall(req.raw)
+				if (not isPooled) and (self._recordBackend is not None):
+					self._recordBackend(backend)
+				if isBodyPending and isExpectContinue:
+					# let the backend decide whether it wants the body
+					resp = self._ReadResponseHead(backendReader)
+					isRespStarted = True
+					if not resp.IsInterim():
+						return backend, backendReader, resp, False
+					clientReader.sock.sendall(resp.raw)
+
+				if isBodyPending:
+					isBodyPending = False
+					body = None
+					if isReplayable:
+						recorder = _BodyRecorder(backend, _MAX_REPLAY_BODY_SIZE)
+						self._ForwardBody(clientReader, recorder, reqFraming, req)
+						body = recorder.GetBody()
+					else:
+						self._ForwardBody(clientReader, backend, reqFraming, req)
+				elif body:
+					backend.sendall(body)
+
+				resp = self._ReadResponseHead(backendReader)
+				return backend, backendReader, resp, True
+			except _STALE_CONN_ERRORS:
+				isRetryable = (
+					isPooled and
+					isReplayable and
+					(not isRespStarted) and
+					(backendReader.NumBuffered() == 0) and
+					(isBodyPending or (body is not None))
+				)
+				backendReader.close()
+				backend.close()
+				if isRetryable:
+					continue
+				raise
+			except BaseException:
+				backendReader.close()
+				backend.close()
+				raise
+
+		raise ConnectionError('Failed to send the request to the backend')
+
+	def _HandleOne(
+		self,
+		clientReader: SocketReader,
+		terminateEvent: threading.Event,
+		terminateWaker: TerminateWaker | None,
+		logger: logging.Logger,
+		cltAddr: Any,
+	) -> bool:
+		'''
+		Relay one request and its response.
+
+		:return: True if the client connection can take another request.
+		'''
+		reqRaw = ReadHead(clientReader, self._maxHeaderSize)
+		if reqRaw is None:
+			return False
+		client = clientReader.sock
+		try:
+			req = HTTPRequestHead(reqRaw)
+		except ValueError as e:
+			# the rest of the connection can not be framed either
+			logger.debug(f'Bad request from {cltAddr}: {e}')
+			client.sendall(_BAD_REQUEST_RESP)
+			return False
+
+		# if the backend answered without reading the request body, the
+		# client may still send it
+		backend, backendReader, resp, isClientReusable = self._SendRequest(
+			req,
+			clientReader,
+			terminateWaker,
+		)
+		isBackendReusable = False
+		try:
+			while resp.IsInterim():
+				client.sendall(resp.raw)
+				resp = self._ReadResponseHead(backendReader)
+
+			client.sendall(resp.raw)
+
+			if (resp.status == 101) or (
+				(req.method == 'CONNECT') and (200 <= resp.status < 300)
+			):
+				# from now on, the bytes are not HTTP anymore
+				backend.sendall(clientReader.TakeBuffered())
+				client.sendall(backendReader.TakeBuffered())
+				CopyRelay(
+					upstream=client,
+					downstream=backend,
+					terminateEvent=terminateEvent,
+					pollInterval=self._pollInterval,
+					buffer=memoryview(bytearray(self._readSize)),
+					logger=logger,
+					upstreamAddr=cltAddr,
+					terminateWaker=terminateWaker,
+				)
+				return False
+
+			respFraming = resp.GetBodyFraming(req.method)
+			self._ForwardBody(backendReader, client, respFraming, resp)
+
+			isKeepAlive = (
+				req.IsKeepAliveRequest() and
+				resp.IsKeepAliveResponse() and
+				(respFraming != BODY_UNTIL_CLOSE)
+			)
+			isBackendReusable = isKeepAlive and (backendReader.NumBuffered() == 0)
+			return isKeepAlive and isClientReusable
+		finally:
+			backendReader.close()
+			if isBackendReusable:
+				self.pool.Release(backend)
+			else:
+				backend.close()
+
+	def HandleRequest(
+		self,
+		*,
+		pyHandler: PyHandlerBase,
+		handlerState : HandlerState,
+		reqState: dict,
+		terminateEvent: threading.Event,
+	) -> None:
+		logger = pyHandler.server.handlerLogger
+		# only available on the servers of this package
+		terminateWaker = getattr(pyHandler.server, 'terminateWaker', None)
+
+		clientReader = SocketReader(
+			pyHandler.request,
+			readSize=self._readSize,
+			timeout=self._clientIdleTimeout,
+			terminateWaker=terminateWaker,
+		)
+		try:
+			while not terminateEvent.is_set():
+				if not self._HandleOne(
+					clientReader,
+					terminateEvent,
+					terminateWaker,
+					logger,
+					pyHandler.client_address,
+				):
+					break
+		except ServerTerminating:
+			pass
+		except Exception as e:
+			logger.debug(
+				f'Handler for {pyHandler.client_address} failed with error: {e}'
+			)
+		finally:
+			clientReader.close()
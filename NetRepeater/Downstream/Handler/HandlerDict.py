@@ -34,6 +34,13 @@ class HandlerBase(DownstreamHandlerBase):
 		'''
 		raise NotImplementedError(f'{cls.__name__}.FromConfig is not implemented.')
 
+	def Terminate(self) -> None:
+		'''
+		Release what the handler holds across requests (e.g., pooled
+		connections), once the servers using it have been terminated.
+		'''
+		pass
+
 
 # type of items in the dictionary
 _T = TypeVar('_T')
@@ -78,7 +85,16 @@ class HandlerDictBase(Generic[_T]):
 
 
 class HandlerDict(HandlerDictBase[HandlerBase]):
-	pass
+
+	def Terminate(self) -> None:
+		'''Terminate all handlers, the last added first.'''
+		with self._handlersLock:
+			handlers = list(self._handlers.items())
+		for name, handler in reversed(handlers):
+			try:
+				handler.Terminate()
+			except Exception as e:
+				self._logger.error(f'Failed to terminate handler {name}: {e}')
 
 
 class HandlerModDict(HandlerDictBase[Type[HandlerBase]]):
@@ -13,14 +13,26 @@ import logging
 from .HandlerDict import HandlerDict, HandlerModDict
 
 from .AutoBlockByRate import AutoBlockByRate
+from .HTTPRepeatHandler import HTTPRepeatHandler
+from .MirrorHandler import MirrorHandler
+from .ShapeByRateHandler import ShapeByRateHandler
+from .SNIRouteHandler import SNIRouteHandler
 from .TCPRepeatHandler import TCPRepeatHandler
 from .TLSRepeatHandler import TLSRepeatHandler
+from .TunnelClientHandler import TunnelClientHandler
+from .UDPRepeatHandler import UDPRepeatHandler
 
 
 HANDLER_MOD_DICT = HandlerModDict()
 HANDLER_MOD_DICT.AddHandler('auto_block_by_rate', AutoBlockByRate)
+HANDLER_MOD_DICT.AddHandler('http_repeat', HTTPRepeatHandler)
+HANDLER_MOD_DICT.AddHandler('mirror', MirrorHandler)
+HANDLER_MOD_DICT.AddHandler('shape_by_rate', ShapeByRateHandler)
 HANDLER_MOD_DICT.AddHandler('tcp_repeat', TCPRepeatHandler)
 HANDLER_MOD_DICT.AddHandler('tls_repeat', TLSRepeatHandler)
+HANDLER_MOD_DICT.AddHandler('tls_sni_route', SNIRouteHandler)
+HANDLER_MOD_DICT.AddHandler('tunnel_client', TunnelClientHandler)
+HANDLER_MOD_DICT.AddHandler('udp_repeat', UDPRepeatHandler)
 
 
 def BuildHandlerDictFromConfig(config: list[dict]) -> HandlerDict:
@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+# -*- coding:utf-8 -*-
+###
+# Copyright (c) 2025 Haofan Zheng
+# Use of this source code is governed by an MIT-style
+# license that can be found in the LICENSE file or at
+# https://opensource.org/licenses/MIT.
+###
+
+
+import logging
+import threading
+
+from PyNetworkLib.Server.TCP.PyHandlerBase import PyHandlerBase
+from PyNetworkLib.Server.Utils.HandlerState import HandlerState
+
+from ..Relay.Mirror import MirrorCounters, MirrorTap
+from .HandlerDict import HandlerBase, HandlerDict
+from .ShapeByRateHandler import ShapeByRateHandler
+from .StreamRepeatHandlerBase import StreamRepeatHandlerBase, UPSTREAM_TAP_KEY
+
+
+def _IsTapHonored(handler: HandlerBase) -> bool:
+	# the wrapping handlers that pass the request state on, as is
+	while isinstance(handler, ShapeByRateHandler):
+		handler = handler.GetDownstreamHandler()
+	return isinstance(handler, StreamRepeatHandlerBase)
+
+
+class MirrorHandler(HandlerBase):
+	'''
+	Relay connections through the `primary` handler, and copy the data
+	sent by each client to a connection of its own made by the `shadow`
+	handler (e.g., to replay production traffic against a test backend).
+
+	The copy goes through a queue of at most `maxQueueSize` bytes per
+	connection, drained by a background thread; when the shadow is slow
+	or down, data is dropped and counted in `mirrorCounters`, and the
+	primary relay never waits for it. Once the client connection ends, the
+	queue has `closeTimeout` seconds to drain.
+	`primary` must be a `tcp_repeat` or `tls_repeat` handler (or a
+	`shape_by_rate` handler wrapping one), and `shadow` a handler that can
+	make connections.
+	'''
+
+	@classmethod
+	def FromConfig(
+		cls,
+		handlersDict: HandlerDict,
+		*,
+		primary: str,
+		shadow: str,
+		maxQueueSize: int = 4194304,
+		closeTimeout: float = 5.0,
+	) -> 'MirrorHandler':
+		return cls(
+			primary=handlersDict.GetHandler(primary),
+			shadow=handlersDict.GetHandler(shadow),
+			maxQueueSize=maxQueueSize,
+			closeTimeout=closeTimeout,
+		)
+
+	def __init__(
+		self,
+		primary: HandlerBase,
+		shadow: HandlerBase,
+		maxQueueSize: int = 4194304,
+		closeTimeout: float = 5.0,
+	) -> None:
+		super(MirrorHandler, self).__init__()
+
+		if not _IsTapHonored(primary):
+			raise TypeError(
+				f'{type(primary).__name__} cannot be used as a primary'
+			)
+		if not hasattr(shadow, 'ConnectDownstream'):
+			raise TypeError(
+				f'{type(shadow).__name__} cannot be used as a shadow'
+			)
+
+		self._primary = primary
+		self._shadow = shadow
+		self._maxQueueSize = maxQueueSize
+		self._closeTimeout = closeTimeout
+
+		self.mirrorCounters = MirrorCounters()
+
+		self._logger = logging.getLogger(f'{__name__}.{self.__class__.__name__}')
+
+	def Terminate(self) -> None:
+		super().Terminate()
+		self._logger.info(f'Mirror: {self.mirrorCounters.GetStats()}')
+
+	def HandleRequest(
+		self,
+		*,
+		pyHandler: PyHandlerBase,
+		handlerState : HandlerState,
+		reqState: dict,
+		terminateEvent: threading.Event,
+	) -> None:
+		tap = MirrorTap(
+			connect=self._shadow.ConnectDownstream,
+			maxQueueSize=self._maxQueueSize,
+			counters=self.mirrorCounters,
+			logger=self._logger,
+			closeTimeout=self._closeTimeout,
+		)
+		reqState[UPSTREAM_TAP_KEY] = tap
+		try:
+			self._primary.HandleRequest(
+				pyHandler=pyHandler,
+				handlerState=handlerState,
+				reqState=reqState,
+				terminateEvent=terminateEvent,
+			)
+		finally:
+			tap.close()
@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+# -*- coding:utf-8 -*-
+###
+# Copyright (c) 2025 Haofan Zheng
+# Use of this source code is governed by an MIT-style
+# license that can be found in the LICENSE file or at
+# https://opensource.org/licenses/MIT.
+###
+
+
+import threading
+
+from typing import Dict, List, Tuple
+
+from PyNetworkLib.Server.TCP.PyHandlerBase import PyHandlerBase
+from PyNetworkLib.Server.Utils.HandlerState import HandlerState
+
+from ...Utils.SNI import ClientHelloError, PeekClientHelloSNI
+from .HandlerDict import HandlerBase, HandlerDict
+
+
+class SNIRouteHandler(HandlerBase):
+	'''
+	Route TLS connections by the server name (SNI) in their ClientHello,
+	without terminating TLS.
+
+	The ClientHello is only peeked at, so it is still in the socket when
+	the connection is handed to the selected handler, which relays the
+	ciphertext as is (with `splice`, if the handler is configured so).
+
+	`routes` maps host names to handler names; a name starting with `*.`
+	matches any subdomain of it, and the longest such match wins.
+	Connections without a matching name go to `defaultHandler`, or are
+	closed if there is none.
+	'''
+
+	@classmethod
+	def FromConfig(
+		cls,
+		handlersDict: HandlerDict,
+		*,
+		routes: Dict[str, str],
+		defaultHandler: str | None = None,
+		helloTimeout: float = 5.0,
+		maxHelloSize: int = 16384,
+	) -> 'SNIRouteHandler':
+		return cls(
+			routes={
+				hostName: handlersDict.GetHandler(handlerName)
+				for hostName, handlerName in routes.items()
+			},
+			defaultHandler=(
+				None if defaultHandler is None
+				else handlersDict.GetHandler(defaultHandler)
+			),
+			helloTimeout=helloTimeout,
+			maxHelloSize=maxHelloSize,
+		)
+
+	def __init__(
+		self,
+		routes: Dict[str, HandlerBase],
+		defaultHandler: HandlerBase | None = None,
+		helloTimeout: float = 5.0,
+		maxHelloSize: int = 16384,
+	) -> None:
+		super(SNIRouteHandler, self).__init__()
+
+		self._exactRoutes: Dict[str, HandlerBase] = {}
+		# (suffix including the leading dot, handler), longest first
+		self._wildcardRoutes: List[Tuple[str, HandlerBase]] = []
+		for hostName, handler in routes.items():
+			hostName = hostName.lower()
+			if hostName.startswith('*.'):
+				self._wildcardRoutes.append((hostName[1:], handler))
+			else:
+				self._exactRoutes[hostName] = handler
+		self._wildcardRoutes.sort(key=lambda route: len(route[0]), reverse=True)
+
+		self._defaultHandler = defaultHandler
+		self._helloTimeout = helloTimeout
+		self._maxHelloSize = maxHelloSize
+
+	def FindHandler(self, hostName: str | None) -> HandlerBase | None:
+		if hostName is None:
+			return self._defaultHandler
+
+		handler = self._exactRoutes.get(hostName)
+		if handler is not None:
+			return handler
+
+		for suffix, handler in self._wildcardRoutes:
+			if hostName.endswith(suffix):
+				return handler
+
+		return self._defaultHandler
+
+	def HandleRequest(
+		self,
+		*,
+		pyHandler: PyHandlerBase,
+		handlerState : HandlerState,
+		reqState: dict,
+		terminateEvent: threading.Event,
+	) -> None:
+		sock = pyHandler.request
+		origTimeout = sock.gettimeout()
+		sock.settimeout(self._helloTimeout)
+		try:
+			hostName = PeekClientHelloSNI(sock, self._maxHelloSize)
+		except (ClientHelloError, OSError) as e:
+			pyHandler.server.handlerLogger.debug(
+				f'Failed to read the ClientHello from {pyHandler.client_address}: {e}'
+			)
+			return
+		finally:
+			sock.settimeout(origTimeout)
+
+		handler = self.FindHandler(hostName)
+		if handler is None:
+			pyHandler.server.handlerLogger.debug(
+				f'No route for {hostName} from {pyHandler.client_address}'
+			)
+			return
+
+		pyHandler.server.handlerLogger.debug(
+			f'Routing {pyHandler.client_address} by SNI {hostName}'
+		)
+		handler.HandleRequest(
+			pyHandler=pyHandler,
+			handlerState=handlerState,
+			reqState=reqState,
+			terminateEvent=terminateEvent,
+		)
@@ -0,0 +1,209 @@
+#!/usr/bin/env python3
+# -*- coding:utf-8 -*-
+###
+# Copyright (c) 2025 Haofan Zheng
+# Use of this source code is governed by an MIT-style
+# license that can be found in the LICENSE file or at
+# https://opensource.org/licenses/MIT.
+###
+
+
+import threading
+import time
+
+from typing import Dict, List, Tuple
+
+from PyNetworkLib.Server.TCP.PyHandlerBase import PyHandlerBase
+from PyNetworkLib.Server.Utils.HandlerState import HandlerState
+
+from ..Relay.Shaper import RelayShaper, ShapeCounters, TokenBucket
+from .HandlerDict import HandlerBase, HandlerDict
+from .StreamRepeatHandlerBase import RELAY_SHAPER_KEY
+
+
+# smallest default burst, so a single read is never held back on its own
+_MIN_BURST = 65536
+# how often idle client buckets are looked for
+_SWEEP_INTERVAL = 10.0
+
+
+def _DefaultBurst(rate: int) -> int:
+	# 100ms worth of data
+	return max(rate // 10, _MIN_BURST)
+
+
+class _ClientBuckets(object):
+
+	__slots__ = (
+		'toDown',
+		'toUp',
+		'numConnections',
+	)
+
+	def __init__(self, rate: int, burst: int) -> None:
+		super(_ClientBuckets, self).__init__()
+
+		self.toDown = TokenBucket(rate, burst)
+		self.toUp = TokenBucket(rate, burst)
+		self.numConnections = 0
+
+
+class ShapeByRateHandler(HandlerBase):
+	'''
+	Relay connections through the `downstreamHandler`, holding the data
+	sent in each direction to `clientRate` bytes per second per client IP,
+	and to `aggregateRate` bytes per second over all clients; either limit
+	may be left out. Each limit is a token bucket that can take bursts of
+	up to `clientBurst`/`aggregateBurst` bytes (100ms worth of data, but at
+	least 64KiB, by default).
+
+	The connections of a client share its bucket, so a client opening many
+	connections gets no more than one that opens few, and no client can
+	take more than `clientRate` of the aggregate. With `kernelPacing`, the
+	kernel paces each TCP connection to the smaller of the two rates
+	(`SO_MAX_PACING_RATE`), so a lone flow is smoothed out by the kernel,
+	and the relay only waits when flows contend for a bucket. As the
+	relay of a connection runs on one thread, waiting for one direction's
+	bucket stalls the other direction as well.
+	`downstreamHandler` must be a `tcp_repeat` or `tls_repeat` handler (or
+	a handler wrapping one).
+	'''
+
+	@classmethod
+	def FromConfig(
+		cls,
+		handlersDict: HandlerDict,
+		*,
+		downstreamHandler: str,
+		clientRate: int | None = None,
+		clientBurst: int | None = None,
+		aggregateRate: int | None = None,
+		aggregateBurst: int | None = None,
+		kernelPacing: bool = True,
+	) -> 'ShapeByRateHandler':
+		return cls(
+			downstreamHandler=handlersDict.GetHandler(downstreamHandler),
+			clientRate=clientRate,
+			clientBurst=clientBurst,
+			aggregateRate=aggregateRate,
+			aggregateBurst=aggregateBurst,
+			kernelPacing=kernelPacing,
+		)
+
+	def __init__(
+		self,
+		downstreamHandler: HandlerBase,
+		clientRate: int | None = None,
+		clientBurst: int | None = None,
+		aggregateRate: int | None = None,
+		aggregateBurst: int | None = None,
+		kernelPacing: bool = True,
+	) -> None:
+		super(ShapeByRateHandler, self).__init__()
+
+		if (clientRate is None) and (aggregateRate is None):
+			raise ValueError('Either clientRate or aggregateRate must be given')
+
+		self._downstreamHandler = downstreamHandler
+		self._clientRate = clientRate
+		self._clientBurst = None
+		if clientRate is not None:
+			self._clientBurst = clientBurst or _DefaultBurst(clientRate)
+
+		self._aggregate: Tuple[TokenBucket, TokenBucket] | None = None
+		if aggregateRate is not None:
+			burst = aggregateBurst or _DefaultBurst(aggregateRate)
+			self._aggregate = (
+				TokenBucket(aggregateRate, burst),
+				TokenBucket(aggregateRate, burst),
+			)
+
+		self._pacingRate = None
+		if kernelPacing:
+			self._pacingRate = min(
+				rate for rate in (clientRate, aggregateRate) if rate is not None
+			)
+
+		self._clientsLock = threading.Lock()
+		self._clients: Dict[str, _ClientBuckets] = {}
+		self._lastSweep = time.monotonic()
+
+		self.shapeCounters = ShapeCounters()
+
+	def _SweepLockHeld(self, now: float) -> None:
+		'''
+		Drop the buckets of clients without connections once they are
+		full again, so a client cannot reset its debt by reconnecting.
+		'''
+		self._lastSweep = now
+		idleIPs = [
+			ip for ip, buckets in self._clients.items()
+			if (
+				(buckets.numConnections == 0) and
+				buckets.toDown.IsFull(now) and
+				buckets.toUp.IsFull(now)
+			)
+		]
+		for ip in idleIPs:
+			del self._clients[ip]
+
+	def _AcquireClient(self, ip: str) -> _ClientBuckets:
+		now = time.monotonic()
+		with self._clientsLock:
+			if (now - self._lastSweep) >= _SWEEP_INTERVAL:
+				self._SweepLockHeld(now)
+			buckets = self._clients.get(ip)
+			if buckets is None:
+				buckets = _ClientBuckets(self._clientRate, self._clientBurst)
+				self._clients[ip] = buckets
+			buckets.numConnections += 1
+			return buckets
+
+	def _ReleaseClient(self, buckets: _ClientBuckets) -> None:
+		with self._clientsLock:
+			buckets.numConnections -= 1
+
+	def GetDownstreamHandler(self) -> HandlerBase:
+		return self._downstreamHandler
+
+	def GetNumClients(self) -> int:
+		with self._clientsLock:
+			return len(self._clients)
+
+	def HandleRequest(
+		self,
+		*,
+		pyHandler: PyHandlerBase,
+		handlerState : HandlerState,
+		reqState: dict,
+		terminateEvent: threading.Event,
+	) -> None:
+		toDown: List[TokenBucket] = []
+		toUp: List[TokenBucket] = []
+
+		clientBuckets = None
+		if self._clientRate is not None:
+			clientBuckets = self._AcquireClient(pyHandler.client_address[0])
+			toDown.append(clientBuckets.toDown)
+			toUp.append(clientBuckets.toUp)
+		if self._aggregate is not None:
+			toDown.append(self._aggregate[0])
+			toUp.append(self._aggregate[1])
+
+		reqState[RELAY_SHAPER_KEY] = RelayShaper(
+			toDown=toDown,
+			toUp=toUp,
+			pacingRate=self._pacingRate,
+			terminateEvent=terminateEvent,
+			counters=self.shapeCounters,
+		)
+		try:
+			self._downstreamHandler.HandleRequest(
+				pyHandler=pyHandler,
+				handlerState=handlerState,
+				reqState=reqState,
+				terminateEvent=terminateEvent,
+			)
+		finally:
+			if clientBuckets is not None:
+				self._ReleaseClient(clientBuckets)
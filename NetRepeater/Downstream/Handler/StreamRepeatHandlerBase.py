@@ -8,30 +8,132 @@
 ###
 
 
-import selectors
+import asyncio
+import logging
 import socket
+import ssl
 import threading
 
+from typing import Any, Callable, Tuple
+
 from PyNetworkLib.Server.TCP.DownstreamHandlerBase import DownstreamHandlerBase
 from PyNetworkLib.Server.TCP.PyHandlerBase import PyHandlerBase
 from PyNetworkLib.Server.Utils.HandlerState import HandlerState
 
+from ..Relay.Async import AsyncRelay
+from ..Relay.BufferPool import BufferPool
+from ..Relay.Coalesce import WriteCoalescer
+from ..Relay.Copy import CopyRelay
+from ..Relay.NonBlocking import NonBlockingRelay
+from ..Relay.ReadSizer import AdaptiveReadSizer
+from ..Relay.Shaper import RelayShaper
+from ..Relay.Splice import IsSpliceSupported, SpliceRelay
+from ...Utils.KTLS import IsKTLSSupported, KTLSCounters
+from ...Utils.TerminateWaker import TerminateWaker
+
+
+RELAY_MODES = ( 'copy', 'splice', 'nonblocking', )
+
+# the request state key under which wrapping handlers (e.g., `mirror`) put
+# a callable that is given the data sent by the upstream
+UPSTREAM_TAP_KEY = 'upstreamTap'
+# the request state key under which wrapping handlers (e.g., `shape_by_rate`)
+# put a `RelayShaper` that holds the relay to a rate
+RELAY_SHAPER_KEY = 'relayShaper'
+
 
 class StreamRepeatHandlerBase(DownstreamHandlerBase):
 	'''
 	A simple TCP handler that repeats data between the upstream and downstream
 	connections made by the handler connector.
+
+	The `relayMode` selects how the payload is moved:
+	- `copy`: read into userspace and write it back out (works for all sockets)
+	- `splice`: move data socket -> pipe -> socket with `splice(2)`, so the
+	  payload never enters userspace; connections involving a TLS socket
+	  fall back to `copy`, unless kTLS handles both of its directions
+	- `nonblocking`: like `copy`, but a slow peer never blocks the relay;
+	  each direction has a `relayBufferSize` buffer, and reading pauses
+	  while the peer has `highWatermark` bytes pending, until they drop to
+	  `lowWatermark`
+
+	With `adaptiveRead`, the `copy` relay sizes each read between
+	`readSize` and `maxReadSize` depending on how full the previous reads
+	were. `drainBudget` is the number of bytes the `copy` relay may forward
+	from one side per wakeup before it checks the other side again.
+
+	With `coalesce`, the `copy` relay writes the chunks read in one wakeup
+	together, and holds small writes back under `TCP_CORK` until
+	`coalesceSize` bytes are pending or `coalesceDelay` seconds have passed,
+	so chatty protocols are sent in fewer, fuller segments.
+
+	A wrapping handler may put a callable under `UPSTREAM_TAP_KEY` in the
+	request state; it is then given (and must copy) every chunk sent by
+	the upstream. `splice` falls back to `copy` for such connections, since
+	their payload has to pass through userspace.
+	Likewise, a `RelayShaper` may be put under `RELAY_SHAPER_KEY`; since
+	shaping may hold the relay back, `nonblocking` falls back to `copy` for
+	connections that have to keep to a token bucket.
 	'''
 
 	def __init__(
 		self,
 		pollInterval: float = 0.1,
 		readSize: int = 4096,
+		relayMode: str = 'copy',
+		adaptiveRead: bool = False,
+		maxReadSize: int = 262144,
+		drainBudget: int = 0,
+		relayBufferSize: int = 65536,
+		highWatermark: int | None = None,
+		lowWatermark: int | None = None,
+		coalesce: bool = False,
+		coalesceSize: int = 16384,
+		coalesceDelay: float = 0.005,
 	) -> None:
 		super().__init__()
 
+		if relayMode not in RELAY_MODES:
+			raise ValueError(f'Unsupported relay mode: {relayMode}')
+		if adaptiveRead and (maxReadSize < readSize):
+			raise ValueError(
+				f'maxReadSize ({maxReadSize}) is less than readSize ({readSize})'
+			)
+
+		if (
+			((highWatermark is not None) and (highWatermark > relayBufferSize)) or
+			((lowWatermark is not None) and (highWatermark is not None) and
+				(lowWatermark >= highWatermark))
+		):
+			raise ValueError(
+				f'Invalid watermarks: low={lowWatermark}, high={highWatermark}, '
+				f'relayBufferSize={relayBufferSize}'
+			)
+
 		self._pollInterval = pollInterval
 		self._readSize = readSize
+		self._relayMode = relayMode
+		self._adaptiveRead = adaptiveRead
+		self._maxReadSize = maxReadSize
+		self._drainBudget = drainBudget
+		self._relayBufferSize = relayBufferSize
+		self._highWatermark = highWatermark
+		self._lowWatermark = lowWatermark
+		self._coalesce = coalesce
+		self._coalesceSize = coalesceSize
+		self._coalesceDelay = coalesceDelay
+		self.ktlsCounters = KTLSCounters()
+		self._bufferPool = BufferPool(
+			self._maxReadSize if self._adaptiveRead else self._readSize
+		)
+
+		self._logger = logging.getLogger(f'{__name__}.{self.__class__.__name__}')
+
+		if (self._relayMode == 'splice') and (not IsSpliceSupported()):
+			self._logger.warning(
+				'splice(2) is not available on this platform; '
+				'falling back to the copy relay mode'
+			)
 
 	def _DownstreamConnect(self) -> socket.socket:
 		'''
@@ -40,6 +142,141 @@ class StreamRepeatHandlerBase(DownstreamHandlerBase):
 		'''
 		raise NotImplementedError('This method should be overridden by subclasses.')
 
+	def ConnectDownstream(self) -> socket.socket:
+		'''
+		Establish a connection to the downstream server, for servers that
+		relay the connection themselves rather than through `HandleRequest`.
+		The caller takes the ownership of the returned socket.
+		'''
+		return self._DownstreamConnect()
+
+	async def _DownstreamConnectAsync(
+		self,
+	) -> Tuple[asyncio.StreamReader, asyncio.StreamWriter]:
+		'''
+		This method should be overridden by subclasses to establish a connection
+		to the downstream server from within an asyncio event loop.
+		'''
+		raise NotImplementedError('This method should be overridden by subclasses.')
+
+	def _OnRelayDone(self, downstream: socket.socket) -> None:
+		'''
+		Called with the downstream socket once the relay of a connection has
+		ended, before the socket is closed.
+		'''
+		pass
+
+	def _ReportKTLS(
+		self,
+		logger: logging.Logger,
+		upstreamAddr: Any,
+		**socks: socket.socket,
+	) -> None:
+		'''
+		Record and log whether the kernel handles the TLS records of each
+		of the given TLS sockets.
+		'''
+		if not IsKTLSSupported():
+			return
+		for name, sock in socks.items():
+			if isinstance(sock, ssl.SSLSocket):
+				isTx, isRx = self.ktlsCounters.Record(sock)
+				logger.debug(
+					f'kTLS of {name} for {upstreamAddr}: TX={isTx}, RX={isRx}'
+				)
+
+	def _Relay(
+		self,
+		*,
+		upstream: socket.socket,
+		downstream: socket.socket,
+		terminateEvent: threading.Event,
+		logger: logging.Logger,
+		upstreamAddr: Any,
+		terminateWaker: TerminateWaker | None = None,
+		upstreamTap: Callable[[memoryview], None] | None = None,
+		shaper: RelayShaper | None = None,
+	) -> None:
+		'''
+		Relay data between the given pair of sockets, with the relay
+		implementation selected by the relay mode.
+		'''
+		self._ReportKTLS(
+			logger,
+			upstreamAddr,
+			upstream=upstream,
+			downstream=downstream,
+		)
+
+		throttles = None
+		if shaper is not None:
+			shaper.Pace(upstream, downstream)
+			throttles = shaper.GetThrottles()
+
+		if (
+			(self._relayMode == 'splice') and
+			(upstreamTap is None) and
+			IsSpliceSupported(upstream, downstream)
+		):
+			SpliceRelay(
+				upstream=upstream,
+				downstream=downstream,
+				terminateEvent=terminateEvent,
+				pollInterval=self._pollInterval,
+				readSize=self._readSize,
+				logger=logger,
+				upstreamAddr=upstreamAddr,
+				terminateWaker=terminateWaker,
+				throttles=throttles,
+			)
+		elif (self._relayMode == 'nonblocking') and (throttles is None):
+			NonBlockingRelay(
+				upstream=upstream,
+				downstream=downstream,
+				terminateEvent=terminateEvent,
+				pollInterval=self._pollInterval,
+				bufSize=self._relayBufferSize,
+				logger=logger,
+				upstreamAddr=upstreamAddr,
+				terminateWaker=terminateWaker,
+				highWatermark=self._highWatermark,
+				lowWatermark=self._lowWatermark,
+				upstreamTap=upstreamTap,
+			)
+		else:
+			readSizers = None
+			if self._adaptiveRead:
+				readSizers = (
+					AdaptiveReadSizer(self._readSize, self._maxReadSize),
+					AdaptiveReadSizer(self._readSize, self._maxReadSize),
+				)
+			coalescers = None
+			if self._coalesce:
+				coalescers = (
+					WriteCoalescer(
+						downstream, self._coalesceSize, self._coalesceDelay
+					),
+					WriteCoalescer(
+						upstream, self._coalesceSize, self._coalesceDelay
+					),
+				)
+			with self._bufferPool.Borrow() as buffer:
+				CopyRelay(
+					upstream=upstream,
+					downstream=downstream,
+					terminateEvent=terminateEvent,
+					pollInterval=self._pollInterval,
+					buffer=buffer,
+					logger=logger,
+					upstreamAddr=upstreamAddr,
+					terminateWaker=terminateWaker,
+					readSizers=readSizers,
+					drainBudget=self._drainBudget,
+					coalescers=coalescers,
+					upstreamTap=upstreamTap,
+					throttles=throttles,
+				)
+
 	def HandleRequest(
 		self,
 		*,
@@ -50,41 +287,45 @@ class StreamRepeatHandlerBase(DownstreamHandlerBase):
 	) -> None:
 		with self._DownstreamConnect() as downstreamHandler:
 			try:
-				with selectors.DefaultSelector() as selector:
-					selector.register(pyHandler.request, selectors.EVENT_READ)
-					selector.register(downstreamHandler, selectors.EVENT_READ)
-
-					while not terminateEvent.is_set():
-						for key, events in selector.select(self._pollInterval):
-							if key.fileobj == pyHandler.request:
-								# client sent some data
-								# --> forward to server
-								data = pyHandler.request.recv(self._readSize)
-								if not data:
-									# client closed the connection
-									pyHandler.server.handlerLogger.debug(
-										f'Upstream {pyHandler.client_address} closed the connection'
-									)
-									return
-								downstreamHandler.sendall(data)
-
-							elif key.fileobj == downstreamHandler:
-								# server sent some data
-								# --> forward to client
-								data = downstreamHandler.recv(self._readSize)
-								if not data:
-									# server closed the connection
-									pyHandler.server.handlerLogger.debug(
-										f'Downstream {downstreamHandler.getpeername()} closed the connection'
-									)
-									return
-								pyHandler.request.sendall(data)
-
-							else:
-								raise ValueError('Unknown file object')
+				self._Relay(
+					upstream=pyHandler.request,
+					downstream=downstreamHandler,
+					terminateEvent=terminateEvent,
+					logger=pyHandler.server.handlerLogger,
+					upstreamAddr=pyHandler.client_address,
+					# only available on the servers of this package
+					terminateWaker=getattr(pyHandler.server, 'terminateWaker', None),
+					upstreamTap=reqState.get(UPSTREAM_TAP_KEY),
+					shaper=reqState.get(RELAY_SHAPER_KEY),
+				)
 			except Exception as e:
-				self.server.handlerLogger.debug(
+				pyHandler.server.handlerLogger.debug(
 					f'Handler for {pyHandler.client_address} failed with error: {e}'
 				)
 				pass
+			finally:
+				self._OnRelayDone(downstreamHandler)
 
+	async def HandleRequestAsync(
+		self,
+		*,
+		reader: asyncio.StreamReader,
+		writer: asyncio.StreamWriter,
+		logger: logging.Logger,
+	) -> None:
+		'''
+		The coroutine variant of `HandleRequest`, used by the asyncio servers.
+		'''
+		downReader, downWriter = await self._DownstreamConnectAsync()
+		try:
+			await AsyncRelay(
+				upReader=reader,
+				upWriter=writer,
+				downReader=downReader,
+				downWriter=downWriter,
+				readSize=self._readSize,
+				logger=logger,
+				upstreamAddr=writer.get_extra_info('peername'),
+			)
+		finally:
+			downWriter.close()
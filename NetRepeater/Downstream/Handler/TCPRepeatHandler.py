@@ -8,9 +8,15 @@
 ###
 
 
+import asyncio
 import ipaddress
 import socket
 
+from typing import Tuple
+
+from ..Relay.WarmPool import WarmPool
+from ...Utils.FastOpen import EnableFastOpenConnect, FastOpenCounters
+from ...Utils.SocketOptions import SocketOptions
 from .HandlerDict import HandlerBase, HandlerDict
 from .StreamRepeatHandlerBase import StreamRepeatHandlerBase
 
@@ -19,6 +25,21 @@ class TCPRepeatHandler(StreamRepeatHandlerBase, HandlerBase):
 	'''
 	A TCP/IP connector class that provides a method to create a connected
 	downstream socket for TCP/IP connections.
+
+	With `fastOpen`, downstream connections use TCP Fast Open, so the first
+	data sent to the server rides on the SYN; this only suits protocols in
+	which the client speaks first. `fastOpenCounters` counts how many
+	downstream connections actually used it, and is logged on terminate;
+	the servers relaying the connections of `ConnectDownstream` themselves
+	report them with `RecordDownstream`.
+
+	`socketOptions` are applied to every downstream socket before it
+	connects.
+
+	With a `warmPool` section (the keyword arguments of `WarmPool`, e.g.,
+	`{"size": 4, "idleTimeout": 30.0}`), downstream connections are made
+	ahead of time in the background, and clients are handed one that is
+	already connected; Fast Open is not used for these connections.
 	'''
 
 	@classmethod
@@ -30,12 +51,38 @@ class TCPRepeatHandler(StreamRepeatHandlerBase, HandlerBase):
 		port: int,
 		pollInterval: float = 0.1,
 		readSize: int = 4096,
+		relayMode: str = 'copy',
+		adaptiveRead: bool = False,
+		maxReadSize: int = 262144,
+		drainBudget: int = 0,
+		relayBufferSize: int = 65536,
+		highWatermark: int | None = None,
+		lowWatermark: int | None = None,
+		coalesce: bool = False,
+		coalesceSize: int = 16384,
+		coalesceDelay: float = 0.005,
+		fastOpen: bool = False,
+		socketOptions: dict | None = None,
+		warmPool: dict | None = None,
 	) -> 'TCPRepeatHandler':
 		return cls(
 			ip=ip,
 			port=port,
 			pollInterval=pollInterval,
 			readSize=readSize,
+			relayMode=relayMode,
+			adaptiveRead=adaptiveRead,
+			maxReadSize=maxReadSize,
+			drainBudget=drainBudget,
+			relayBufferSize=relayBufferSize,
+			highWatermark=highWatermark,
+			lowWatermark=lowWatermark,
+			coalesce=coalesce,
+			coalesceSize=coalesceSize,
+			coalesceDelay=coalesceDelay,
+			fastOpen=fastOpen,
+			socketOptions=SocketOptions.FromConfig(socketOptions),
+			warmPool=warmPool,
 		)
 
 	def __init__(
@@ -44,9 +91,25 @@ class TCPRepeatHandler(StreamRepeatHandlerBase, HandlerBase):
 		port: int,
 		pollInterval: float = 0.1,
 		readSize: int = 4096,
+		relayMode: str = 'copy',
+		adaptiveRead: bool = False,
+		maxReadSize: int = 262144,
+		drainBudget: int = 0,
+		relayBufferSize: int = 65536,
+		highWatermark: int | None = None,
+		lowWatermark: int | None = None,
+		coalesce: bool = False,
+		coalesceSize: int = 16384,
+		coalesceDelay: float = 0.005,
+		fastOpen: bool = False,
+		socketOptions: SocketOptions | None = None,
+		warmPool: dict | None = None,
 	) -> None:
 		self._ip = ipaddress.ip_address(ip)
 		self._port = port
+		self._fastOpen = fastOpen
+		self.fastOpenCounters = FastOpenCounters()
+		self._socketOptions = socketOptions or SocketOptions()
 
 		if self._ip.version == 4:
 			self._family = socket.AF_INET
@@ -55,21 +118,106 @@ class TCPRepeatHandler(StreamRepeatHandlerBase, HandlerBase):
 		else:
 			raise ValueError(f'Unsupported IP version: {self._ip.version}')
 
-		super().__init__(pollInterval=pollInterval, readSize=readSize)
+		super().__init__(
+			pollInterval=pollInterval,
+			readSize=readSize,
+			relayMode=relayMode,
+			adaptiveRead=adaptiveRead,
+			maxReadSize=maxReadSize,
+			drainBudget=drainBudget,
+			relayBufferSize=relayBufferSize,
+			highWatermark=highWatermark,
+			lowWatermark=lowWatermark,
+			coalesce=coalesce,
+			coalesceSize=coalesceSize,
+			coalesceDelay=coalesceDelay,
+		)
+
+		self.warmPool = None
+		if warmPool is not None:
+			self.warmPool = WarmPool(
+				connect=lambda: self._Connect(fastOpen=False),
+				logger=self._logger,
+				**warmPool,
+			)
+
+	def _CreateSocket(self) -> socket.socket:
+		sock = socket.socket(self._family, socket.SOCK_STREAM)
+		try:
+			sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+			self._socketOptions.Apply(sock)
+			return sock
+		except Exception as e:
+			sock.close()
+			raise
+
+	def _Connect(self, fastOpen: bool) -> socket.socket:
+		'''
+		Make a new connection to the downstream server.
+		'''
+		sock = self._CreateSocket()
+		try:
+			if fastOpen:
+				EnableFastOpenConnect(sock)
+			sock.connect((str(self._ip), self._port))
+			return sock
+		except Exception as e:
+			sock.close()
+			raise
 
 	def _DownstreamConnect(self) -> socket.socket:
 		'''
-		Create a connected downstream socket for TCP/IP connections.
+		Create a connected downstream socket for TCP/IP connections, taken
+		from the warm pool if there is one.
 
 		:return: A connected socket instance.
 		:rtype: socket.socket
 		'''
-		sock = socket.socket(self._family, socket.SOCK_STREAM)
+		if self.warmPool is not None:
+			sock = self.warmPool.Acquire()
+			if sock is not None:
+				return sock
+		return self._Connect(fastOpen=self._fastOpen)
+
+	def RecordDownstream(self, downstream: socket.socket) -> None:
+		'''
+		Record what is only known of a downstream connection once data has
+		been written to it (i.e., whether Fast Open was used); called once
+		per connection, before it is closed.
+		'''
+		if self._fastOpen:
+			self.fastOpenCounters.Record(downstream)
+
+	def _OnRelayDone(self, downstream: socket.socket) -> None:
+		self.RecordDownstream(downstream)
+
+	def Terminate(self) -> None:
+		super().Terminate()
+		if self.warmPool is not None:
+			self.warmPool.close()
+			self._logger.info(f'Warm pool: {self.warmPool.GetStats()}')
+		if self._fastOpen:
+			self._logger.info(f'TCP Fast Open: {self.fastOpenCounters.GetStats()}')
+
+	async def _ConnectSocketAsync(self) -> socket.socket:
+		sock = self._CreateSocket()
 		try:
-			sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
-			sock.connect((str(self._ip), self._port))
+			sock.setblocking(False)
+			await asyncio.get_running_loop().sock_connect(
+				sock,
+				(str(self._ip), self._port),
+			)
 			return sock
-		except Exception as e:
+		except BaseException:
 			sock.close()
 			raise
 
+	async def _DownstreamConnectAsync(
+		self,
+	) -> Tuple[asyncio.StreamReader, asyncio.StreamWriter]:
+		'''
+		Create a connected downstream stream pair for TCP/IP connections.
+		'''
+		return await asyncio.open_connection(
+			sock=await self._ConnectSocketAsync(),
+		)
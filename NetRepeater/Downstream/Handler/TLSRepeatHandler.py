@@ -8,16 +8,40 @@
 ###
 
 
+import asyncio
 import os
 import socket
 
+from typing import Tuple
+
 from PyNetworkLib.TLS.SSLContext import SSLContext
 
 from .HandlerDict import HandlerDict
 from .TCPRepeatHandler import TCPRepeatHandler
+from ...Utils.KTLS import EnableKTLS
+from ...Utils.PySSLContext import CreateClientPySSLContext, GetPySSLContext
+from ...Utils.SocketOptions import SocketOptions
+from ...Utils.TLSSessionCache import TLSSessionCache
 
 
 class TLSRepeatHandler(TCPRepeatHandler):
+	'''
+	With `ktls`, OpenSSL hands the record encryption of the downstream
+	connections over to the kernel when the negotiated cipher allows it;
+	connections where the kernel handles both directions can then be
+	relayed with `splice`.
+
+	Connections in the `warmPool` have completed their TLS handshake.
+
+	With a `sessionCacheSize` (e.g., 64 servers), the TLS sessions of the
+	downstream server are kept in `sessionCache` for up to
+	`sessionLifetime` seconds, so new connections resume them instead of
+	doing a full handshake; its hit rate is logged on termination.
+	Since sessions can only be resumed through the standard library, the
+	client context is then made by `CreateClientPySSLContext`, which always
+	verifies the server against `caPEM` (or the default CAs); without the
+	cache, PyNetworkLib's default client context is used, as before.
+	'''
 
 	@classmethod
 	def FromConfig(
@@ -29,9 +53,25 @@ class TLSRepeatHandler(TCPRepeatHandler):
 		serverHostName: str,
 		pollInterval: float = 0.1,
 		readSize: int = 4096,
+		relayMode: str = 'copy',
+		adaptiveRead: bool = False,
+		maxReadSize: int = 262144,
+		drainBudget: int = 0,
+		relayBufferSize: int = 65536,
+		highWatermark: int | None = None,
+		lowWatermark: int | None = None,
+		coalesce: bool = False,
+		coalesceSize: int = 16384,
+		coalesceDelay: float = 0.005,
+		fastOpen: bool = False,
+		socketOptions: dict | None = None,
+		ktls: bool = False,
 		caPEM: str | None = None,
 		privKeyPath: os.PathLike | None = None,
 		certPath: os.PathLike | None = None,
+		warmPool: dict | None = None,
+		sessionCacheSize: int = 0,
+		sessionLifetime: float = 3600.0,
 	) -> 'TLSRepeatHandler':
 		return cls(
 			ip=ip,
@@ -39,9 +79,25 @@ class TLSRepeatHandler(TCPRepeatHandler):
 			serverHostName=serverHostName,
 			pollInterval=pollInterval,
 			readSize=readSize,
+			relayMode=relayMode,
+			adaptiveRead=adaptiveRead,
+			maxReadSize=maxReadSize,
+			drainBudget=drainBudget,
+			relayBufferSize=relayBufferSize,
+			highWatermark=highWatermark,
+			lowWatermark=lowWatermark,
+			coalesce=coalesce,
+			coalesceSize=coalesceSize,
+			coalesceDelay=coalesceDelay,
+			fastOpen=fastOpen,
+			socketOptions=SocketOptions.FromConfig(socketOptions),
+			ktls=ktls,
 			caPEMorDER=caPEM,
 			privKeyPath=privKeyPath,
 			certPath=certPath,
+			warmPool=warmPool,
+			sessionCacheSize=sessionCacheSize,
+			sessionLifetime=sessionLifetime,
 		)
 
 	def __init__(
@@ -51,45 +107,126 @@ class TLSRepeatHandler(TCPRepeatHandler):
 		serverHostName: str,
 		pollInterval: float = 0.1,
 		readSize: int = 4096,
+		relayMode: str = 'copy',
+		adaptiveRead: bool = False,
+		maxReadSize: int = 262144,
+		drainBudget: int = 0,
+		relayBufferSize: int = 65536,
+		highWatermark: int | None = None,
+		lowWatermark: int | None = None,
+		coalesce: bool = False,
+		coalesceSize: int = 16384,
+		coalesceDelay: float = 0.005,
+		fastOpen: bool = False,
+		socketOptions: SocketOptions | None = None,
+		ktls: bool = False,
 		caPEMorDER: str | bytes | None = None,
 		privKeyPath: os.PathLike | None = None,
 		certPath: os.PathLike | None = None,
+		warmPool: dict | None = None,
+		sessionCacheSize: int = 0,
+		sessionLifetime: float = 3600.0,
 	) -> None:
+		# the warm pool starts connecting from within the base constructor
+		self._serverHostName = serverHostName
+		self._sessionKey = (ip, port, serverHostName)
+		self.sessionCache = None
+		if sessionCacheSize > 0:
+			self.sessionCache = TLSSessionCache(
+				maxSize=sessionCacheSize,
+				lifetime=sessionLifetime,
+			)
+
+		if self.sessionCache is not None:
+			self._sslContext = CreateClientPySSLContext(
+				caPEMorDER=caPEMorDER,
+				privKeyPath=privKeyPath,
+				certPath=certPath,
+			)
+		else:
+			if privKeyPath is None or certPath is None:
+				self._cltVerify = False
+			else:
+				self._cltVerify = True
+
+			self._sslContext = SSLContext.CreateDefaultContext(
+				isServerSide=False,
+				caPEMorDER=caPEMorDER,
+				isVerifyRequired=self._cltVerify,
+			)
+
+			if self._cltVerify:
+				self._sslContext.LoadCertChainFiles(
+					privKeyPath=privKeyPath,
+					certChainPath=certPath,
+				)
+
+		isKTLSEnabled = (not ktls) or EnableKTLS(GetPySSLContext(self._sslContext))
+
 		super().__init__(
 			ip=ip,
 			port=port,
 			pollInterval=pollInterval,
 			readSize=readSize,
+			relayMode=relayMode,
+			adaptiveRead=adaptiveRead,
+			maxReadSize=maxReadSize,
+			drainBudget=drainBudget,
+			relayBufferSize=relayBufferSize,
+			highWatermark=highWatermark,
+			lowWatermark=lowWatermark,
+			coalesce=coalesce,
+			coalesceSize=coalesceSize,
+			coalesceDelay=coalesceDelay,
+			fastOpen=fastOpen,
+			socketOptions=socketOptions,
+			warmPool=warmPool,
 		)
 
-		self._serverHostName = serverHostName
-
-		if privKeyPath is None or certPath is None:
-			self._cltVerify = False
-		else:
-			self._cltVerify = True
-
-		self._sslContext = SSLContext.CreateDefaultContext(
-			isServerSide=False,
-			caPEMorDER=caPEMorDER,
-			isVerifyRequired=self._cltVerify,
-		)
-
-		if self._cltVerify:
-			self._sslContext.LoadCertChainFiles(
-				privKeyPath=privKeyPath,
-				certChainPath=certPath,
-			)
+		if not isKTLSEnabled:
+			self._logger.warning('kTLS is not available on this platform')
 
-	def _DownstreamConnect(self) -> socket.socket:
-		tcpSocket = super()._DownstreamConnect()
+	def _Connect(self, fastOpen: bool) -> socket.socket:
+		tcpSocket = super()._Connect(fastOpen)
 		try:
-			return self._sslContext.WrapSocket(
+			if self.sessionCache is None:
+				return self._sslContext.WrapSocket(
+					tcpSocket,
+					server_side=False,
+					server_hostname=self._serverHostName,
+				)
+
+			session = self.sessionCache.Get(self._sessionKey)
+			sslSocket = self._sslContext.wrap_socket(
 				tcpSocket,
 				server_side=False,
 				server_hostname=self._serverHostName,
+				session=session,
 			)
 		except Exception as e:
 			tcpSocket.close()
 			raise e
 
+		if not self.sessionCache.RecordHandshake(sslSocket, session is not None):
+			# a TLS 1.3 ticket usually comes later; see `_OnRelayDone`
+			self.sessionCache.Put(self._sessionKey, sslSocket)
+		return sslSocket
+
+	def _OnRelayDone(self, downstream: socket.socket) -> None:
+		super()._OnRelayDone(downstream)
+		if self.sessionCache is not None:
+			self.sessionCache.Put(self._sessionKey, downstream)
+
+	def Terminate(self) -> None:
+		super().Terminate()
+		if self.sessionCache is not None:
+			self._logger.info(f'TLS session cache: {self.sessionCache.GetStats()}')
+
+	async def _DownstreamConnectAsync(
+		self,
+	) -> Tuple[asyncio.StreamReader, asyncio.StreamWriter]:
+		return await asyncio.open_connection(
+			sock=await self._ConnectSocketAsync(),
+			ssl=GetPySSLContext(self._sslContext),
+			server_hostname=self._serverHostName,
+		)
@@ -0,0 +1,188 @@
+#!/usr/bin/env python3
+# -*- coding:utf-8 -*-
+###
+# Copyright (c) 2025 Haofan Zheng
+# Use of this source code is governed by an MIT-style
+# license that can be found in the LICENSE file or at
+# https://opensource.org/licenses/MIT.
+###
+
+
+import logging
+import threading
+
+from typing import List
+
+from PyNetworkLib.Server.TCP.PyHandlerBase import PyHandlerBase
+from PyNetworkLib.Server.Utils.HandlerState import HandlerState
+
+from ..Tunnel.Session import TunnelSession
+from .HandlerDict import HandlerBase, HandlerDict
+
+
+class TunnelClientHandler(HandlerBase):
+	'''
+	Relay connections to a `Tunnel` server as streams multiplexed over up
+	to `numConnections` long-lived connections (carriers), so a new
+	connection costs one frame instead of new TCP and TLS handshakes.
+
+	Carriers are made by `connector` (normally a `tls_repeat` handler
+	pointing to the `Tunnel` server), when first needed and again after
+	they are lost; new streams go to the carrier with the fewest streams.
+	'''
+
+	@classmethod
+	def FromConfig(
+		cls,
+		handlersDict: HandlerDict,
+		*,
+		connector: str,
+		numConnections: int = 2,
+		windowSize: int = 262144,
+		frameSize: int = 16384,
+		readSize: int = 65536,
+		pollInterval: float = 0.1,
+	) -> 'TunnelClientHandler':
+		return cls(
+			connector=handlersDict.GetHandler(connector),
+			numConnections=numConnections,
+			windowSize=windowSize,
+			frameSize=frameSize,
+			readSize=readSize,
+			pollInterval=pollInterval,
+		)
+
+	def __init__(
+		self,
+		connector: HandlerBase,
+		numConnections: int = 2,
+		windowSize: int = 262144,
+		frameSize: int = 16384,
+		readSize: int = 65536,
+		pollInterval: float = 0.1,
+	) -> None:
+		super(TunnelClientHandler, self).__init__()
+
+		if not hasattr(connector, 'ConnectDownstream'):
+			raise TypeError(
+				f'{type(connector).__name__} cannot be used as a tunnel connector'
+			)
+		if numConnections < 1:
+			raise ValueError('numConnections must be at least 1')
+
+		self._connector = connector
+		self._numConnections = numConnections
+		self._windowSize = windowSize
+		self._frameSize = frameSize
+		self._readSize = readSize
+		self._pollInterval = pollInterval
+
+		self._logger = logging.getLogger(f'{__name__}.{self.__class__.__name__}')
+
+		self._sessionsCond = threading.Condition()
+		self._sessions: List[TunnelSession] = []
+		# carriers being connected, outside of the lock
+		self._numConnecting = 0
+		self._terminateEvent = threading.Event()
+
+	def _NewSession(self) -> TunnelSession:
+		session = TunnelSession(
+			self._connector.ConnectDownstream(),
+			logger=self._logger,
+			windowSize=self._windowSize,
+			frameSize=self._frameSize,
+		)
+		threading.Thread(
+			target=session.Run,
+			kwargs={
+				'terminateEvent': self._terminateEvent,
+				'pollInterval': self._pollInterval,
+			},
+			name='TunnelClientSession',
+			daemon=True,
+		).start()
+		return session
+
+	def _ReserveLockHeld(self) -> TunnelSession | None:
+		'''
+		:return: The session with the fewest streams, or None if a slot was
+			reserved for a new one.
+		'''
+		while True:
+			if self._terminateEvent.is_set():
+				raise ConnectionError('The tunnel client is terminated')
+
+			self._sessions = [s for s in self._sessions if not s.IsClosed()]
+			numSlots = len(self._sessions) + self._numConnecting
+			if numSlots < self._numConnections:
+				self._numConnecting += 1
+				return None
+			if self._sessions:
+				return min(self._sessions, key=lambda s: s.GetNumStreams())
+			# every carrier is being connected
+			self._sessionsCond.wait()
+
+	def GetSession(self) -> TunnelSession:
+		with self._sessionsCond:
+			session = self._ReserveLockHeld()
+		if session is not None:
+			return session
+
+		# connect without holding up the streams of the other carriers
+		try:
+			session = self._NewSession()
+		except BaseException:
+			with self._sessionsCond:
+				self._numConnecting -= 1
+				self._sessionsCond.notify_all()
+			raise
+
+		with self._sessionsCond:
+			self._numConnecting -= 1
+			self._sessionsCond.notify_all()
+			isTerminated = self._terminateEvent.is_set()
+			if not isTerminated:
+				self._sessions.append(session)
+		if isTerminated:
+			session.close()
+			raise ConnectionError('The tunnel client is terminated')
+		return session
+
+	def close(self) -> None:
+		with self._sessionsCond:
+			self._terminateEvent.set()
+			sessions = self._sessions
+			self._sessions = []
+			self._sessionsCond.notify_all()
+		for session in sessions:
+			session.close()
+
+	def Terminate(self) -> None:
+		self.close()
+
+	def HandleRequest(
+		self,
+		*,
+		pyHandler: PyHandlerBase,
+		handlerState : HandlerState,
+		reqState: dict,
+		terminateEvent: threading.Event,
+	) -> None:
+		logger = pyHandler.server.handlerLogger
+		cltAddr = pyHandler.client_address
+
+		try:
+			stream = self.GetSession().OpenStream(str(cltAddr))
+		except Exception as e:
+			logger.error(f'Failed to open a tunnel stream for {cltAddr}: {e}')
+			return
+
+		stream.Pump(
+			local=pyHandler.request,
+			terminateEvent=terminateEvent,
+			pollInterval=self._pollInterval,
+			logger=logger,
+			readSize=self._readSize,
+			# only available on the servers of this package
+			terminateWaker=getattr(pyHandler.server, 'terminateWaker', None),
+		)
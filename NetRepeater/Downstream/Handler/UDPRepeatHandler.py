@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+# -*- coding:utf-8 -*-
+###
+# Copyright (c) 2025 Haofan Zheng
+# Use of this source code is governed by an MIT-style
+# license that can be found in the LICENSE file or at
+# https://opensource.org/licenses/MIT.
+###
+
+
+import ipaddress
+import socket
+import threading
+
+from PyNetworkLib.Server.TCP.PyHandlerBase import PyHandlerBase
+from PyNetworkLib.Server.Utils.HandlerState import HandlerState
+
+from ...Utils.SocketOptions import SocketOptions
+from .HandlerDict import HandlerBase, HandlerDict
+
+
+class UDPRepeatHandler(HandlerBase):
+	'''
+	A UDP/IP connector that creates one downstream socket per client
+	session, for the UDP inbound server.
+
+	Each session socket is connected to the downstream server, so the
+	kernel only delivers datagrams coming from that server to it.
+	'''
+
+	@classmethod
+	def FromConfig(
+		cls,
+		handlersDict: HandlerDict,
+		*,
+		ip: str,
+		port: int,
+		socketOptions: dict | None = None,
+	) -> 'UDPRepeatHandler':
+		return cls(
+			ip=ip,
+			port=port,
+			socketOptions=SocketOptions.FromConfig(socketOptions),
+		)
+
+	def __init__(
+		self,
+		ip: str,
+		port: int,
+		socketOptions: SocketOptions | None = None,
+	) -> None:
+		super(UDPRepeatHandler, self).__init__()
+
+		self._ip = ipaddress.ip_address(ip)
+		self._port = port
+		self._socketOptions = socketOptions or SocketOptions()
+
+		if self._ip.version == 4:
+			self._family = socket.AF_INET
+		elif self._ip.version == 6:
+			self._family = socket.AF_INET6
+		else:
+			raise ValueError(f'Unsupported IP version: {self._ip.version}')
+
+	def CreateSession(self) -> socket.socket:
+		'''
+		Create a non-blocking UDP socket connected to the downstream server.
+		The caller takes the ownership of the returned socket.
+		'''
+		sock = socket.socket(self._family, socket.SOCK_DGRAM)
+		try:
+			self._socketOptions.Apply(sock)
+			sock.connect((str(self._ip), self._port))
+			sock.setblocking(False)
+			return sock
+		except Exception:
+			sock.close()
+			raise
+
+	def HandleRequest(
+		self,
+		*,
+		pyHandler: PyHandlerBase,
+		handlerState : HandlerState,
+		reqState: dict,
+		terminateEvent: threading.Event,
+	) -> None:
+		raise TypeError(f'{self.__class__.__name__} only works with UDP servers')
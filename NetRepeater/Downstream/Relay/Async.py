@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+# -*- coding:utf-8 -*-
+###
+# Copyright (c) 2025 Haofan Zheng
+# Use of this source code is governed by an MIT-style
+# license that can be found in the LICENSE file or at
+# https://opensource.org/licenses/MIT.
+###
+
+
+import asyncio
+import logging
+
+from typing import Any
+
+
+async def _Pump(
+	reader: asyncio.StreamReader,
+	writer: asyncio.StreamWriter,
+	readSize: int,
+) -> None:
+	while True:
+		data = await reader.read(readSize)
+		if not data:
+			return
+		writer.write(data)
+		# wait here if the peer is not keeping up with us
+		await writer.drain()
+
+
+async def AsyncRelay(
+	*,
+	upReader: asyncio.StreamReader,
+	upWriter: asyncio.StreamWriter,
+	downReader: asyncio.StreamReader,
+	downWriter: asyncio.StreamWriter,
+	readSize: int,
+	logger: logging.Logger,
+	upstreamAddr: Any,
+) -> None:
+	'''
+	The coroutine counterpart of `CopyRelay`; repeat data between the
+	upstream and downstream streams until one of them is closed.
+	'''
+	upTask = asyncio.create_task(_Pump(upReader, downWriter, readSize))
+	downTask = asyncio.create_task(_Pump(downReader, upWriter, readSize))
+
+	try:
+		done, pending = await asyncio.wait(
+			[ upTask, downTask ],
+			return_when=asyncio.FIRST_COMPLETED,
+		)
+	finally:
+		for task in (upTask, downTask):
+			task.cancel()
+		await asyncio.gather(upTask, downTask, return_exceptions=True)
+
+	if upTask in done:
+		logger.debug(f'Upstream {upstreamAddr} closed the connection')
+	else:
+		logger.debug(
+			f'Downstream {downWriter.get_extra_info("peername")} closed the connection'
+		)
+
+	for task in done:
+		if (not task.cancelled()) and (task.exception() is not None):
+			raise task.exception()
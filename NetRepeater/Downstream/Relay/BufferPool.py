@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+# -*- coding:utf-8 -*-
+###
+# Copyright (c) 2025 Haofan Zheng
+# Use of this source code is governed by an MIT-style
+# license that can be found in the LICENSE file or at
+# https://opensource.org/licenses/MIT.
+###
+
+
+import contextlib
+import threading
+
+from typing import Iterator, List
+
+
+class BufferPool(object):
+	'''
+	A pool of fixed-size, reusable buffers, so relaying data does not need
+	to allocate a new object for every chunk read from a socket.
+	'''
+
+	def __init__(
+		self,
+		bufSize: int,
+		maxFree: int = 1024,
+	) -> None:
+		super(BufferPool, self).__init__()
+
+		self._bufSize = bufSize
+		self._maxFree = maxFree
+
+		self._free: List[memoryview] = []
+		self._freeLock = threading.Lock()
+
+	def GetBufSize(self) -> int:
+		return self._bufSize
+
+	def Acquire(self) -> memoryview:
+		with self._freeLock:
+			if self._free:
+				return self._free.pop()
+		return memoryview(bytearray(self._bufSize))
+
+	def Release(self, buf: memoryview) -> None:
+		with self._freeLock:
+			if len(self._free) < self._maxFree:
+				self._free.append(buf)
+
+	@contextlib.contextmanager
+	def Borrow(self) -> Iterator[memoryview]:
+		buf = self.Acquire()
+		try:
+			yield buf
+		finally:
+			self.Release(buf)
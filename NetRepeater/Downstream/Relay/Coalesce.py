@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+# -*- coding:utf-8 -*-
+###
+# Copyright (c) 2025 Haofan Zheng
+# Use of this source code is governed by an MIT-style
+# license that can be found in the LICENSE file or at
+# https://opensource.org/licenses/MIT.
+###
+
+
+import socket
+import time
+
+
+class WriteCoalescer(object):
+	'''
+	Hold back the writes to `dst` with `TCP_CORK`, so that small chunks go
+	out in full-sized segments rather than one tiny segment each.
+	The held data is flushed once `flushSize` bytes have been written, or
+	`flushDelay` seconds after the first of them, whichever comes first.
+
+	Sockets that do not support `TCP_CORK` are written to directly.
+	'''
+
+	__slots__ = (
+		'_dst',
+		'_flushSize',
+		'_flushDelay',
+		'_isCorkSupported',
+		'_numHeld',
+		'_deadline',
+	)
+
+	def __init__(
+		self,
+		dst: socket.socket,
+		flushSize: int,
+		flushDelay: float,
+	) -> None:
+		super(WriteCoalescer, self).__init__()
+
+		self._dst = dst
+		self._flushSize = flushSize
+		self._flushDelay = flushDelay
+
+		self._isCorkSupported = hasattr(socket, 'TCP_CORK')
+		self._numHeld = 0
+		self._deadline: float | None = None
+
+	def _SetCork(self, isCorked: bool) -> None:
+		try:
+			self._dst.setsockopt(
+				socket.IPPROTO_TCP,
+				socket.TCP_CORK,
+				1 if isCorked else 0,
+			)
+		except OSError:
+			# not a TCP socket
+			self._isCorkSupported = False
+
+	def Send(self, data: memoryview) -> None:
+		if self._isCorkSupported and (self._deadline is None):
+			self._SetCork(True)
+			self._deadline = time.monotonic() + self._flushDelay
+
+		self._dst.sendall(data)
+		self._numHeld += len(data)
+
+		if self._numHeld >= self._flushSize:
+			self.Flush()
+
+	def Flush(self) -> None:
+		if self._deadline is not None:
+			# uncorking pushes out whatever the kernel is holding
+			self._SetCork(False)
+		self._deadline = None
+		self._numHeld = 0
+
+	def GetTimeout(self, now: float) -> float | None:
+		'''Seconds until the held data is due, or None if nothing is held.'''
+		if self._deadline is None:
+			return None
+		return max(0.0, self._deadline - now)
+
+	def FlushIfDue(self, now: float) -> None:
+		if (self._deadline is not None) and (now >= self._deadline):
+			self.Flush()
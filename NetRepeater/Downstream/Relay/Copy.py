@@ -0,0 +1,238 @@
+#!/usr/bin/env python3
+# -*- coding:utf-8 -*-
+###
+# Copyright (c) 2025 Haofan Zheng
+# Use of this source code is governed by an MIT-style
+# license that can be found in the LICENSE file or at
+# https://opensource.org/licenses/MIT.
+###
+
+
+import logging
+import selectors
+import socket
+import ssl
+import threading
+import time
+
+from typing import Any, Callable, Tuple
+
+from ...Utils.Selector import ConnectionSelector
+from ...Utils.TerminateWaker import TerminateWaker
+from .Coalesce import WriteCoalescer
+from .ReadSizer import AdaptiveReadSizer
+
+
+def _RecvNoWait(
+	sock: socket.socket,
+	buffer: memoryview,
+	size: int,
+) -> int | None:
+	'''
+	Read from the socket without blocking.
+
+	:return: The number of bytes read, or None if no data is ready.
+	'''
+	if isinstance(sock, ssl.SSLSocket):
+		# only data already decrypted by OpenSSL is known to be ready
+		if sock.pending() <= 0:
+			return None
+		return sock.recv_into(buffer, size)
+
+	try:
+		return sock.recv_into(buffer, size, socket.MSG_DONTWAIT)
+	except BlockingIOError:
+		return None
+
+
+def _Forward(
+	src: socket.socket,
+	dst: socket.socket,
+	buffer: memoryview,
+	readSizer: AdaptiveReadSizer | None,
+	drainBudget: int,
+	coalescer: WriteCoalescer | None,
+	tap: Callable[[memoryview], None] | None = None,
+	throttle: Callable[[int], None] | None = None,
+) -> bool:
+	'''
+	Forward the data ready on `src` to `dst`; keep reading while more data
+	is ready, until `drainBudget` bytes have been forwarded.
+	With a `coalescer`, the chunks are read back to back into `buffer` and
+	written out together, through the coalescer.
+	A `tap` is given every chunk before it is sent, and must not keep a
+	reference to it. A `throttle` is given the number of bytes forwarded,
+	and may hold the relay back for a while.
+
+	:return: False if `src` has been closed.
+	'''
+	send = dst.sendall if coalescer is None else coalescer.Send
+	readSize = readSizer.GetSize() if readSizer else len(buffer)
+
+	forwarded = 0
+	# bytes at the front of `buffer` that have not been sent yet
+	numHeld = 0
+	isOpen = True
+
+	n = src.recv_into(buffer, readSize)
+	while True:
+		if n == 0:
+			isOpen = False
+			break
+
+		numHeld += n
+		forwarded += n
+		if readSizer is not None:
+			readSizer.Update(n)
+			readSize = readSizer.GetSize()
+
+		if (coalescer is None) or (numHeld == len(buffer)):
+			if tap is not None:
+				tap(buffer[:numHeld])
+			send(buffer[:numHeld])
+			numHeld = 0
+
+		if forwarded >= drainBudget:
+			break
+
+		n = _RecvNoWait(
+			src,
+			buffer[numHeld:],
+			min(readSize, len(buffer) - numHeld),
+		)
+		if n is None:
+			break
+
+	if numHeld > 0:
+		if tap is not None:
+			tap(buffer[:numHeld])
+		send(buffer[:numHeld])
+	if (throttle is not None) and (forwarded > 0):
+		throttle(forwarded)
+	return isOpen
+
+
+def _GetTimeout(
+	timeout: float | None,
+	*coalescers: WriteCoalescer | None,
+) -> float | None:
+	'''Shorten the poll timeout to the earliest coalescer flush deadline.'''
+	now = time.monotonic()
+	for coalescer in coalescers:
+		if coalescer is None:
+			continue
+		due = coalescer.GetTimeout(now)
+		if (due is not None) and ((timeout is None) or (due < timeout)):
+			timeout = due
+	return timeout
+
+
+def CopyRelay(
+	*,
+	upstream: socket.socket,
+	downstream: socket.socket,
+	terminateEvent: threading.Event,
+	pollInterval: float,
+	buffer: memoryview,
+	logger: logging.Logger,
+	upstreamAddr: Any,
+	terminateWaker: TerminateWaker | None = None,
+	readSizers: Tuple[AdaptiveReadSizer, AdaptiveReadSizer] | None = None,
+	drainBudget: int = 0,
+	coalescers: Tuple[WriteCoalescer, WriteCoalescer] | None = None,
+	upstreamTap: Callable[[memoryview], None] | None = None,
+	throttles: Tuple[Callable[[int], None], Callable[[int], None]] | None = None,
+) -> None:
+	'''
+	Repeat data between the upstream and downstream sockets by reading it
+	into userspace and writing it back out.
+	This works for any kind of stream socket, including TLS sockets.
+
+	Data is read into the given `buffer` and sent from slices of it,
+	so the loop does not allocate a new object for every chunk.
+
+	If a `terminateWaker` is given, the loop sleeps until there is data or
+	the waker is set, instead of waking up every `pollInterval`.
+
+	If `readSizers` (one for each direction) are given, the size of each
+	read adapts to the traffic, up to the size of `buffer`; otherwise
+	every read is the size of `buffer`.
+	Each wakeup keeps reading while data is ready, until `drainBudget`
+	bytes have been forwarded; 0 means one read per wakeup.
+
+	If `coalescers` (for writes to the downstream and the upstream,
+	respectively) are given, the data read in one wakeup is written out in
+	one go, and small writes are held back by the coalescers for a while.
+
+	If an `upstreamTap` is given, it sees all the data sent by the upstream,
+	just before it is written to the downstream.
+
+	If `throttles` (for the data sent by the upstream and the downstream,
+	respectively) are given, they are told how much was forwarded after
+	every wakeup, and may block the relay to keep it to a rate.
+	'''
+	upSizer, downSizer = readSizers if readSizers else (None, None)
+	toDown, toUp = coalescers if coalescers else (None, None)
+	throttleToDown, throttleToUp = throttles if throttles else (None, None)
+
+	with ConnectionSelector() as selector:
+		selector.register(upstream, selectors.EVENT_READ)
+		selector.register(downstream, selectors.EVENT_READ)
+
+		timeout = pollInterval
+		if terminateWaker is not None:
+			selector.register(terminateWaker, selectors.EVENT_READ)
+			timeout = None
+
+		while not terminateEvent.is_set():
+			for key, events in selector.select(
+				_GetTimeout(timeout, toDown, toUp)
+			):
+				if key.fileobj == upstream:
+					# client sent some data
+					# --> forward to server
+					if not _Forward(
+						upstream,
+						downstream,
+						buffer,
+						upSizer,
+						drainBudget,
+						toDown,
+						upstreamTap,
+						throttleToDown,
+					):
+						# client closed the connection
+						logger.debug(
+							f'Upstream {upstreamAddr} closed the connection'
+						)
+						return
+
+				elif key.fileobj == downstream:
+					# server sent some data
+					# --> forward to client
+					if not _Forward(
+						downstream,
+						upstream,
+						buffer,
+						downSizer,
+						drainBudget,
+						toUp,
+						throttle=throttleToUp,
+					):
+						# server closed the connection
+						logger.debug(
+							f'Downstream {downstream.getpeername()} closed the connection'
+						)
+						return
+
+				elif key.fileobj == terminateWaker:
+					# the server is terminating
+					return
+
+				else:
+					raise ValueError('Unknown file object')
+
+			now = time.monotonic()
+			for coalescer in (toDown, toUp):
+				if coalescer is not None:
+					coalescer.FlushIfDue(now)
@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+# -*- coding:utf-8 -*-
+###
+# Copyright (c) 2025 Haofan Zheng
+# Use of this source code is governed by an MIT-style
+# license that can be found in the LICENSE file or at
+# https://opensource.org/licenses/MIT.
+###
+
+
+import socket
+import struct
+import sys
+
+from typing import Any
+
+
+# from linux/udp.h; not exported by the socket module
+SOL_UDP = getattr(socket, 'SOL_UDP', 17)
+UDP_SEGMENT = getattr(socket, 'UDP_SEGMENT', 103)
+
+# limits of the kernel on a single GSO send
+_MAX_GSO_SEGMENTS = 64
+_MAX_GSO_BYTES = 65000
+
+
+def IsUDPGSOSupported() -> bool:
+	return sys.platform.startswith('linux')
+
+
+class GSOBatcher(object):
+	'''
+	Collect consecutive datagrams to the same destination and send them
+	with a single UDP GSO (`UDP_SEGMENT`) `sendmsg`; the kernel (or the
+	NIC) splits them back into datagrams.
+	GSO needs all segments but the last one to have the same size, so a
+	batch is flushed whenever that no longer holds.
+
+	If the kernel rejects GSO, the batcher falls back to one `sendto` per
+	datagram.
+	Datagrams that cannot be sent right away are dropped, as UDP allows.
+	'''
+
+	def __init__(self, sock: socket.socket) -> None:
+		super(GSOBatcher, self).__init__()
+
+		self._sock = sock
+		self._buf = bytearray(_MAX_GSO_BYTES)
+		self._view = memoryview(self._buf)
+
+		self._dst: Any = None
+		self._end = 0
+		self._segSize = 0
+		self._numSegs = 0
+
+		self.isGSOEnabled = IsUDPGSOSupported()
+
+	def Add(self, dst: Any, data: memoryview) -> None:
+		n = len(data)
+		if n == 0:
+			# an empty segment can not be batched; keep the order
+			self.Flush()
+			self._SendTo(data, dst)
+			return
+
+		if (self._numSegs > 0) and (
+			(dst != self._dst) or
+			(n > self._segSize) or
+			(self._end + n > len(self._buf)) or
+			(self._numSegs >= _MAX_GSO_SEGMENTS)
+		):
+			self.Flush()
+
+		if self._numSegs == 0:
+			self._dst = dst
+			self._segSize = n
+
+		self._view[self._end:self._end + n] = data
+		self._end += n
+		self._numSegs += 1
+
+		if n < self._segSize:
+			# a shorter segment can only be the last one
+			self.Flush()
+
+	def _SendTo(self, data: memoryview, dst: Any) -> None:
+		try:
+			self._sock.sendto(data, dst)
+		except (BlockingIOError, InterruptedError):
+			pass
+
+	def _SendEach(self) -> None:
+		for start in range(0, self._end, self._segSize):
+			self._SendTo(
+				self._view[start:min(start + self._segSize, self._end)],
+				self._dst,
+			)
+
+	def Flush(self) -> None:
+		if self._numSegs == 0:
+			return
+
+		try:
+			if (self._numSegs == 1) or (not self.isGSOEnabled):
+				self._SendEach()
+			else:
+				try:
+					self._sock.sendmsg(
+						[ self._view[:self._end] ],
+						[ (SOL_UDP, UDP_SEGMENT, struct.pack('=H', self._segSize)) ],
+						0,
+						self._dst,
+					)
+				except (BlockingIOError, InterruptedError):
+					pass
+				except OSError:
+					# GSO is not supported by this kernel or route
+					self.isGSOEnabled = False
+					self._SendEach()
+		finally:
+			self._dst = None
+			self._end = 0
+			self._segSize = 0
+			self._numSegs = 0
@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+# -*- coding:utf-8 -*-
+###
+# Copyright (c) 2025 Haofan Zheng
+# Use of this source code is governed by an MIT-style
+# license that can be found in the LICENSE file or at
+# https://opensource.org/licenses/MIT.
+###
+
+
+import socket
+import ssl
+
+from typing import Callable
+
+
+# errors raised by non-blocking sockets when they are not ready yet
+_RETRY_ERRORS = (
+	BlockingIOError,
+	InterruptedError,
+	ssl.SSLWantReadError,
+	ssl.SSLWantWriteError,
+)
+
+
+class RelayDirection(object):
+	'''
+	One direction (src -> dst) of a relayed connection on non-blocking
+	sockets.
+	Data read from `src` is kept in a bounded buffer until `dst` is able to
+	take it, so a slow `dst` never blocks the thread driving the relay;
+	instead, reading from `src` pauses until `dst` catches up.
+	A `tap` is given every chunk read from `src`, and must not keep a
+	reference to it.
+	'''
+
+	__slots__ = (
+		'src',
+		'dst',
+		'_tap',
+		'_buf',
+		'_view',
+		'_start',
+		'_end',
+		'_highWatermark',
+		'_lowWatermark',
+		'_paused',
+		'srcEOF',
+	)
+
+	def __init__(
+		self,
+		src: socket.socket,
+		dst: socket.socket,
+		bufSize: int,
+		highWatermark: int | None = None,
+		lowWatermark: int | None = None,
+		tap: Callable[[memoryview], None] | None = None,
+	) -> None:
+		super(RelayDirection, self).__init__()
+
+		self.src = src
+		self.dst = dst
+		self._tap = tap
+
+		self._buf = bytearray(bufSize)
+		self._view = memoryview(self._buf)
+		self._start = 0
+		self._end = 0
+
+		# reading from `src` pauses once `highWatermark` bytes are waiting
+		# for `dst`, and resumes when they drop to `lowWatermark`
+		self._highWatermark = bufSize if highWatermark is None else highWatermark
+		self._lowWatermark = (
+			(self._highWatermark // 2) if lowWatermark is None else lowWatermark
+		)
+		if not (0 <= self._lowWatermark < self._highWatermark <= bufSize):
+			raise ValueError(
+				f'Invalid watermarks: low={self._lowWatermark}, '
+				f'high={self._highWatermark}, bufSize={bufSize}'
+			)
+		self._paused = False
+
+		self.srcEOF = False
+
+	def NumBuffered(self) -> int:
+		return self._end - self._start
+
+	def WantsRead(self) -> bool:
+		return (
+			(not self.srcEOF) and
+			(not self._paused) and
+			(self._end < len(self._buf))
+		)
+
+	def WantsWrite(self) -> bool:
+		return self._end > self._start
+
+	def HasPendingInput(self) -> bool:
+		'''
+		TLS sockets may hold decrypted data inside OpenSSL that is not
+		reported by the poller, since it is no longer in the kernel.
+		'''
+		return isinstance(self.src, ssl.SSLSocket) and (self.src.pending() > 0)
+
+	def IsDone(self) -> bool:
+		'''Source reached EOF and everything has been forwarded.'''
+		return self.srcEOF and (not self.WantsWrite())
+
+	def OnReadable(self) -> None:
+		while self.WantsRead():
+			try:
+				n = self.src.recv_into(self._view[self._end:])
+			except _RETRY_ERRORS:
+				return
+
+			if n == 0:
+				self.srcEOF = True
+				return
+			if self._tap is not None:
+				self._tap(self._view[self._end:self._end + n])
+			self._end += n
+			if self.NumBuffered() >= self._highWatermark:
+				self._paused = True
+
+			if not self.HasPendingInput():
+				return
+
+	def OnWritable(self) -> None:
+		while self.WantsWrite():
+			try:
+				n = self.dst.send(self._view[self._start:self._end])
+			except _RETRY_ERRORS:
+				return
+
+			self._start += n
+			self._OnDrained()
+
+		# everything has been flushed; rewind to the front of the buffer
+		self._start = 0
+		self._end = 0
+
+	def _OnDrained(self) -> None:
+		numBuffered = self.NumBuffered()
+		if numBuffered > self._lowWatermark:
+			return
+
+		self._paused = False
+		if (self._start > 0) and (numBuffered > 0):
+			# move the (small) remainder to the front, to make room for reads
+			self._view[:numBuffered] = self._view[self._start:self._end]
+			self._start = 0
+			self._end = numBuffered
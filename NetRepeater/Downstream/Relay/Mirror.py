@@ -0,0 +1,230 @@
+#!/usr/bin/env python3
+# -*- coding:utf-8 -*-
+###
+# Copyright (c) 2025 Haofan Zheng
+# Use of this source code is governed by an MIT-style
+# license that can be found in the LICENSE file or at
+# https://opensource.org/licenses/MIT.
+###
+
+
+import logging
+import selectors
+import socket
+import ssl
+import threading
+import time
+
+from typing import Callable, Dict
+
+from ...Utils.Notifier import Notifier
+from ...Utils.Selector import ConnectionSelector
+
+
+# errors raised by non-blocking sockets when they are not ready yet
+_RETRY_ERRORS = (
+	BlockingIOError,
+	InterruptedError,
+	ssl.SSLWantReadError,
+	ssl.SSLWantWriteError,
+)
+
+# largest write to the shadow at a time
+_MAX_SEND_SIZE = 262144
+
+
+class MirrorCounters(object):
+	'''
+	Count the data copied to, or dropped instead of being copied to, the
+	shadow connections of a `mirror` handler.
+	'''
+
+	def __init__(self) -> None:
+		super(MirrorCounters, self).__init__()
+
+		self._lock = threading.Lock()
+		self._numConnections = 0
+		self._numFailedConnections = 0
+		self._numBytesMirrored = 0
+		self._numBytesDropped = 0
+		self._numChunksDropped = 0
+
+	def RecordConnection(self, isConnected: bool) -> None:
+		with self._lock:
+			self._numConnections += 1
+			if not isConnected:
+				self._numFailedConnections += 1
+
+	def RecordMirrored(self, numBytes: int) -> None:
+		with self._lock:
+			self._numBytesMirrored += numBytes
+
+	def RecordDropped(self, numBytes: int, numChunks: int = 1) -> None:
+		with self._lock:
+			self._numBytesDropped += numBytes
+			self._numChunksDropped += numChunks
+
+	def GetStats(self) -> Dict[str, int]:
+		with self._lock:
+			return {
+				'connections': self._numConnections,
+				'failedConnections': self._numFailedConnections,
+				'bytesMirrored': self._numBytesMirrored,
+				'bytesDropped': self._numBytesDropped,
+				'chunksDropped': self._numChunksDropped,
+			}
+
+
+class MirrorTap(object):
+	'''
+	Copy the data given to it to a shadow connection, from a thread of its
+	own, so the relay calling it never waits for the shadow.
+
+	At most `maxQueueSize` bytes wait for the shadow; data that does not
+	fit is dropped (and counted), as is everything once the shadow fails
+	to connect or breaks. Whatever the shadow sends back is discarded.
+	Once closed, the queue is given `closeTimeout` seconds to drain.
+	'''
+
+	def __init__(
+		self,
+		*,
+		connect: Callable[[], socket.socket],
+		maxQueueSize: int,
+		counters: MirrorCounters,
+		logger: logging.Logger,
+		closeTimeout: float = 5.0,
+	) -> None:
+		super(MirrorTap, self).__init__()
+
+		self._connect = connect
+		self._maxQueueSize = maxQueueSize
+		self._counters = counters
+		self._logger = logger
+		self._closeTimeout = closeTimeout
+
+		self._lock = threading.Lock()
+		self._queue = bytearray()
+		self._notifier = Notifier()
+		self._isFailed = False
+		self._isClosing = False
+		self._closeDeadline = 0.0
+
+		self._thread = threading.Thread(
+			target=self._Run,
+			name='MirrorTap',
+			daemon=True,
+		)
+		self._thread.start()
+
+	def __call__(self, data: memoryview) -> None:
+		'''
+		Queue a copy of `data` for the shadow, or drop it; never blocks on
+		anything but a short lock.
+		'''
+		with self._lock:
+			if (
+				(not self._isFailed) and
+				(len(self._queue) + len(data) <= self._maxQueueSize)
+			):
+				self._queue += data
+				self._notifier.Notify()
+				return
+		self._counters.RecordDropped(len(data))
+
+	def close(self) -> None:
+		'''
+		Stop taking data; what is already queued is still sent to the
+		shadow before its connection is closed.
+		'''
+		with self._lock:
+			self._isClosing = True
+			self._closeDeadline = time.monotonic() + self._closeTimeout
+			# the notifier is closed once the tap has failed
+			if not self._isFailed:
+				self._notifier.Notify()
+
+	def _Fail(self) -> None:
+		with self._lock:
+			self._isFailed = True
+			numDropped = len(self._queue)
+			self._queue.clear()
+		if numDropped > 0:
+			self._counters.RecordDropped(numDropped)
+
+	def _Send(self, shadow: socket.socket) -> None:
+		with self._lock:
+			# a copy, since the relay keeps appending to the queue
+			data = bytes(self._queue[:_MAX_SEND_SIZE])
+		while data:
+			try:
+				n = shadow.send(data)
+			except _RETRY_ERRORS:
+				return
+			with self._lock:
+				del self._queue[:n]
+			self._counters.RecordMirrored(n)
+			data = data[n:]
+
+	def _Discard(self, shadow: socket.socket) -> bool:
+		'''
+		:return: False if the shadow closed the connection.
+		'''
+		while True:
+			try:
+				data = shadow.recv(65536)
+			except _RETRY_ERRORS:
+				return True
+			if not data:
+				return False
+
+	def _Run(self) -> None:
+		try:
+			shadow = self._connect()
+		except Exception as e:
+			self._logger.debug(f'Failed to connect to the shadow: {e}')
+			self._counters.RecordConnection(False)
+			self._Fail()
+			with self._lock:
+				self._notifier.close()
+			return
+		self._counters.RecordConnection(True)
+
+		try:
+			shadow.setblocking(False)
+			with ConnectionSelector() as selector:
+				selector.register(self._notifier, selectors.EVENT_READ)
+				selector.register(shadow, selectors.EVENT_READ)
+				shadowEvents = selectors.EVENT_READ
+
+				while True:
+					self._notifier.Clear()
+					self._Send(shadow)
+					with self._lock:
+						isQueued = len(self._queue) > 0
+						isClosing = self._isClosing
+					timeout = None
+					if isClosing:
+						timeout = self._closeDeadline - time.monotonic()
+						if (not isQueued) or (timeout <= 0):
+							return
+
+					events = selectors.EVENT_READ
+					if isQueued:
+						events |= selectors.EVENT_WRITE
+					if events != shadowEvents:
+						selector.modify(shadow, events)
+						shadowEvents = events
+
+					for key, mask in selector.select(timeout):
+						if (key.fileobj is shadow) and (mask & selectors.EVENT_READ):
+							if not self._Discard(shadow):
+								self._logger.debug('Shadow closed the connection')
+								return
+		except OSError as e:
+			self._logger.debug(f'Mirroring failed with error: {e}')
+		finally:
+			self._Fail()
+			shadow.close()
+			with self._lock:
+				self._notifier.close()
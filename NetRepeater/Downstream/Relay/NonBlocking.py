@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+# -*- coding:utf-8 -*-
+###
+# Copyright (c) 2025 Haofan Zheng
+# Use of this source code is governed by an MIT-style
+# license that can be found in the LICENSE file or at
+# https://opensource.org/licenses/MIT.
+###
+
+
+import logging
+import selectors
+import socket
+import threading
+
+from typing import Any, Callable
+
+from ...Utils.Selector import ConnectionSelector
+from ...Utils.TerminateWaker import TerminateWaker
+from .Pair import RelayPair
+
+
+def NonBlockingRelay(
+	*,
+	upstream: socket.socket,
+	downstream: socket.socket,
+	terminateEvent: threading.Event,
+	pollInterval: float,
+	bufSize: int,
+	logger: logging.Logger,
+	upstreamAddr: Any,
+	terminateWaker: TerminateWaker | None = None,
+	highWatermark: int | None = None,
+	lowWatermark: int | None = None,
+	upstreamTap: Callable[[memoryview], None] | None = None,
+) -> None:
+	'''
+	Repeat data between the upstream and downstream sockets without ever
+	blocking on a write.
+	Each direction has a buffer of `bufSize` bytes; a socket is only polled
+	for writability while data is waiting for it, and reading from a socket
+	pauses while its peer has `highWatermark` bytes waiting, until they
+	drop to `lowWatermark`.
+	So a slow peer neither stalls the opposite direction nor grows the
+	memory used by the connection.
+	An `upstreamTap` sees all the data read from the upstream.
+
+	Both sockets are switched to non-blocking mode.
+	'''
+	upstream.setblocking(False)
+	downstream.setblocking(False)
+
+	pair = RelayPair(
+		upstream,
+		downstream,
+		upstreamAddr,
+		bufSize,
+		highWatermark,
+		lowWatermark,
+		upstreamTap,
+	)
+
+	with ConnectionSelector() as selector:
+		timeout = pollInterval
+		if terminateWaker is not None:
+			selector.register(terminateWaker, selectors.EVENT_READ)
+			timeout = None
+
+		pair.UpdateSelector(selector)
+
+		while not terminateEvent.is_set():
+			for key, events in selector.select(timeout):
+				if key.fileobj == terminateWaker:
+					# the server is terminating
+					return
+
+			pair.Service()
+			while pair.HasPendingInput():
+				pair.Service()
+
+			if pair.IsDone():
+				logger.debug(f'Relay for {upstreamAddr} finished')
+				return
+
+			pair.UpdateSelector(selector)
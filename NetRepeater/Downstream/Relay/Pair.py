@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+# -*- coding:utf-8 -*-
+###
+# Copyright (c) 2025 Haofan Zheng
+# Use of this source code is governed by an MIT-style
+# license that can be found in the LICENSE file or at
+# https://opensource.org/licenses/MIT.
+###
+
+
+import selectors
+import socket
+
+from typing import Any, Callable
+
+from .Direction import RelayDirection
+
+
+class RelayPair(object):
+	'''
+	A relayed connection (upstream <-> downstream) on non-blocking sockets,
+	with a bounded buffer in each direction; `onClose` is given the
+	downstream socket right before the pair is closed.
+	'''
+
+	__slots__ = (
+		'upstream',
+		'downstream',
+		'upstreamAddr',
+		'upDir',
+		'downDir',
+		'onClose',
+	)
+
+	def __init__(
+		self,
+		upstream: socket.socket,
+		downstream: socket.socket,
+		upstreamAddr: Any,
+		bufSize: int,
+		highWatermark: int | None = None,
+		lowWatermark: int | None = None,
+		upstreamTap: Callable[[memoryview], None] | None = None,
+		onClose: Callable[[socket.socket], None] | None = None,
+	) -> None:
+		super(RelayPair, self).__init__()
+
+		self.upstream = upstream
+		self.downstream = downstream
+		self.upstreamAddr = upstreamAddr
+		self.onClose = onClose
+
+		self.upDir = RelayDirection(
+			upstream, downstream, bufSize, highWatermark, lowWatermark, upstreamTap
+		)
+		self.downDir = RelayDirection(
+			downstream, upstream, bufSize, highWatermark, lowWatermark
+		)
+
+	def Service(self) -> None:
+		'''
+		Move as much data as possible without blocking, in both directions.
+		'''
+		for direction in (self.upDir, self.downDir):
+			direction.OnWritable()
+			direction.OnReadable()
+			direction.OnWritable()
+
+	def IsDone(self) -> bool:
+		return self.upDir.IsDone() or self.downDir.IsDone()
+
+	def HasPendingInput(self) -> bool:
+		return (
+			(self.upDir.WantsRead() and self.upDir.HasPendingInput()) or
+			(self.downDir.WantsRead() and self.downDir.HasPendingInput())
+		)
+
+	def GetEvents(self, sock: socket.socket) -> int:
+		'''Get the poller events of interest for one of the two sockets.'''
+		events = 0
+		for direction in (self.upDir, self.downDir):
+			if (direction.src is sock) and direction.WantsRead():
+				events |= selectors.EVENT_READ
+			if (direction.dst is sock) and direction.WantsWrite():
+				events |= selectors.EVENT_WRITE
+		return events
+
+	def UpdateSelector(self, selector: selectors.BaseSelector) -> None:
+		'''
+		(Un)register the two sockets with the selector, for the events the
+		relay is waiting for right now.
+		'''
+		for sock in (self.upstream, self.downstream):
+			events = self.GetEvents(sock)
+			try:
+				key = selector.get_key(sock)
+			except KeyError:
+				key = None
+
+			if key is None:
+				if events:
+					selector.register(sock, events)
+			elif events == 0:
+				selector.unregister(sock)
+			elif events != key.events:
+				selector.modify(sock, events)
+
+	def close(self) -> None:
+		if self.onClose is not None:
+			self.onClose(self.downstream)
+		self.upstream.close()
+		self.downstream.close()
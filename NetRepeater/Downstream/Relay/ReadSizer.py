@@ -0,0 +1,45 @@
+#!/usr/bin/env python3
+# -*- coding:utf-8 -*-
+###
+# Copyright (c) 2025 Haofan Zheng
+# Use of this source code is governed by an MIT-style
+# license that can be found in the LICENSE file or at
+# https://opensource.org/licenses/MIT.
+###
+
+
+class AdaptiveReadSizer(object):
+	'''
+	Pick the size of the next read from the sizes of the previous ones:
+	double it when a read fills it up (a bulk transfer is going on), and
+	halve it when reads come back much smaller (an interactive flow).
+	'''
+
+	__slots__ = (
+		'_minSize',
+		'_maxSize',
+		'_size',
+	)
+
+	def __init__(
+		self,
+		minSize: int = 4096,
+		maxSize: int = 262144,
+	) -> None:
+		super(AdaptiveReadSizer, self).__init__()
+
+		if (minSize <= 0) or (maxSize < minSize):
+			raise ValueError(f'Invalid read size range: [{minSize}, {maxSize}]')
+
+		self._minSize = minSize
+		self._maxSize = maxSize
+		self._size = minSize
+
+	def GetSize(self) -> int:
+		return self._size
+
+	def Update(self, numRead: int) -> None:
+		if numRead >= self._size:
+			self._size = min(self._size * 2, self._maxSize)
+		elif numRead <= (self._size // 4):
+			self._size = max(self._size // 2, self._minSize)
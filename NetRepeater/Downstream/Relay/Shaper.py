@@ -0,0 +1,236 @@
+#!/usr/bin/env python3
+# -*- coding:utf-8 -*-
+###
+# Copyright (c) 2025 Haofan Zheng
+# Use of this source code is governed by an MIT-style
+# license that can be found in the LICENSE file or at
+# https://opensource.org/licenses/MIT.
+###
+
+
+import socket
+import sys
+import threading
+import time
+
+from typing import Callable, Dict, List, Tuple
+
+
+# not exported by the socket module on older Python versions
+SO_MAX_PACING_RATE = getattr(
+	socket,
+	'SO_MAX_PACING_RATE',
+	47 if sys.platform.startswith('linux') else None,
+)
+# the option takes an int; larger rates are as good as unlimited
+_MAX_PACING_RATE = 0x7FFFFFFF
+
+
+def SetMaxPacingRate(sock: socket.socket, rate: int) -> bool:
+	'''
+	Let the kernel pace what is sent on a TCP socket to at most `rate`
+	bytes per second (with the `fq` qdisc, or TCP's internal pacing).
+
+	:return: False if the socket or the platform does not support it.
+	'''
+	if (
+		(SO_MAX_PACING_RATE is None) or
+		(sock.family not in (socket.AF_INET, socket.AF_INET6)) or
+		(sock.type != socket.SOCK_STREAM)
+	):
+		return False
+	try:
+		sock.setsockopt(
+			socket.SOL_SOCKET,
+			SO_MAX_PACING_RATE,
+			min(rate, _MAX_PACING_RATE),
+		)
+	except OSError:
+		return False
+	return True
+
+
+class TokenBucket(object):
+	'''
+	A token bucket of `rate` bytes per second, holding up to `burst`
+	bytes, shared by all the relays it limits.
+
+	Takers are never refused: taking more than is available puts the
+	bucket in debt, and the taker is told how long to wait for the debt to
+	be paid back. Concurrent takers thus queue up behind each other, each
+	waiting in proportion to what it has taken.
+	'''
+
+	__slots__ = (
+		'_rate',
+		'_burst',
+		'_tokens',
+		'_lastTime',
+		'_lock',
+	)
+
+	def __init__(self, rate: int, burst: int) -> None:
+		super(TokenBucket, self).__init__()
+
+		if (rate <= 0) or (burst <= 0):
+			raise ValueError(f'Invalid token bucket: rate={rate}, burst={burst}')
+
+		self._rate = rate
+		self._burst = burst
+		self._tokens = float(burst)
+		self._lastTime = time.monotonic()
+		self._lock = threading.Lock()
+
+	def _Refill(self, now: float) -> None:
+		# `now` may be a little behind when taken before the lock
+		if now <= self._lastTime:
+			return
+		self._tokens = min(
+			self._burst,
+			self._tokens + (now - self._lastTime) * self._rate,
+		)
+		self._lastTime = now
+
+	def Take(self, numBytes: int, now: float | None = None) -> float:
+		'''
+		:return: The number of seconds to wait before sending more.
+		'''
+		now = time.monotonic() if now is None else now
+		with self._lock:
+			self._Refill(now)
+			self._tokens -= numBytes
+			tokens = self._tokens
+		return 0.0 if tokens >= 0 else (-tokens / self._rate)
+
+	def IsFull(self, now: float | None = None) -> bool:
+		now = time.monotonic() if now is None else now
+		with self._lock:
+			self._Refill(now)
+			return self._tokens >= self._burst
+
+
+class ShapeCounters(object):
+	'''
+	Count the connections shaped by a `shape_by_rate` handler, and how
+	long their relays were held back.
+	'''
+
+	def __init__(self) -> None:
+		super(ShapeCounters, self).__init__()
+
+		self._lock = threading.Lock()
+		self._numConnections = 0
+		self._numPacedConnections = 0
+		self._numDelays = 0
+		self._delaySec = 0.0
+
+	def RecordConnection(self, isPaced: bool) -> None:
+		with self._lock:
+			self._numConnections += 1
+			if isPaced:
+				self._numPacedConnections += 1
+
+	def RecordDelay(self, delaySec: float) -> None:
+		with self._lock:
+			self._numDelays += 1
+			self._delaySec += delaySec
+
+	def GetStats(self) -> Dict[str, int]:
+		with self._lock:
+			return {
+				'connections': self._numConnections,
+				'pacedConnections': self._numPacedConnections,
+				'delays': self._numDelays,
+				'delayMs': int(self._delaySec * 1000),
+			}
+
+
+class RelayShaper(object):
+	'''
+	Hold the relay of one connection to the rates of the token buckets it
+	shares with other connections (e.g., those of the same client, and
+	those of all clients); `toDown` limits the data sent by the upstream,
+	and `toUp` the data sent by the downstream.
+
+	With a `pacingRate`, the kernel also paces each socket of the
+	connection to that rate, so a lone flow is smoothed out by the kernel
+	and the relay only waits when flows sharing a bucket contend for it.
+
+	The relays move both directions of a connection on one thread, so
+	while it waits for one direction's bucket, the other direction is held
+	back too (its data stays buffered in the kernel); a client in debt for
+	a large upload thus also stalls the responses to it.
+	'''
+
+	__slots__ = (
+		'_toDown',
+		'_toUp',
+		'_pacingRate',
+		'_terminateEvent',
+		'_counters',
+	)
+
+	def __init__(
+		self,
+		*,
+		toDown: List[TokenBucket],
+		toUp: List[TokenBucket],
+		pacingRate: int | None,
+		terminateEvent: threading.Event,
+		counters: ShapeCounters,
+	) -> None:
+		super(RelayShaper, self).__init__()
+
+		self._toDown = toDown
+		self._toUp = toUp
+		self._pacingRate = pacingRate
+		self._terminateEvent = terminateEvent
+		self._counters = counters
+
+	def Pace(self, upstream: socket.socket, downstream: socket.socket) -> bool:
+		'''
+		Set the kernel pacing rate of both sockets, if configured.
+
+		:return: True if the kernel paces both directions.
+		'''
+		isPaced = False
+		if self._pacingRate is not None:
+			# the upstream socket sends what the downstream sent, and
+			# vice versa
+			isPaced = (
+				SetMaxPacingRate(downstream, self._pacingRate) &
+				SetMaxPacingRate(upstream, self._pacingRate)
+			)
+		self._counters.RecordConnection(isPaced)
+		return isPaced
+
+	def _Wait(self, buckets: List[TokenBucket], numBytes: int) -> None:
+		now = time.monotonic()
+		delay = max(bucket.Take(numBytes, now) for bucket in buckets)
+		if delay > 0:
+			self._counters.RecordDelay(delay)
+			self._terminateEvent.wait(delay)
+
+	def ThrottleToDown(self, numBytes: int) -> None:
+		self._Wait(self._toDown, numBytes)
+
+	def ThrottleToUp(self, numBytes: int) -> None:
+		self._Wait(self._toUp, numBytes)
+
+	def GetThrottles(
+		self,
+	) -> Tuple[Callable[[int], None], Callable[[int], None]] | None:
+		'''
+		:return: The throttles for the data sent by the upstream and the
+			downstream, respectively; None if there is no bucket to keep to.
+		'''
+		if (not self._toDown) and (not self._toUp):
+			return None
+		return (
+			self.ThrottleToDown if self._toDown else _NoThrottle,
+			self.ThrottleToUp if self._toUp else _NoThrottle,
+		)
+
+
+def _NoThrottle(numBytes: int) -> None:
+	pass
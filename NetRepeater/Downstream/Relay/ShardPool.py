@@ -0,0 +1,235 @@
+#!/usr/bin/env python3
+# -*- coding:utf-8 -*-
+###
+# Copyright (c) 2025 Haofan Zheng
+# Use of this source code is governed by an MIT-style
+# license that can be found in the LICENSE file or at
+# https://opensource.org/licenses/MIT.
+###
+
+
+import logging
+import os
+import queue
+import selectors
+import socket
+import threading
+
+from typing import Any, Callable, Dict, List
+
+from .Pair import RelayPair
+
+
+class RelayShard(object):
+	'''
+	A worker thread that relays many connections with a single poller
+	(epoll on Linux).
+	'''
+
+	def __init__(
+		self,
+		name: str,
+		bufSize: int,
+		logger: logging.Logger,
+	) -> None:
+		super(RelayShard, self).__init__()
+
+		self._name = name
+		self._bufSize = bufSize
+		self._logger = logger
+
+		self._selector = selectors.DefaultSelector()
+		self._pairs: Dict[int, RelayPair] = {}
+		self._numPairs = 0
+		self._isTerminated = False
+		self._lock = threading.Lock()
+
+		# new pairs are handed over from other threads through this queue,
+		# and the pipe wakes the shard up to pick them up, or to terminate
+		self._inbox: queue.SimpleQueue = queue.SimpleQueue()
+		self._wakeRFd, self._wakeWFd = os.pipe()
+		os.set_blocking(self._wakeRFd, False)
+		os.set_blocking(self._wakeWFd, False)
+		self._selector.register(self._wakeRFd, selectors.EVENT_READ)
+
+		self._terminateEvent = threading.Event()
+		self._thread = threading.Thread(target=self._Run, name=self._name)
+
+	def GetNumPairs(self) -> int:
+		return self._numPairs
+
+	def Start(self) -> None:
+		self._thread.start()
+
+	def _Wake(self) -> None:
+		try:
+			os.write(self._wakeWFd, b'\x00')
+		except BlockingIOError:
+			# the shard already has a wake-up pending
+			pass
+
+	def AddPair(
+		self,
+		upstream: socket.socket,
+		downstream: socket.socket,
+		upstreamAddr: Any,
+		onClose: Callable[[socket.socket], None] | None = None,
+	) -> None:
+		'''
+		Hand a connected pair of sockets over to this shard, which takes the
+		ownership of both; they are closed if the shard has terminated.
+		`onClose` is given the downstream socket once its relay has ended.
+		'''
+		with self._lock:
+			if not self._isTerminated:
+				self._numPairs += 1
+				self._inbox.put((upstream, downstream, upstreamAddr, onClose))
+				self._Wake()
+				return
+
+		self._logger.debug(
+			f'Relay for {upstreamAddr} dropped, as the shard has terminated'
+		)
+		upstream.close()
+		downstream.close()
+
+	def _AcceptInbox(self) -> None:
+		try:
+			os.read(self._wakeRFd, 4096)
+		except BlockingIOError:
+			pass
+
+		while True:
+			try:
+				upstream, downstream, upstreamAddr, onClose = self._inbox.get_nowait()
+			except queue.Empty:
+				return
+
+			upstream.setblocking(False)
+			downstream.setblocking(False)
+			pair = RelayPair(
+				upstream,
+				downstream,
+				upstreamAddr,
+				self._bufSize,
+				onClose=onClose,
+			)
+			self._pairs[upstream.fileno()] = pair
+			self._pairs[downstream.fileno()] = pair
+			pair.UpdateSelector(self._selector)
+
+	def _RemovePair(self, pair: RelayPair) -> None:
+		for sock in (pair.upstream, pair.downstream):
+			self._pairs.pop(sock.fileno(), None)
+			try:
+				self._selector.unregister(sock)
+			except KeyError:
+				pass
+		pair.close()
+		with self._lock:
+			self._numPairs -= 1
+
+	def _ServicePair(self, pair: RelayPair) -> None:
+		try:
+			pair.Service()
+			while pair.HasPendingInput():
+				pair.Service()
+		except Exception as e:
+			self._logger.debug(
+				f'Relay for {pair.upstreamAddr} failed with error: {e}'
+			)
+			self._RemovePair(pair)
+			return
+
+		if pair.IsDone():
+			self._logger.debug(f'Relay for {pair.upstreamAddr} finished')
+			self._RemovePair(pair)
+		else:
+			pair.UpdateSelector(self._selector)
+
+	def _Run(self) -> None:
+		try:
+			while not self._terminateEvent.is_set():
+				for key, events in self._selector.select():
+					if key.fileobj == self._wakeRFd:
+						self._AcceptInbox()
+						continue
+
+					pair = self._pairs.get(key.fd)
+					if pair is None:
+						# removed while handling an earlier event of this round
+						continue
+					self._ServicePair(pair)
+		finally:
+			self._ClosePairs()
+
+	def _ClosePairs(self) -> None:
+		self._AcceptInbox()
+		for pair in set(self._pairs.values()):
+			self._RemovePair(pair)
+
+	def Terminate(self) -> None:
+		with self._lock:
+			if self._isTerminated:
+				return
+			# no pair can be added from now on,
+			# so nobody writes to the wake-up pipe once it is closed
+			self._isTerminated = True
+			self._terminateEvent.set()
+			self._Wake()
+
+		if self._thread.ident is not None:
+			self._thread.join()
+		else:
+			self._ClosePairs()
+		self._selector.close()
+		os.close(self._wakeRFd)
+		os.close(self._wakeWFd)
+
+
+class ShardPool(object):
+	'''
+	A fixed number of `RelayShard` threads; new connections go to the shard
+	with the fewest connections.
+	'''
+
+	def __init__(
+		self,
+		numShards: int,
+		bufSize: int,
+		logger: logging.Logger,
+		name: str = 'RelayShard',
+	) -> None:
+		super(ShardPool, self).__init__()
+
+		if numShards <= 0:
+			raise ValueError(f'Invalid number of shards: {numShards}')
+
+		self._shards: List[RelayShard] = [
+			RelayShard(
+				name=f'{name}-{i}',
+				bufSize=bufSize,
+				logger=logger,
+			)
+			for i in range(numShards)
+		]
+		self._shardsLock = threading.Lock()
+
+	def Start(self) -> None:
+		for shard in self._shards:
+			shard.Start()
+
+	def AddPair(
+		self,
+		upstream: socket.socket,
+		downstream: socket.socket,
+		upstreamAddr: Any,
+		onClose: Callable[[socket.socket], None] | None = None,
+	) -> None:
+		with self._shardsLock:
+			shard = min(self._shards, key=lambda s: s.GetNumPairs())
+			shard.AddPair(upstream, downstream, upstreamAddr, onClose)
+
+	def Terminate(self) -> None:
+		for shard in self._shards:
+			shard.Terminate()
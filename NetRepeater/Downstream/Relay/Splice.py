@@ -0,0 +1,242 @@
+#!/usr/bin/env python3
+# -*- coding:utf-8 -*-
+###
+# Copyright (c) 2025 Haofan Zheng
+# Use of this source code is governed by an MIT-style
+# license that can be found in the LICENSE file or at
+# https://opensource.org/licenses/MIT.
+###
+
+
+import errno
+import logging
+import os
+import selectors
+import socket
+import ssl
+import threading
+
+from typing import Any, Callable, Tuple
+
+from ...Utils.KTLS import IsKTLSFullyActive
+from ...Utils.Selector import ConnectionSelector
+from ...Utils.TerminateWaker import TerminateWaker
+
+
+def IsSpliceSupported(*socks: socket.socket) -> bool:
+	'''
+	Check if data between the given sockets can be moved with `splice(2)`.
+	TLS sockets are only supported if the kernel (kTLS) handles both of
+	their directions; otherwise their payload has to pass through OpenSSL
+	in userspace. Even then, the records that carry no data (e.g., TLS 1.3
+	session tickets and key updates) cannot be spliced, and are left to
+	OpenSSL by `SpliceRelay`.
+	'''
+	if not hasattr(os, 'splice'):
+		return False
+
+	for sock in socks:
+		if isinstance(sock, ssl.SSLSocket) and (not IsKTLSFullyActive(sock)):
+			return False
+		if sock.type != socket.SOCK_STREAM:
+			return False
+
+	return True
+
+
+class SplicePipe(object):
+	'''
+	A kernel pipe used as the intermediate buffer of a
+	socket -> pipe -> socket splice.
+	'''
+
+	def __init__(self, size: int) -> None:
+		super(SplicePipe, self).__init__()
+
+		self._rfd, self._wfd = os.pipe()
+		self._pending = 0
+
+		try:
+			import fcntl
+			fcntl.fcntl(self._wfd, fcntl.F_SETPIPE_SZ, size)
+		except (ImportError, AttributeError, OSError):
+			# keep the default pipe size if we are not allowed to change it
+			pass
+
+	def Fill(self, srcFd: int, size: int) -> int:
+		'''
+		Move up to `size` bytes from `srcFd` into the pipe.
+
+		:return: The number of bytes moved; 0 means the source reached EOF.
+		'''
+		n = os.splice(
+			srcFd,
+			self._wfd,
+			size,
+			flags=os.SPLICE_F_MOVE | os.SPLICE_F_NONBLOCK,
+		)
+		self._pending += n
+		return n
+
+	def Drain(self, dstFd: int) -> None:
+		'''
+		Move everything buffered in the pipe into `dstFd`.
+		'''
+		while self._pending > 0:
+			try:
+				n = os.splice(
+					self._rfd,
+					dstFd,
+					self._pending,
+					flags=os.SPLICE_F_MOVE,
+				)
+			except BlockingIOError:
+				# the destination socket is in non-blocking mode;
+				# wait until it can take more data
+				with ConnectionSelector() as selector:
+					selector.register(dstFd, selectors.EVENT_WRITE)
+					selector.select()
+				continue
+			self._pending -= n
+
+	def close(self) -> None:
+		os.close(self._rfd)
+		os.close(self._wfd)
+
+	def __enter__(self) -> 'SplicePipe':
+		return self
+
+	def __exit__(self, excType, excValue, traceback) -> None:
+		self.close()
+
+
+# the largest TLS record; OpenSSL keeps what does not fit in a read
+_MAX_TLS_RECORD_SIZE = 16384
+
+
+def _RecvThroughSSL(sock: ssl.SSLSocket, size: int) -> bytes | None:
+	'''
+	Read from a kTLS socket through OpenSSL, which handles the records that
+	carry no data.
+
+	:return: The data read; b'' at EOF; None if no data is ready yet.
+	'''
+	timeout = sock.gettimeout()
+	sock.setblocking(False)
+	try:
+		data = sock.recv(max(size, _MAX_TLS_RECORD_SIZE))
+		while data and (sock.pending() > 0):
+			data += sock.recv(sock.pending())
+		return data
+	except (ssl.SSLWantReadError, ssl.SSLWantWriteError):
+		return None
+	finally:
+		sock.settimeout(timeout)
+
+
+def _SpliceForward(
+	src: socket.socket,
+	dst: socket.socket,
+	pipe: SplicePipe,
+	readSize: int,
+) -> int | None:
+	'''
+	Move what can be read from `src` to `dst`.
+
+	:return: The number of bytes moved; 0 at EOF; None if nothing was ready.
+	'''
+	try:
+		n = pipe.Fill(src.fileno(), readSize)
+	except BlockingIOError:
+		return None
+	except OSError as e:
+		# a kTLS socket refuses to splice a record that carries no data
+		if (e.errno != errno.EIO) or (not isinstance(src, ssl.SSLSocket)):
+			raise
+		data = _RecvThroughSSL(src, readSize)
+		if data:
+			dst.sendall(data)
+		return None if data is None else len(data)
+
+	pipe.Drain(dst.fileno())
+	return n
+
+
+def SpliceRelay(
+	*,
+	upstream: socket.socket,
+	downstream: socket.socket,
+	terminateEvent: threading.Event,
+	pollInterval: float,
+	readSize: int,
+	logger: logging.Logger,
+	upstreamAddr: Any,
+	terminateWaker: TerminateWaker | None = None,
+	throttles: Tuple[Callable[[int], None], Callable[[int], None]] | None = None,
+) -> None:
+	'''
+	Repeat data between the upstream and downstream sockets with
+	`splice(2)`, so the payload never enters userspace.
+	Both sockets must be plain stream sockets, or TLS sockets offloaded to
+	the kernel (see `IsSpliceSupported`).
+
+	If a `terminateWaker` is given, the loop sleeps until there is data or
+	the waker is set, instead of waking up every `pollInterval`.
+
+	If `throttles` are given, they are told how much was moved in each
+	direction, as in `CopyRelay`.
+	'''
+	throttleToDown, throttleToUp = throttles if throttles else (None, None)
+	upFd = upstream.fileno()
+	downFd = downstream.fileno()
+
+	with SplicePipe(readSize) as upPipe, \
+		SplicePipe(readSize) as downPipe, \
+		ConnectionSelector() as selector:
+
+		selector.register(upFd, selectors.EVENT_READ)
+		selector.register(downFd, selectors.EVENT_READ)
+
+		timeout = pollInterval
+		if terminateWaker is not None:
+			selector.register(terminateWaker, selectors.EVENT_READ)
+			timeout = None
+
+		while not terminateEvent.is_set():
+			for key, events in selector.select(timeout):
+				if key.fileobj == upFd:
+					# client sent some data
+					# --> forward to server
+					n = _SpliceForward(upstream, downstream, upPipe, readSize)
+					if n is None:
+						continue
+					if n == 0:
+						# client closed the connection
+						logger.debug(
+							f'Upstream {upstreamAddr} closed the connection'
+						)
+						return
+					if throttleToDown is not None:
+						throttleToDown(n)
+
+				elif key.fileobj == downFd:
+					# server sent some data
+					# --> forward to client
+					n = _SpliceForward(downstream, upstream, downPipe, readSize)
+					if n is None:
+						continue
+					if n == 0:
+						# server closed the connection
+						logger.debug(
+							f'Downstream {downstream.getpeername()} closed the connection'
+						)
+						return
+					if throttleToUp is not None:
+						throttleToUp(n)
+
+				elif key.fileobj == terminateWaker:
+					# the server is terminating
+					return
+
+				else:
+					raise ValueError('Unknown file object')
@@ -0,0 +1,204 @@
+#!/usr/bin/env python3
+# -*- coding:utf-8 -*-
+###
+# Copyright (c) 2025 Haofan Zheng
+# Use of this source code is governed by an MIT-style
+# license that can be found in the LICENSE file or at
+# https://opensource.org/licenses/MIT.
+###
+
+
+import collections
+import logging
+import socket
+import ssl
+import threading
+import time
+
+from typing import Callable, Deque, Dict, Tuple
+
+from ..HTTP.KeepAlivePool import IsIdleConnAlive, IsReadable
+
+
+# longest wait between two failed attempts to connect
+_MAX_RETRY_DELAY = 30.0
+
+
+def IsWarmConnAlive(sock: socket.socket) -> bool:
+	'''
+	Check, without blocking, that a connection that has never been used
+	has not been closed by the peer.
+	Unlike `IsIdleConnAlive`, a TLS socket may have records waiting that
+	carry no data (e.g., the session tickets a TLS 1.3 server sends after
+	the handshake); they are processed rather than taken as a closure.
+	'''
+	if not isinstance(sock, ssl.SSLSocket):
+		return IsIdleConnAlive(sock)
+
+	if sock.pending():
+		return False
+	if not IsReadable(sock):
+		return True
+
+	timeout = sock.gettimeout()
+	try:
+		sock.setblocking(False)
+		# any data, or the end of the stream, makes it unusable
+		sock.recv(1)
+	except ssl.SSLWantReadError:
+		return True
+	except (OSError, ValueError):
+		return False
+	finally:
+		try:
+			sock.settimeout(timeout)
+		except OSError:
+			pass
+	return False
+
+
+class WarmPool(object):
+	'''
+	Connections to one backend made ahead of time by a background thread,
+	so that a client does not wait for the backend to connect (and for
+	the TLS handshake).
+
+	The pool is refilled up to `size` connections, and a connection that
+	has been waiting for `idleTimeout` seconds is replaced by a new one;
+	after a failure to connect, the thread waits `retryDelay` seconds,
+	doubling each time, before trying again. Connections are checked to be
+	alive before they are handed out, oldest first.
+	This only suits protocols in which the client speaks first.
+	'''
+
+	def __init__(
+		self,
+		*,
+		connect: Callable[[], socket.socket],
+		logger: logging.Logger,
+		size: int = 4,
+		idleTimeout: float = 30.0,
+		retryDelay: float = 1.0,
+	) -> None:
+		super(WarmPool, self).__init__()
+
+		if size <= 0:
+			raise ValueError(f'Invalid warm pool size: {size}')
+
+		self._connect = connect
+		self._logger = logger
+		self._size = size
+		self._idleTimeout = idleTimeout
+		self._retryDelay = retryDelay
+
+		# (socket, time it was connected), oldest first
+		self._idle: Deque[Tuple[socket.socket, float]] = collections.deque()
+		self._cond = threading.Condition()
+		self._isClosed = False
+
+		self._numHits = 0
+		self._numMisses = 0
+		self._numExpired = 0
+		self._numFailed = 0
+
+		self._thread = threading.Thread(
+			target=self._Run,
+			name='WarmPool',
+			daemon=True,
+		)
+		self._thread.start()
+
+	def Acquire(self) -> socket.socket | None:
+		'''
+		Take a live connection out of the pool; None if there is none.
+		'''
+		now = time.monotonic()
+		while True:
+			with self._cond:
+				if not self._idle:
+					self._numMisses += 1
+					return None
+				sock, since = self._idle.popleft()
+				# let the thread replace it
+				self._cond.notify()
+
+			if (now - since <= self._idleTimeout) and IsWarmConnAlive(sock):
+				with self._cond:
+					self._numHits += 1
+				return sock
+			sock.close()
+			with self._cond:
+				self._numExpired += 1
+
+	def _ExpireLockHeld(self, now: float) -> list[socket.socket]:
+		expired = []
+		while self._idle and (now - self._idle[0][1] > self._idleTimeout):
+			expired.append(self._idle.popleft()[0])
+		self._numExpired += len(expired)
+		return expired
+
+	def _Run(self) -> None:
+		numFailures = 0
+		retryAt = 0.0
+		while True:
+			with self._cond:
+				if self._isClosed:
+					return
+				now = time.monotonic()
+				expired = self._ExpireLockHeld(now)
+				isShort = len(self._idle) < self._size
+				if (not isShort) and (not expired):
+					# wake up when the oldest one expires, or one is taken
+					self._cond.wait(self._idle[0][1] + self._idleTimeout - now)
+					continue
+				if isShort and (now < retryAt) and (not expired):
+					self._cond.wait(retryAt - now)
+					continue
+
+			for sock in expired:
+				sock.close()
+			if (not isShort) or (now < retryAt):
+				continue
+
+			try:
+				sock = self._connect()
+			except Exception as e:
+				numFailures += 1
+				delay = min(
+					self._retryDelay * (2 ** (numFailures - 1)),
+					_MAX_RETRY_DELAY,
+				)
+				retryAt = time.monotonic() + delay
+				self._logger.debug(
+					f'Failed to make a warm connection (retrying in {delay}s): {e}'
+				)
+				with self._cond:
+					self._numFailed += 1
+				continue
+			numFailures = 0
+
+			with self._cond:
+				if not self._isClosed:
+					self._idle.append((sock, time.monotonic()))
+					continue
+			sock.close()
+			return
+
+	def GetStats(self) -> Dict[str, int]:
+		with self._cond:
+			return {
+				'idle': len(self._idle),
+				'hits': self._numHits,
+				'misses': self._numMisses,
+				'expired': self._numExpired,
+				'failed': self._numFailed,
+			}
+
+	def close(self) -> None:
+		with self._cond:
+			self._isClosed = True
+			idle = list(self._idle)
+			self._idle.clear()
+			self._cond.notify()
+		for sock, _ in idle:
+			sock.close()
@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+# -*- coding:utf-8 -*-
+###
+# Copyright (c) 2025 Haofan Zheng
+# Use of this source code is governed by an MIT-style
+# license that can be found in the LICENSE file or at
+# https://opensource.org/licenses/MIT.
+###
+
+
+import struct
+
+from typing import List, Tuple
+
+
+# a new stream, opened by the client; the payload describes the client
+FRAME_OPEN = 1
+# stream data
+FRAME_DATA = 2
+# more send credit for the stream; the payload is a 32-bit increment
+FRAME_WINDOW = 3
+# the sender will not send more data on the stream
+FRAME_FIN = 4
+# the stream is aborted, in both directions
+FRAME_RST = 5
+
+# type, stream ID, payload length
+_HEADER = struct.Struct('!BIH')
+_WINDOW = struct.Struct('!I')
+
+HEADER_SIZE = _HEADER.size
+MAX_PAYLOAD_SIZE = 0xFFFF
+
+
+class TunnelProtocolError(ValueError):
+	pass
+
+
+def PackFrame(frameType: int, streamId: int, payload: bytes = b'') -> bytes:
+	return _HEADER.pack(frameType, streamId, len(payload)) + payload
+
+
+def PackWindow(streamId: int, increment: int) -> bytes:
+	return PackFrame(FRAME_WINDOW, streamId, _WINDOW.pack(increment))
+
+
+def UnpackWindow(payload: bytes) -> int:
+	if len(payload) != _WINDOW.size:
+		raise TunnelProtocolError('Invalid WINDOW frame')
+	return _WINDOW.unpack(payload)[0]
+
+
+def ParseFrames(buf: bytearray) -> List[Tuple[int, int, bytes]]:
+	'''
+	Take all complete frames from the front of `buf`.
+
+	:return: A list of (type, stream ID, payload).
+	'''
+	frames = []
+	pos = 0
+	while len(buf) - pos >= HEADER_SIZE:
+		frameType, streamId, length = _HEADER.unpack_from(buf, pos)
+		if not (FRAME_OPEN <= frameType <= FRAME_RST):
+			raise TunnelProtocolError(f'Unknown frame type {frameType}')
+
+		end = pos + HEADER_SIZE + length
+		if len(buf) < end:
+			break
+		frames.append((frameType, streamId, bytes(buf[pos + HEADER_SIZE:end])))
+		pos = end
+
+	del buf[:pos]
+	return frames
@@ -0,0 +1,525 @@
+#!/usr/bin/env python3
+# -*- coding:utf-8 -*-
+###
+# Copyright (c) 2025 Haofan Zheng
+# Use of this source code is governed by an MIT-style
+# license that can be found in the LICENSE file or at
+# https://opensource.org/licenses/MIT.
+###
+
+
+import logging
+import selectors
+import socket
+import ssl
+import threading
+
+from typing import Callable, Dict
+
+from ...Utils.Notifier import Notifier
+from ...Utils.Selector import ConnectionSelector
+from ...Utils.TerminateWaker import TerminateWaker
+from .Frame import (
+	FRAME_DATA,
+	FRAME_FIN,
+	FRAME_OPEN,
+	FRAME_RST,
+	FRAME_WINDOW,
+	MAX_PAYLOAD_SIZE,
+	PackFrame,
+	PackWindow,
+	ParseFrames,
+	TunnelProtocolError,
+	UnpackWindow,
+)
+
+
+# errors raised by non-blocking sockets when they are not ready yet
+_RETRY_ERRORS = (
+	BlockingIOError,
+	InterruptedError,
+	ssl.SSLWantReadError,
+	ssl.SSLWantWriteError,
+)
+
+# largest write to the carrier connection at a time; TLS writes that could
+# not complete must be retried with the same data, which stays at the
+# front of the (growing) output buffer
+_MAX_SEND_SIZE = 262144
+
+
+class TunnelStream(object):
+	'''
+	One logical connection carried by a `TunnelSession`.
+
+	The session's I/O thread only queues the data received for the stream,
+	which `Pump` then writes to the local socket from the stream's own
+	thread; so a slow local peer never stalls the other streams.
+	Each side grants the other `windowSize` bytes of credit, and grants
+	more as the data is written to its local socket; reading from the local
+	socket pauses while there is no credit left.
+	'''
+
+	__slots__ = (
+		'session',
+		'streamId',
+		'notifier',
+		'_windowSize',
+		'_lock',
+		'_recvBuf',
+		'_recvAllowance',
+		'_sendWindow',
+		'_isPeerFin',
+		'_isReset',
+		'_isClosed',
+	)
+
+	def __init__(
+		self,
+		session: 'TunnelSession',
+		streamId: int,
+		windowSize: int,
+	) -> None:
+		super(TunnelStream, self).__init__()
+
+		self.session = session
+		self.streamId = streamId
+		self.notifier = Notifier()
+
+		self._windowSize = windowSize
+
+		self._lock = threading.Lock()
+		# data received from the peer, waiting for the local socket
+		self._recvBuf = bytearray()
+		# bytes the peer may still send before it is granted more credit
+		self._recvAllowance = windowSize
+		# bytes we may still send before the peer grants more credit
+		self._sendWindow = windowSize
+		self._isPeerFin = False
+		self._isReset = False
+		self._isClosed = False
+
+	def _NotifyLockHeld(self) -> None:
+		# the notifier's fd could otherwise be reused once closed
+		if not self._isClosed:
+			self.notifier.Notify()
+
+	# called from the I/O thread of the session
+
+	def OnData(self, payload: bytes) -> bool:
+		'''
+		:return: False if the peer sent more than its credit.
+		'''
+		with self._lock:
+			if len(payload) > self._recvAllowance:
+				return False
+			self._recvAllowance -= len(payload)
+			self._recvBuf += payload
+			self._NotifyLockHeld()
+		return True
+
+	def OnWindow(self, increment: int) -> None:
+		with self._lock:
+			self._sendWindow += increment
+			self._NotifyLockHeld()
+
+	def OnFin(self) -> None:
+		with self._lock:
+			self._isPeerFin = True
+			self._NotifyLockHeld()
+
+	def OnReset(self) -> None:
+		with self._lock:
+			self._isReset = True
+			self._NotifyLockHeld()
+
+	# called from the thread of the stream
+
+	def _RecvLocal(self, local: socket.socket, readSize: int) -> bytes | None:
+		with self._lock:
+			size = min(self._sendWindow, readSize)
+		try:
+			data = local.recv(size)
+		except _RETRY_ERRORS:
+			return None
+
+		with self._lock:
+			self._sendWindow -= len(data)
+		return data
+
+	def _ForwardLocal(self, local: socket.socket, readSize: int) -> bool:
+		'''
+		Forward what can be read from `local` to the peer.
+
+		:return: False if `local` reached EOF.
+		'''
+		while True:
+			data = self._RecvLocal(local, readSize)
+			if data == b'':
+				self.session.SendFin(self.streamId)
+				return False
+			if not data:
+				return True
+			self.session.SendData(self.streamId, data)
+
+			# TLS may hold decrypted data the poller does not know about
+			if not (
+				isinstance(local, ssl.SSLSocket) and
+				(local.pending() > 0) and
+				(self._sendWindow > 0)
+			):
+				return True
+
+	def _SendLocal(self, local: socket.socket, readSize: int) -> int:
+		with self._lock:
+			# a copy, since the I/O thread keeps appending to the buffer
+			data = bytes(self._recvBuf[:readSize])
+		try:
+			n = local.send(data)
+		except _RETRY_ERRORS:
+			return 0
+
+		with self._lock:
+			del self._recvBuf[:n]
+		return n
+
+	def _Grant(self, increment: int) -> None:
+		with self._lock:
+			self._recvAllowance += increment
+		self.session.SendWindow(self.streamId, increment)
+
+	def Pump(
+		self,
+		*,
+		local: socket.socket,
+		terminateEvent: threading.Event,
+		pollInterval: float,
+		logger: logging.Logger,
+		readSize: int = 65536,
+		terminateWaker: TerminateWaker | None = None,
+	) -> None:
+		'''
+		Relay data between `local` and the stream until both sides are
+		finished, either side aborts, or the session is closed.
+
+		`local` is switched to non-blocking mode.
+		'''
+		local.setblocking(False)
+
+		isLocalEOF = False
+		isLocalShutdown = False
+		isFinished = False
+		# written to `local` since the last credit granted to the peer
+		numUngranted = 0
+
+		try:
+			with ConnectionSelector() as selector:
+				timeout = pollInterval
+				selector.register(self.notifier, selectors.EVENT_READ)
+				if terminateWaker is not None:
+					selector.register(terminateWaker, selectors.EVENT_READ)
+					timeout = None
+				localEvents = 0
+
+				while not terminateEvent.is_set():
+					# clear first, so no update of the state below is missed
+					self.notifier.Clear()
+					with self._lock:
+						canSend = self._sendWindow > 0
+						hasRecv = len(self._recvBuf) > 0
+						isPeerFin = self._isPeerFin
+						isReset = self._isReset
+					if isReset:
+						return
+
+					if isPeerFin and (not hasRecv) and (not isLocalShutdown):
+						local.shutdown(socket.SHUT_WR)
+						isLocalShutdown = True
+					if isLocalEOF and isLocalShutdown:
+						isFinished = True
+						return
+
+					events = 0
+					if (not isLocalEOF) and canSend:
+						events |= selectors.EVENT_READ
+					if hasRecv:
+						events |= selectors.EVENT_WRITE
+					if events != localEvents:
+						if localEvents == 0:
+							selector.register(local, events)
+						elif events == 0:
+							selector.unregister(local)
+						else:
+							selector.modify(local, events)
+						localEvents = events
+
+					for key, mask in selector.select(timeout):
+						if key.fileobj is terminateWaker:
+							# the server is terminating
+							return
+						if key.fileobj is not local:
+							continue
+
+						if mask & selectors.EVENT_READ:
+							isLocalEOF = not self._ForwardLocal(local, readSize)
+
+						if mask & selectors.EVENT_WRITE:
+							numUngranted += self._SendLocal(local, readSize)
+							if numUngranted >= (self._windowSize // 2):
+								self._Grant(numUngranted)
+								numUngranted = 0
+		except OSError as e:
+			logger.debug(f'Stream {self.streamId} failed with error: {e}')
+		finally:
+			if not isFinished:
+				self.session.SendReset(self.streamId)
+			self.session.RemoveStream(self.streamId)
+			self.close()
+
+	def close(self) -> None:
+		'''
+		Release the notifier of a stream that is no longer served.
+		'''
+		with self._lock:
+			if self._isClosed:
+				return
+			self._isClosed = True
+			self.notifier.close()
+
+
+class TunnelSession(object):
+	'''
+	Many `TunnelStream`s multiplexed over one long-lived (TLS) connection,
+	the carrier.
+
+	Streams are opened by the client side with `OpenStream`; on the server
+	side, `onOpen` is called from the I/O thread for each stream opened by
+	the peer, and should hand the stream over to a thread of its own.
+	`Run` drives the carrier until it is closed.
+	'''
+
+	def __init__(
+		self,
+		sock: socket.socket,
+		*,
+		logger: logging.Logger,
+		windowSize: int = 262144,
+		frameSize: int = 16384,
+		maxStreams: int = 1024,
+		onOpen: Callable[[TunnelStream, str], None] | None = None,
+	) -> None:
+		super(TunnelSession, self).__init__()
+
+		if not (0 < frameSize <= MAX_PAYLOAD_SIZE):
+			raise ValueError(f'Invalid frame size {frameSize}')
+
+		self._sock = sock
+		self._logger = logger
+		self._windowSize = windowSize
+		self._frameSize = frameSize
+		self._maxStreams = maxStreams
+		self._onOpen = onOpen
+
+		self._lock = threading.Lock()
+		self._streams: Dict[int, TunnelStream] = {}
+		self._nextStreamId = 1
+		# frames waiting for the I/O thread
+		self._sendQueue = bytearray()
+		self._notifier = Notifier()
+		self._isClosed = False
+
+	def IsClosed(self) -> bool:
+		return self._isClosed
+
+	def GetNumStreams(self) -> int:
+		return len(self._streams)
+
+	def _Queue(self, data: bytes) -> None:
+		with self._lock:
+			if self._isClosed:
+				return
+			self._sendQueue += data
+			self._notifier.Notify()
+
+	def OpenStream(self, info: str = '') -> TunnelStream:
+		'''
+		Open a new stream; this costs one frame, and no round trip.
+
+		:param info: A description of the client, for the peer's logs.
+		'''
+		with self._lock:
+			if self._isClosed:
+				raise ConnectionError('Tunnel session is closed')
+			streamId = self._nextStreamId
+			self._nextStreamId += 1
+
+			stream = TunnelStream(self, streamId, self._windowSize)
+			self._streams[streamId] = stream
+			self._sendQueue += PackFrame(
+				FRAME_OPEN,
+				streamId,
+				info.encode('utf-8')[:MAX_PAYLOAD_SIZE],
+			)
+			self._notifier.Notify()
+		return stream
+
+	def SendData(self, streamId: int, data: bytes) -> None:
+		self._Queue(b''.join(
+			PackFrame(FRAME_DATA, streamId, data[i:i + self._frameSize])
+			for i in range(0, len(data), self._frameSize)
+		))
+
+	def SendWindow(self, streamId: int, increment: int) -> None:
+		self._Queue(PackWindow(streamId, increment))
+
+	def SendFin(self, streamId: int) -> None:
+		self._Queue(PackFrame(FRAME_FIN, streamId))
+
+	def SendReset(self, streamId: int) -> None:
+		self._Queue(PackFrame(FRAME_RST, streamId))
+
+	def RemoveStream(self, streamId: int) -> None:
+		with self._lock:
+			self._streams.pop(streamId, None)
+
+	def close(self) -> None:
+		'''
+		Close the session and abort all its streams; the carrier itself is
+		closed by the I/O thread, once it notices.
+		'''
+		with self._lock:
+			if self._isClosed:
+				return
+			self._isClosed = True
+			streams = list(self._streams.values())
+			self._streams.clear()
+			self._notifier.Notify()
+
+		for stream in streams:
+			stream.OnReset()
+
+	def _OnOpen(self, streamId: int, payload: bytes) -> None:
+		if (self._onOpen is None) or (streamId in self._streams):
+			raise TunnelProtocolError(f'Unexpected OPEN for stream {streamId}')
+
+		if len(self._streams) >= self._maxStreams:
+			self._logger.warning(
+				f'Too many streams ({self._maxStreams}); refusing a new one'
+			)
+			self.SendReset(streamId)
+			return
+
+		stream = TunnelStream(self, streamId, self._windowSize)
+		with self._lock:
+			self._streams[streamId] = stream
+		self._onOpen(stream, payload.decode('utf-8', errors='replace'))
+
+	def _Dispatch(self, inBuf: bytearray) -> None:
+		for frameType, streamId, payload in ParseFrames(inBuf):
+			if frameType == FRAME_OPEN:
+				self._OnOpen(streamId, payload)
+				continue
+
+			stream = self._streams.get(streamId)
+			if stream is None:
+				# the stream has already finished on this side
+				continue
+
+			if frameType == FRAME_DATA:
+				if not stream.OnData(payload):
+					self._logger.debug(
+						f'Stream {streamId} exceeded its window; resetting it'
+					)
+					self.SendReset(streamId)
+					stream.OnReset()
+			elif frameType == FRAME_WINDOW:
+				stream.OnWindow(UnpackWindow(payload))
+			elif frameType == FRAME_FIN:
+				stream.OnFin()
+			elif frameType == FRAME_RST:
+				stream.OnReset()
+
+	def _Flush(self, outBuf: bytearray) -> None:
+		while outBuf:
+			try:
+				n = self._sock.send(outBuf[:_MAX_SEND_SIZE])
+			except _RETRY_ERRORS:
+				return
+			del outBuf[:n]
+
+	def _Receive(self, inBuf: bytearray) -> bool:
+		'''
+		:return: False if the peer closed the carrier.
+		'''
+		while True:
+			try:
+				data = self._sock.recv(65536)
+			except _RETRY_ERRORS:
+				return True
+
+			if not data:
+				return False
+			inBuf += data
+
+			if not (
+				isinstance(self._sock, ssl.SSLSocket) and
+				(self._sock.pending() > 0)
+			):
+				return True
+
+	def Run(
+		self,
+		*,
+		terminateEvent: threading.Event,
+		pollInterval: float,
+		terminateWaker: TerminateWaker | None = None,
+	) -> None:
+		'''
+		Drive the carrier connection until it, or the session, is closed.
+		'''
+		self._sock.setblocking(False)
+
+		inBuf = bytearray()
+		outBuf = bytearray()
+
+		try:
+			with ConnectionSelector() as selector:
+				timeout = pollInterval
+				selector.register(self._notifier, selectors.EVENT_READ)
+				if terminateWaker is not None:
+					selector.register(terminateWaker, selectors.EVENT_READ)
+					timeout = None
+				sockEvents = selectors.EVENT_READ
+				selector.register(self._sock, sockEvents)
+
+				while (not self._isClosed) and (not terminateEvent.is_set()):
+					self._notifier.Clear()
+					with self._lock:
+						outBuf += self._sendQueue
+						self._sendQueue.clear()
+					self._Flush(outBuf)
+
+					events = selectors.EVENT_READ
+					if outBuf:
+						events |= selectors.EVENT_WRITE
+					if events != sockEvents:
+						selector.modify(self._sock, events)
+						sockEvents = events
+
+					for key, mask in selector.select(timeout):
+						if key.fileobj is terminateWaker:
+							# the server is terminating
+							return
+						if (key.fileobj is self._sock) and (mask & selectors.EVENT_READ):
+							isOpen = self._Receive(inBuf)
+							self._Dispatch(inBuf)
+							if not isOpen:
+								self._logger.debug('Tunnel carrier closed by the peer')
+								return
+		except (OSError, TunnelProtocolError) as e:
+			self._logger.warning(f'Tunnel session failed with error: {e}')
+		finally:
+			self.close()
+			self._sock.close()
+			with self._lock:
+				self._notifier.close()
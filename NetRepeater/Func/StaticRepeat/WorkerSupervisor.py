@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+# -*- coding:utf-8 -*-
+###
+# Copyright (c) 2025 Haofan Zheng
+# Use of this source code is governed by an MIT-style
+# license that can be found in the LICENSE file or at
+# https://opensource.org/licenses/MIT.
+###
+
+
+import logging
+import os
+import signal
+import time
+
+from typing import Callable, Dict, Tuple
+
+
+class WorkerSupervisor(object):
+	'''
+	Fork a fixed number of worker processes, restart the ones that die,
+	and forward termination signals to all of them.
+
+	A worker that dies is restarted after `restartDelay` seconds, doubled
+	each time it dies again within `maxRestartDelay` seconds of its start,
+	up to `maxRestartDelay`, so a worker that keeps crashing does not keep
+	the supervisor busy.
+	'''
+
+	_FORWARDED_SIGNALS = ( signal.SIGTERM, signal.SIGINT, )
+
+	def __init__(
+		self,
+		numWorkers: int,
+		workerFunc: Callable[[int], None],
+		restartDelay: float = 1.0,
+		maxRestartDelay: float = 60.0,
+	) -> None:
+		super(WorkerSupervisor, self).__init__()
+
+		if numWorkers <= 0:
+			raise ValueError(f'Invalid number of workers: {numWorkers}')
+
+		self._numWorkers = numWorkers
+		self._workerFunc = workerFunc
+		self._restartDelay = restartDelay
+		self._maxRestartDelay = maxRestartDelay
+
+		# pid -> worker index
+		self._workers: Dict[int, int] = {}
+		# worker index -> (time it was started, delay before its next restart)
+		self._restarts: Dict[int, Tuple[float, float]] = {}
+		self._isTerminating = False
+
+		self._logger = logging.getLogger(f'{__name__}.{self.__class__.__name__}')
+
+	def _RunWorker(self, workerIdx: int, sigMask: set) -> None:
+		# in the child process; this function never returns
+		exitCode = 0
+		try:
+			for signum in self._FORWARDED_SIGNALS:
+				signal.signal(signum, signal.SIG_DFL)
+			signal.pthread_sigmask(signal.SIG_SETMASK, sigMask)
+
+			self._workerFunc(workerIdx)
+		except BaseException:
+			self._logger.exception(f'Worker {workerIdx} failed')
+			exitCode = 1
+		finally:
+			logging.shutdown()
+			os._exit(exitCode)
+
+	def _SpawnWorker(self, workerIdx: int) -> None:
+		# a signal arriving before the new worker is known would not be
+		# forwarded to it; it is held until then
+		sigMask = signal.pthread_sigmask(signal.SIG_BLOCK, self._FORWARDED_SIGNALS)
+		try:
+			pid = os.fork()
+			if pid == 0:
+				self._RunWorker(workerIdx, sigMask)
+
+			self._workers[pid] = workerIdx
+		finally:
+			signal.pthread_sigmask(signal.SIG_SETMASK, sigMask)
+		self._logger.info(f'Started worker {workerIdx} (pid {pid})')
+
+	def _GetRestartDelay(self, workerIdx: int) -> float:
+		now = time.monotonic()
+		startTime, delay = self._restarts.get(workerIdx, (now, 0.0))
+		if (delay == 0.0) or (now - startTime >= self._maxRestartDelay):
+			delay = self._restartDelay
+		else:
+			delay = min(delay * 2, self._maxRestartDelay)
+		self._restarts[workerIdx] = (now + delay, delay)
+		return delay
+
+	def _ForwardSignal(self, signum: int, frame) -> None:
+		self._isTerminating = True
+		for pid in list(self._workers.keys()):
+			try:
+				os.kill(pid, signum)
+			except ProcessLookupError:
+				pass
+
+	def _WaitForSignal(self, timeout: float) -> None:
+		'''
+		Sleep for `timeout` seconds, or until a termination signal arrives.
+		'''
+		sigMask = signal.pthread_sigmask(signal.SIG_BLOCK, self._FORWARDED_SIGNALS)
+		try:
+			if self._isTerminating:
+				return
+			info = signal.sigtimedwait(self._FORWARDED_SIGNALS, timeout)
+		finally:
+			signal.pthread_sigmask(signal.SIG_SETMASK, sigMask)
+		if info is not None:
+			self._ForwardSignal(info.si_signo, None)
+
+	def Run(self) -> None:
+		'''
+		Start the workers and supervise them until all of them have exited
+		after a termination signal.
+		'''
+		for signum in self._FORWARDED_SIGNALS:
+			signal.signal(signum, self._ForwardSignal)
+
+		for workerIdx in range(self._numWorkers):
+			self._SpawnWorker(workerIdx)
+
+		while self._workers:
+			try:
+				pid, status = os.waitpid(-1, 0)
+			except ChildProcessError:
+				break
+
+			workerIdx = self._workers.pop(pid, None)
+			if workerIdx is None:
+				continue
+
+			exitCode = os.waitstatus_to_exitcode(status)
+			if self._isTerminating:
+				self._logger.info(
+					f'Worker {workerIdx} (pid {pid}) exited with code {exitCode}'
+				)
+				continue
+
+			delay = self._GetRestartDelay(workerIdx)
+			self._logger.warning(
+				f'Worker {workerIdx} (pid {pid}) died with code {exitCode}; '
+				f'restarting in {delay} seconds'
+			)
+			self._WaitForSignal(delay)
+			if not self._isTerminating:
+				self._SpawnWorker(workerIdx)
@@ -18,19 +18,23 @@ from ModularDNS.SignalHandler import WaitUntilSignals
 
 from ...Downstream.Handler.HandlerManager import BuildHandlerDictFromConfig
 from ...Inbound.Server.ConfigReader import CreateServerFromConfig
+from ...Utils.ThreadStack import SetThreadStackSize
+from .WorkerSupervisor import WorkerSupervisor
 
 
-def Start(configPath: os.PathLike) -> None:
-
-	with open(configPath, 'r') as f:
-		config = json.load(f)
-
-	Logger.InitializeFromConfig(config.get('logger', {}))
-	logger = logging.getLogger(f'{__name__}.{Start.__name__}')
+def Serve(config: dict) -> None:
+	'''
+	Build the downstream handlers and servers in the given configuration,
+	and serve until a termination signal is received.
+	'''
+	logger = logging.getLogger(f'{__name__}.{Serve.__name__}')
 
 	downstreamConfig = config['downstream']
 	serverConfig = config['servers']
 
+	# before any connection thread is started
+	SetThreadStackSize(config.get('threadStackSize', None))
+
 	logger.info('Initializing Downstream Handlers...')
 	downstreamHandlerDict = BuildHandlerDictFromConfig(downstreamConfig)
 
@@ -49,10 +53,38 @@ def Start(configPath: os.PathLike) -> None:
 	finally:
 		for server in servers:
 			server.Terminate()
+		downstreamHandlerDict.Terminate()
 
 	logger.info('Servers terminated.')
 
 
+def Start(configPath: os.PathLike) -> None:
+
+	with open(configPath, 'r') as f:
+		config = json.load(f)
+
+	Logger.InitializeFromConfig(config.get('logger', {}))
+	logger = logging.getLogger(f'{__name__}.{Start.__name__}')
+
+	numWorkers = int(config.get('workers', 1))
+	if numWorkers <= 1:
+		Serve(config)
+		return
+
+	# every worker binds the same listeners;
+	# the kernel spreads the accepted connections among them
+	for serverConf in config['servers']:
+		serverConf['config']['reusePort'] = True
+
+	logger.info(f'Starting {numWorkers} worker processes...')
+	WorkerSupervisor(
+		numWorkers=numWorkers,
+		workerFunc=lambda workerIdx: Serve(config),
+	).Run()
+
+	logger.info('Workers terminated.')
+
+
 def main() -> None:
 	parser = argparse.ArgumentParser(
 		description='NetRepeater Static Repeat',
@@ -11,10 +11,11 @@
 from ModularDNS.Server.Server import Server as _BaseServer
 
 from ..Outbound import Handler
+from ..Utils.TerminateWaker import TerminateWaker
 
 
 class Server(_BaseServer):
 
-	handlerPollInterval : float
 	handlerConnector    : Handler.HandlerConnector
+	terminateWaker      : TerminateWaker
 
@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+# -*- coding:utf-8 -*-
+###
+# Copyright (c) 2025 Haofan Zheng
+# Use of this source code is governed by an MIT-style
+# license that can be found in the LICENSE file or at
+# https://opensource.org/licenses/MIT.
+###
+
+
+import asyncio
+import logging
+import ssl
+import threading
+
+from typing import Tuple
+
+from ...Downstream.Handler.HandlerDict import HandlerBase as _DownstreamHandlerBase
+from .ListenerOptions import ListenerOptions
+
+
+class AsyncServerBase(object):
+	'''
+	A server that serves all of its connections from a single asyncio event
+	loop, running in one thread.
+	It offers the same life cycle interface as the threading servers
+	(`ThreadedServeUntilTerminate` and `Terminate`).
+	'''
+
+	def __init__(
+		self,
+		server_address: Tuple[str, int],
+		downstreamHdlr: _DownstreamHandlerBase,
+		sslContext: ssl.SSLContext | None = None,
+		listenerOptions: ListenerOptions | None = None,
+	) -> None:
+		super(AsyncServerBase, self).__init__()
+
+		if not hasattr(downstreamHdlr, 'HandleRequestAsync'):
+			raise TypeError(
+				f'{type(downstreamHdlr).__name__} does not support asyncio servers'
+			)
+
+		self.downstreamHdlr = downstreamHdlr
+		self.sslContext = sslContext
+		self.listenerOptions = listenerOptions or ListenerOptions()
+
+		self.terminateEvent = threading.Event()
+		self.handlerLogger = logging.getLogger(
+			f'{__name__}.{self.__class__.__name__}.Handler'
+		)
+		self._logger = logging.getLogger(f'{__name__}.{self.__class__.__name__}')
+
+		self._loop = asyncio.new_event_loop()
+		self._terminateAsyncEvent = asyncio.Event()
+		self._clientTasks: set[asyncio.Task] = set()
+		self._thread: threading.Thread | None = None
+
+		# bind the listening socket now, so the address is known right away
+		self._server = self._loop.run_until_complete(
+			asyncio.start_server(
+				self._HandleClient,
+				host=server_address[0],
+				port=server_address[1],
+				ssl=self.sslContext,
+				reuse_port=self.listenerOptions.reusePort,
+				# asyncio accepts up to `backlog` connections per wakeup
+				backlog=self.listenerOptions.backlog or 100,
+				start_serving=False,
+			)
+		)
+		for sock in self._server.sockets:
+			self.listenerOptions.ApplyToListener(sock)
+		self.server_address = self._server.sockets[0].getsockname()
+
+	async def _HandleClient(
+		self,
+		reader: asyncio.StreamReader,
+		writer: asyncio.StreamWriter,
+	) -> None:
+		task = asyncio.current_task()
+		self._clientTasks.add(task)
+
+		cltAddr = writer.get_extra_info('peername')
+		self.listenerOptions.OnAccepted(writer.get_extra_info('socket'))
+		try:
+			await self.downstreamHdlr.HandleRequestAsync(
+				reader=reader,
+				writer=writer,
+				logger=self.handlerLogger,
+			)
+		except asyncio.CancelledError:
+			pass
+		except Exception as e:
+			self.handlerLogger.debug(
+				f'Handler for {cltAddr} failed with error: {e}'
+			)
+		finally:
+			writer.close()
+			self._clientTasks.discard(task)
+
+	async def _ServeUntilTerminate(self) -> None:
+		await self._server.start_serving()
+		await self._terminateAsyncEvent.wait()
+
+		self._server.close()
+		for task in list(self._clientTasks):
+			task.cancel()
+		await asyncio.gather(*self._clientTasks, return_exceptions=True)
+		await self._server.wait_closed()
+
+	def ServeUntilTerminate(self) -> None:
+		try:
+			self._loop.run_until_complete(self._ServeUntilTerminate())
+		finally:
+			self._loop.close()
+
+	def ThreadedServeUntilTerminate(self) -> None:
+		self._thread = threading.Thread(
+			target=self.ServeUntilTerminate,
+			name=f'{self.__class__.__name__}-{self.server_address}',
+		)
+		self._thread.start()
+
+	def Terminate(self) -> None:
+		self.terminateEvent.set()
+
+		if self._thread is None:
+			# never started; just release the listening socket
+			self._server.close()
+			self._loop.run_until_complete(self._server.wait_closed())
+			self._loop.close()
+			return
+
+		self._loop.call_soon_threadsafe(self._terminateAsyncEvent.set)
+		self._thread.join()
+
+		self.listenerOptions.LogStats()
@@ -0,0 +1,50 @@
+#!/usr/bin/env python3
+# -*- coding:utf-8 -*-
+###
+# Copyright (c) 2025 Haofan Zheng
+# Use of this source code is governed by an MIT-style
+# license that can be found in the LICENSE file or at
+# https://opensource.org/licenses/MIT.
+###
+
+
+from ...Downstream.Handler.HandlerDict import HandlerDict as _DownstreamHandlerDict
+from ...Utils.SocketOptions import SocketOptions
+from .AsyncServerBase import AsyncServerBase
+from .ListenerOptions import ListenerOptions
+
+
+class AsyncTCPServer(AsyncServerBase):
+
+	@classmethod
+	def FromConfig(
+		cls,
+		downstreamHandlerDict: _DownstreamHandlerDict,
+		*,
+		ip: str,
+		port: int,
+		downstream: str,
+		reusePort: bool = False,
+		fastOpenQueue: int = 0,
+		socketOptions: dict | None = None,
+		backlog: int | None = None,
+		acceptBatch: int = 1,
+		deferAccept: int = 0,
+	) -> 'AsyncTCPServer':
+		'''
+		Create an asyncio based TCP server from configuration.
+		'''
+		downstreamHandler = downstreamHandlerDict.GetHandler(downstream)
+
+		return cls(
+			server_address=(str(ip), int(port)),
+			downstreamHdlr=downstreamHandler,
+			listenerOptions=ListenerOptions(
+				reusePort=reusePort,
+				fastOpenQueue=fastOpenQueue,
+				socketOptions=SocketOptions.FromConfig(socketOptions),
+				backlog=backlog,
+				acceptBatch=acceptBatch,
+				deferAccept=deferAccept,
+			),
+		)
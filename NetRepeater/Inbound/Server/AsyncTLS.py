@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+# -*- coding:utf-8 -*-
+###
+# Copyright (c) 2025 Haofan Zheng
+# Use of this source code is governed by an MIT-style
+# license that can be found in the LICENSE file or at
+# https://opensource.org/licenses/MIT.
+###
+
+
+import os
+
+from ...Downstream.Handler.HandlerDict import HandlerDict as _DownstreamHandlerDict
+from ...Utils.PySSLContext import CreateServerPySSLContext
+from ...Utils.SocketOptions import SocketOptions
+from .AsyncServerBase import AsyncServerBase
+from .ListenerOptions import ListenerOptions
+
+
+class AsyncTLSServer(AsyncServerBase):
+
+	@classmethod
+	def FromConfig(
+		cls,
+		downstreamHandlerDict: _DownstreamHandlerDict,
+		*,
+		ip: str,
+		port: int,
+		downstream: str,
+		privKeyPath: os.PathLike,
+		certPath: os.PathLike,
+		caPEMorDER: str | bytes | None = None,
+		verifyClient: bool = False,
+		reusePort: bool = False,
+		fastOpenQueue: int = 0,
+		socketOptions: dict | None = None,
+		backlog: int | None = None,
+		acceptBatch: int = 1,
+		deferAccept: int = 0,
+	) -> 'AsyncTLSServer':
+		'''
+		Create an asyncio based TLS server from configuration.
+		'''
+		downstreamHandler = downstreamHandlerDict.GetHandler(downstream)
+
+		# asyncio only takes the standard library type
+		sslContext = CreateServerPySSLContext(
+			privKeyPath=privKeyPath,
+			certPath=certPath,
+			caPEMorDER=caPEMorDER,
+			verifyClient=verifyClient,
+		)
+
+		return cls(
+			server_address=(str(ip), int(port)),
+			downstreamHdlr=downstreamHandler,
+			sslContext=sslContext,
+			listenerOptions=ListenerOptions(
+				reusePort=reusePort,
+				fastOpenQueue=fastOpenQueue,
+				socketOptions=SocketOptions.FromConfig(socketOptions),
+				backlog=backlog,
+				acceptBatch=acceptBatch,
+				deferAccept=deferAccept,
+			),
+		)
@@ -11,20 +11,31 @@
 from PyNetworkLib.Server.ServerBase import ServerBase as _ServerBase
 
 from ...Downstream.Handler.HandlerDict import HandlerDict as _DownstreamHandlerDict
+from .AsyncServerBase import AsyncServerBase
+from .AsyncTCP import AsyncTCPServer
+from .AsyncTLS import AsyncTLSServer
+from .ShardedTCP import ShardedTCPServer
 from .TCP import TCPServer
 from .TLS import TLSServer
+from .Tunnel import TunnelServer
+from .UDP import UDPServer
 
 
 _MOD_DICT = {
 	'TCP': TCPServer,
 	'TLS': TLSServer,
+	'AsyncTCP': AsyncTCPServer,
+	'AsyncTLS': AsyncTLSServer,
+	'ShardedTCP': ShardedTCPServer,
+	'UDP': UDPServer,
+	'Tunnel': TunnelServer,
 }
 
 
 def CreateServerFromConfig(
 	config: list[dict],
 	downstreamHandlerDict: _DownstreamHandlerDict,
-) -> list[_ServerBase]:
+) -> list[_ServerBase | AsyncServerBase | ShardedTCPServer | UDPServer]:
 
 	outServers = []
 
@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+# -*- coding:utf-8 -*-
+###
+# Copyright (c) 2025 Haofan Zheng
+# Use of this source code is governed by an MIT-style
+# license that can be found in the LICENSE file or at
+# https://opensource.org/licenses/MIT.
+###
+
+
+import logging
+import socket
+
+from typing import Any, Dict
+
+from ...Utils.FastOpen import FastOpenCounters, IsFastOpenSupported
+from ...Utils.SocketOptions import SocketOptions
+
+
+class ListenerOptions(object):
+	'''
+	Options applied to the listening socket of an inbound server.
+
+	A `fastOpenQueue` greater than 0 enables TCP Fast Open, with that many
+	pending Fast Open requests at most; `fastOpenCounters` then counts how
+	many accepted connections actually used it, and `LogStats` logs them.
+
+	`socketOptions` are applied to the listening socket, and so inherited
+	by every connection it accepts.
+
+	`backlog` is the length of the accept queue (None keeps the server's
+	default); each wakeup of the server accepts up to `acceptBatch` pending
+	connections; and a `deferAccept` greater than 0 sets `TCP_DEFER_ACCEPT`,
+	so a connection is only accepted once the client has sent data (or
+	after that many seconds).
+	'''
+
+	@classmethod
+	def FromConfig(cls, config: Dict[str, Any] | None) -> 'ListenerOptions | None':
+		'''
+		Create the options from a `listenerOptions` config section, whose
+		`socketOptions` is a `SocketOptions` config section.
+
+		:return: None if there is no section, to keep the server defaults.
+		'''
+		if config is None:
+			return None
+		config = dict(config)
+		config['socketOptions'] = SocketOptions.FromConfig(
+			config.get('socketOptions', None)
+		)
+		return cls(**config)
+
+	def __init__(
+		self,
+		reusePort: bool = False,
+		fastOpenQueue: int = 0,
+		socketOptions: SocketOptions | None = None,
+		backlog: int | None = None,
+		acceptBatch: int = 1,
+		deferAccept: int = 0,
+	) -> None:
+		super(ListenerOptions, self).__init__()
+
+		self.reusePort = reusePort
+		self.fastOpenQueue = fastOpenQueue
+		self.fastOpenCounters = FastOpenCounters()
+		self.socketOptions = socketOptions or SocketOptions()
+		self.backlog = backlog
+		self.acceptBatch = max(1, acceptBatch)
+		self.deferAccept = deferAccept
+
+		self._logger = logging.getLogger(f'{__name__}.{self.__class__.__name__}')
+
+	def ApplyBeforeBind(self, sock: socket.socket) -> None:
+		if self.reusePort:
+			# let several processes bind the same address,
+			# and the kernel spread the accepted connections among them
+			sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+		self.ApplyToListener(sock)
+
+	def ApplyToListener(self, sock: socket.socket) -> None:
+		'''
+		Apply the options that can be set either before binding or on a
+		socket that is already listening.
+		'''
+		self.socketOptions.Apply(sock)
+
+		if self.deferAccept > 0:
+			if hasattr(socket, 'TCP_DEFER_ACCEPT'):
+				sock.setsockopt(
+					socket.IPPROTO_TCP,
+					socket.TCP_DEFER_ACCEPT,
+					self.deferAccept,
+				)
+			else:
+				self._logger.warning(
+					'TCP_DEFER_ACCEPT is not available on this platform'
+				)
+
+		if self.fastOpenQueue > 0:
+			if IsFastOpenSupported():
+				sock.setsockopt(
+					socket.IPPROTO_TCP,
+					socket.TCP_FASTOPEN,
+					self.fastOpenQueue,
+				)
+			else:
+				self._logger.warning(
+					'TCP Fast Open is not available on this platform'
+				)
+
+	def OnAccepted(self, sock: socket.socket) -> None:
+		if self.fastOpenQueue > 0:
+			self.fastOpenCounters.Record(sock)
+
+	def LogStats(self) -> None:
+		'''
+		Log the counters, e.g., once the server has terminated.
+		'''
+		if self.fastOpenQueue > 0:
+			self._logger.info(f'TCP Fast Open: {self.fastOpenCounters.GetStats()}')
+
+
+class ListenerOptionsMixin(object):
+	'''
+	Apply `ListenerOptions` to servers built on `socketserver.TCPServer`.
+	'''
+
+	def __init__(
+		self,
+		*args,
+		listenerOptions: ListenerOptions | None = None,
+		**kwargs,
+	) -> None:
+		# the listening socket is bound in the base constructor,
+		# so the options must be in place before calling it
+		self.listenerOptions = listenerOptions or ListenerOptions()
+		if self.listenerOptions.backlog is not None:
+			self.request_queue_size = self.listenerOptions.backlog
+
+		super(ListenerOptionsMixin, self).__init__(*args, **kwargs)
+
+	def server_bind(self) -> None:
+		self.listenerOptions.ApplyBeforeBind(self.socket)
+
+		super(ListenerOptionsMixin, self).server_bind()
+
+	def server_activate(self) -> None:
+		super(ListenerOptionsMixin, self).server_activate()
+
+		if self.listenerOptions.acceptBatch > 1:
+			# accept until the queue is drained, instead of blocking on it
+			self.socket.setblocking(False)
+
+	def process_request(self, request: socket.socket, client_address) -> None:
+		self.listenerOptions.OnAccepted(request)
+
+		super(ListenerOptionsMixin, self).process_request(request, client_address)
+
+	def _handle_request_noblock(self) -> None:
+		if self.listenerOptions.acceptBatch <= 1:
+			super(ListenerOptionsMixin, self)._handle_request_noblock()
+			return
+
+		# same as `socketserver.BaseServer._handle_request_noblock`,
+		# but for every pending connection, up to the batch size
+		for _ in range(self.listenerOptions.acceptBatch):
+			try:
+				request, client_address = self.get_request()
+			except OSError:
+				# including BlockingIOError, once the queue is empty
+				return
+
+			if self.verify_request(request, client_address):
+				try:
+					self.process_request(request, client_address)
+				except Exception:
+					self.handle_error(request, client_address)
+					self.shutdown_request(request)
+				except:
+					self.shutdown_request(request)
+					raise
+			else:
+				self.shutdown_request(request)
+
+	def server_close(self) -> None:
+		super(ListenerOptionsMixin, self).server_close()
+
+		self.listenerOptions.LogStats()
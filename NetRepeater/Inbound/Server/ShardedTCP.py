@@ -0,0 +1,213 @@
+#!/usr/bin/env python3
+# -*- coding:utf-8 -*-
+###
+# Copyright (c) 2025 Haofan Zheng
+# Use of this source code is governed by an MIT-style
+# license that can be found in the LICENSE file or at
+# https://opensource.org/licenses/MIT.
+###
+
+
+import concurrent.futures
+import functools
+import ipaddress
+import logging
+import selectors
+import socket
+import threading
+
+from typing import Any, Tuple
+
+from ...Downstream.Handler.HandlerDict import (
+	HandlerBase as _DownstreamHandlerBase,
+	HandlerDict as _DownstreamHandlerDict,
+)
+from ...Downstream.Relay.ShardPool import ShardPool
+from ...Utils.SocketOptions import SocketOptions
+from ...Utils.TerminateWaker import TerminateWaker
+from .ListenerOptions import ListenerOptions
+
+
+class ShardedTCPServer(object):
+	'''
+	A TCP server that relays its connections with a fixed number of shard
+	threads, each owning one poller, instead of one thread per connection.
+
+	Connection setup (connecting to the downstream, including any TLS
+	handshake) is still blocking and done by the downstream handler, on a
+	bounded pool of setup threads.
+	'''
+
+	@classmethod
+	def FromConfig(
+		cls,
+		downstreamHandlerDict: _DownstreamHandlerDict,
+		*,
+		ip: str,
+		port: int,
+		downstream: str,
+		numShards: int = 4,
+		numSetupWorkers: int = 16,
+		bufferSize: int = 16384,
+		reusePort: bool = False,
+		fastOpenQueue: int = 0,
+		socketOptions: dict | None = None,
+		backlog: int | None = None,
+		acceptBatch: int = 1,
+		deferAccept: int = 0,
+	) -> 'ShardedTCPServer':
+		'''
+		Create a sharded TCP server from configuration.
+		'''
+		downstreamHandler = downstreamHandlerDict.GetHandler(downstream)
+
+		return cls(
+			server_address=(str(ip), int(port)),
+			downstreamHdlr=downstreamHandler,
+			numShards=numShards,
+			numSetupWorkers=numSetupWorkers,
+			bufferSize=bufferSize,
+			listenerOptions=ListenerOptions(
+				reusePort=reusePort,
+				fastOpenQueue=fastOpenQueue,
+				socketOptions=SocketOptions.FromConfig(socketOptions),
+				backlog=backlog,
+				acceptBatch=acceptBatch,
+				deferAccept=deferAccept,
+			),
+		)
+
+	def __init__(
+		self,
+		server_address: Tuple[str, int],
+		downstreamHdlr: _DownstreamHandlerBase,
+		numShards: int = 4,
+		numSetupWorkers: int = 16,
+		bufferSize: int = 16384,
+		listenerOptions: ListenerOptions | None = None,
+	) -> None:
+		super(ShardedTCPServer, self).__init__()
+
+		if not hasattr(downstreamHdlr, 'ConnectDownstream'):
+			raise TypeError(
+				f'{type(downstreamHdlr).__name__} does not support sharded servers'
+			)
+
+		self.downstreamHdlr = downstreamHdlr
+		self.listenerOptions = listenerOptions or ListenerOptions()
+
+		self.terminateEvent = threading.Event()
+		self.terminateWaker = TerminateWaker()
+		self.handlerLogger = logging.getLogger(
+			f'{__name__}.{self.__class__.__name__}.Handler'
+		)
+		self._logger = logging.getLogger(f'{__name__}.{self.__class__.__name__}')
+
+		ip = ipaddress.ip_address(server_address[0])
+		family = socket.AF_INET if ip.version == 4 else socket.AF_INET6
+		self.socket = socket.socket(family, socket.SOCK_STREAM)
+		try:
+			self.socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+			self.listenerOptions.ApplyBeforeBind(self.socket)
+			self.socket.bind(server_address)
+			if self.listenerOptions.backlog is None:
+				self.socket.listen()
+			else:
+				self.socket.listen(self.listenerOptions.backlog)
+		except Exception:
+			self.socket.close()
+			raise
+		self.socket.setblocking(False)
+		self.server_address = self.socket.getsockname()
+
+		self._shardPool = ShardPool(
+			numShards=numShards,
+			bufSize=bufferSize,
+			logger=self.handlerLogger,
+			name=f'{self.__class__.__name__}-{self.server_address[1]}-Shard',
+		)
+		self._setupPool = concurrent.futures.ThreadPoolExecutor(
+			max_workers=numSetupWorkers,
+			thread_name_prefix=f'{self.__class__.__name__}-{self.server_address[1]}-Setup',
+		)
+		self._thread: threading.Thread | None = None
+
+	def _SetupConnection(self, cltSock: socket.socket, cltAddr: Any) -> None:
+		try:
+			cltSock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+			downSock = self.downstreamHdlr.ConnectDownstream()
+		except Exception as e:
+			self.handlerLogger.debug(
+				f'Handler for {cltAddr} failed with error: {e}'
+			)
+			cltSock.close()
+			return
+
+		self._shardPool.AddPair(
+			cltSock,
+			downSock,
+			cltAddr,
+			# e.g., whether Fast Open was used is known once data was sent
+			onClose=getattr(self.downstreamHdlr, 'RecordDownstream', None),
+		)
+
+	@staticmethod
+	def _CloseIfCancelled(
+		cltSock: socket.socket,
+		future: concurrent.futures.Future,
+	) -> None:
+		# the setups still queued are cancelled on termination
+		if future.cancelled():
+			cltSock.close()
+
+	def _AcceptBatch(self) -> None:
+		for _ in range(self.listenerOptions.acceptBatch):
+			try:
+				cltSock, cltAddr = self.socket.accept()
+			except (BlockingIOError, InterruptedError):
+				return
+			except OSError as e:
+				self._logger.debug(f'Failed to accept connection: {e}')
+				return
+
+			cltSock.setblocking(True)
+			self.listenerOptions.OnAccepted(cltSock)
+			future = self._setupPool.submit(self._SetupConnection, cltSock, cltAddr)
+			future.add_done_callback(
+				functools.partial(self._CloseIfCancelled, cltSock)
+			)
+
+	def ServeUntilTerminate(self) -> None:
+		self._shardPool.Start()
+
+		with selectors.DefaultSelector() as selector:
+			selector.register(self.socket, selectors.EVENT_READ)
+			selector.register(self.terminateWaker, selectors.EVENT_READ)
+
+			while not self.terminateEvent.is_set():
+				for key, events in selector.select():
+					if key.fileobj == self.terminateWaker:
+						# the server is terminating
+						return
+
+					self._AcceptBatch()
+
+	def ThreadedServeUntilTerminate(self) -> None:
+		self._thread = threading.Thread(
+			target=self.ServeUntilTerminate,
+			name=f'{self.__class__.__name__}-{self.server_address}',
+		)
+		self._thread.start()
+
+	def Terminate(self) -> None:
+		self.terminateEvent.set()
+		self.terminateWaker.Set()
+		if self._thread is not None:
+			self._thread.join()
+
+		self._setupPool.shutdown(wait=True, cancel_futures=True)
+		self._shardPool.Terminate()
+		self.socket.close()
+		self.terminateWaker.close()
+
+		self.listenerOptions.LogStats()
@@ -11,9 +11,12 @@
 from PyNetworkLib.Server.TCP.Server import ThreadingServer as _TCPServer
 
 from ...Downstream.Handler.HandlerDict import HandlerDict as _DownstreamHandlerDict
+from ...Utils.SocketOptions import SocketOptions
+from ...Utils.TerminateWaker import TerminateWakerMixin
+from .ListenerOptions import ListenerOptions, ListenerOptionsMixin
 
 
-class TCPServer(_TCPServer):
+class TCPServer(TerminateWakerMixin, ListenerOptionsMixin, _TCPServer):
 
 	@classmethod
 	def FromConfig(
@@ -23,6 +26,12 @@ class TCPServer(_TCPServer):
 		ip: str,
 		port: int,
 		downstream: str,
+		reusePort: bool = False,
+		fastOpenQueue: int = 0,
+		socketOptions: dict | None = None,
+		backlog: int | None = None,
+		acceptBatch: int = 1,
+		deferAccept: int = 0,
 	) -> 'TCPServer':
 		'''
 		Create a TCP server from configuration.
@@ -32,5 +41,13 @@ class TCPServer(_TCPServer):
 		return cls(
 			server_address=(str(ip), int(port)),
 			downstreamTCPHdlr=downstreamHandler,
+			listenerOptions=ListenerOptions(
+				reusePort=reusePort,
+				fastOpenQueue=fastOpenQueue,
+				socketOptions=SocketOptions.FromConfig(socketOptions),
+				backlog=backlog,
+				acceptBatch=acceptBatch,
+				deferAccept=deferAccept,
+			),
 		)
 
@@ -8,15 +8,50 @@
 ###
 
 
+import logging
 import os
 
 from PyNetworkLib.Server.TLS.Server import ThreadingServer as _TLSServer
 from PyNetworkLib.TLS.SSLContext import SSLContext
 
 from ...Downstream.Handler.HandlerDict import HandlerDict as _DownstreamHandlerDict
+from ...Utils.KTLS import EnableKTLS
+from ...Utils.PySSLContext import GetPySSLContext
+from ...Utils.SocketOptions import SocketOptions
+from ...Utils.TerminateWaker import TerminateWakerMixin
+from .ListenerOptions import ListenerOptions, ListenerOptionsMixin
 
 
-class TLSServer(_TLSServer):
+class TLSServer(TerminateWakerMixin, ListenerOptionsMixin, _TLSServer):
+	'''
+	With `ktls`, OpenSSL hands the record encryption of the accepted
+	connections over to the kernel when the negotiated cipher allows it.
+	'''
+
+	@classmethod
+	def _CreateSSLContext(
+		cls,
+		*,
+		privKeyPath: os.PathLike,
+		certPath: os.PathLike,
+		caPEMorDER: str | bytes | None,
+		verifyClient: bool,
+		ktls: bool,
+	) -> SSLContext:
+		sslContext = SSLContext.CreateDefaultContext(
+			isServerSide=True,
+			caPEMorDER=caPEMorDER,
+			isVerifyRequired=verifyClient,
+		)
+		sslContext.LoadCertChainFiles(
+			privKeyPath=privKeyPath,
+			certChainPath=certPath,
+		)
+		if ktls and (not EnableKTLS(GetPySSLContext(sslContext))):
+			logging.getLogger(f'{__name__}.{cls.__name__}').warning(
+				'kTLS is not available on this platform'
+			)
+		return sslContext
 
 	@classmethod
 	def FromConfig(
@@ -30,25 +65,36 @@ class TLSServer(_TLSServer):
 		certPath: os.PathLike,
 		caPEMorDER: str | bytes | None = None,
 		verifyClient: bool = False,
+		reusePort: bool = False,
+		fastOpenQueue: int = 0,
+		socketOptions: dict | None = None,
+		backlog: int | None = None,
+		acceptBatch: int = 1,
+		deferAccept: int = 0,
+		ktls: bool = False,
 	) -> 'TLSServer':
 		'''
 		Create a TCP server from configuration.
 		'''
 		downstreamHandler = downstreamHandlerDict.GetHandler(downstream)
 
-		sslContext = SSLContext.CreateDefaultContext(
-			isServerSide=True,
-			caPEMorDER=caPEMorDER,
-			isVerifyRequired=verifyClient,
-		)
-		sslContext.LoadCertChainFiles(
-			privKeyPath=privKeyPath,
-			certChainPath=certPath,
-		)
-
 		return cls(
 			server_address=(str(ip), int(port)),
 			downstreamTCPHdlr=downstreamHandler,
-			sslContext=sslContext,
+			sslContext=cls._CreateSSLContext(
+				privKeyPath=privKeyPath,
+				certPath=certPath,
+				caPEMorDER=caPEMorDER,
+				verifyClient=verifyClient,
+				ktls=ktls,
+			),
+			listenerOptions=ListenerOptions(
+				reusePort=reusePort,
+				fastOpenQueue=fastOpenQueue,
+				socketOptions=SocketOptions.FromConfig(socketOptions),
+				backlog=backlog,
+				acceptBatch=acceptBatch,
+				deferAccept=deferAccept,
+			),
 		)
 
@@ -0,0 +1,183 @@
+#!/usr/bin/env python3
+# -*- coding:utf-8 -*-
+###
+# Copyright (c) 2025 Haofan Zheng
+# Use of this source code is governed by an MIT-style
+# license that can be found in the LICENSE file or at
+# https://opensource.org/licenses/MIT.
+###
+
+
+import os
+import threading
+
+from PyNetworkLib.Server.TCP.PyHandlerBase import PyHandlerBase
+from PyNetworkLib.Server.Utils.HandlerState import HandlerState
+
+from ...Downstream.Handler.HandlerDict import (
+	HandlerBase as _DownstreamHandlerBase,
+	HandlerDict as _DownstreamHandlerDict,
+)
+from ...Downstream.Tunnel.Session import TunnelSession, TunnelStream
+from ...Utils.SocketOptions import SocketOptions
+from ...Utils.TerminateWaker import TerminateWaker
+from .ListenerOptions import ListenerOptions
+from .TLS import TLSServer
+
+
+class _TunnelEndpoint(_DownstreamHandlerBase):
+	'''
+	Serve the streams of one carrier connection, each in its own thread,
+	relaying them to connections made by the downstream handler.
+	'''
+
+	def __init__(
+		self,
+		downstreamHdlr: _DownstreamHandlerBase,
+		windowSize: int,
+		frameSize: int,
+		maxStreams: int,
+		readSize: int,
+		pollInterval: float,
+	) -> None:
+		super(_TunnelEndpoint, self).__init__()
+
+		if not hasattr(downstreamHdlr, 'ConnectDownstream'):
+			raise TypeError(
+				f'{type(downstreamHdlr).__name__} cannot be used behind a tunnel'
+			)
+
+		self._downstreamHdlr = downstreamHdlr
+		self._windowSize = windowSize
+		self._frameSize = frameSize
+		self._maxStreams = maxStreams
+		self._readSize = readSize
+		self._pollInterval = pollInterval
+
+	def _ServeStream(
+		self,
+		stream: TunnelStream,
+		info: str,
+		pyHandler: PyHandlerBase,
+		terminateEvent: threading.Event,
+		terminateWaker: TerminateWaker | None,
+	) -> None:
+		logger = pyHandler.server.handlerLogger
+		try:
+			downstream = self._downstreamHdlr.ConnectDownstream()
+		except Exception as e:
+			logger.debug(f'Stream {stream.streamId} of {info} failed to connect: {e}')
+			stream.session.SendReset(stream.streamId)
+			stream.session.RemoveStream(stream.streamId)
+			stream.close()
+			return
+
+		with downstream:
+			stream.Pump(
+				local=downstream,
+				terminateEvent=terminateEvent,
+				pollInterval=self._pollInterval,
+				logger=logger,
+				readSize=self._readSize,
+				terminateWaker=terminateWaker,
+			)
+
+	def HandleRequest(
+		self,
+		*,
+		pyHandler: PyHandlerBase,
+		handlerState : HandlerState,
+		reqState: dict,
+		terminateEvent: threading.Event,
+	) -> None:
+		terminateWaker = getattr(pyHandler.server, 'terminateWaker', None)
+
+		def _OnOpen(stream: TunnelStream, info: str) -> None:
+			threading.Thread(
+				target=self._ServeStream,
+				args=(stream, info, pyHandler, terminateEvent, terminateWaker),
+				name='TunnelStream',
+				daemon=True,
+			).start()
+
+		session = TunnelSession(
+			pyHandler.request,
+			logger=pyHandler.server.handlerLogger,
+			windowSize=self._windowSize,
+			frameSize=self._frameSize,
+			maxStreams=self._maxStreams,
+			onOpen=_OnOpen,
+		)
+		session.Run(
+			terminateEvent=terminateEvent,
+			pollInterval=self._pollInterval,
+			terminateWaker=terminateWaker,
+		)
+
+
+class TunnelServer(TLSServer):
+	'''
+	The server side of `tunnel_client`: accepts TLS carrier connections
+	and relays each stream multiplexed over them to its own connection made
+	by the `downstream` handler (e.g., a `tcp_repeat` handler).
+
+	At most `maxStreams` streams are served per carrier at a time; more are
+	refused.
+	'''
+
+	@classmethod
+	def FromConfig(
+		cls,
+		downstreamHandlerDict: _DownstreamHandlerDict,
+		*,
+		ip: str,
+		port: int,
+		downstream: str,
+		privKeyPath: os.PathLike,
+		certPath: os.PathLike,
+		caPEMorDER: str | bytes | None = None,
+		verifyClient: bool = False,
+		windowSize: int = 262144,
+		frameSize: int = 16384,
+		maxStreams: int = 1024,
+		readSize: int = 65536,
+		pollInterval: float = 0.1,
+		reusePort: bool = False,
+		fastOpenQueue: int = 0,
+		socketOptions: dict | None = None,
+		backlog: int | None = None,
+		acceptBatch: int = 1,
+		deferAccept: int = 0,
+		ktls: bool = False,
+	) -> 'TunnelServer':
+		'''
+		Create a tunnel server from configuration.
+		'''
+		endpoint = _TunnelEndpoint(
+			downstreamHdlr=downstreamHandlerDict.GetHandler(downstream),
+			windowSize=windowSize,
+			frameSize=frameSize,
+			maxStreams=maxStreams,
+			readSize=readSize,
+			pollInterval=pollInterval,
+		)
+
+		return cls(
+			server_address=(str(ip), int(port)),
+			downstreamTCPHdlr=endpoint,
+			sslContext=cls._CreateSSLContext(
+				privKeyPath=privKeyPath,
+				certPath=certPath,
+				caPEMorDER=caPEMorDER,
+				verifyClient=verifyClient,
+				ktls=ktls,
+			),
+			listenerOptions=ListenerOptions(
+				reusePort=reusePort,
+				fastOpenQueue=fastOpenQueue,
+				socketOptions=SocketOptions.FromConfig(socketOptions),
+				backlog=backlog,
+				acceptBatch=acceptBatch,
+				deferAccept=deferAccept,
+			),
+		)
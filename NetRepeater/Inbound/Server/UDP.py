@@ -0,0 +1,285 @@
+#!/usr/bin/env python3
+# -*- coding:utf-8 -*-
+###
+# Copyright (c) 2025 Haofan Zheng
+# Use of this source code is governed by an MIT-style
+# license that can be found in the LICENSE file or at
+# https://opensource.org/licenses/MIT.
+###
+
+
+import ipaddress
+import logging
+import selectors
+import socket
+import threading
+import time
+
+from typing import Any, Dict, Tuple
+
+from ...Downstream.Handler.HandlerDict import HandlerDict as _DownstreamHandlerDict
+from ...Downstream.Handler.UDPRepeatHandler import UDPRepeatHandler
+from ...Downstream.Relay.Datagram import GSOBatcher
+from ...Utils.SocketOptions import SocketOptions
+from ...Utils.TerminateWaker import TerminateWaker
+from .ListenerOptions import ListenerOptions
+
+
+# large enough for any UDP datagram
+_MAX_DATAGRAM_SIZE = 65535
+
+
+class _UDPSession(object):
+	'''The downstream socket relaying the datagrams of one client.'''
+
+	__slots__ = (
+		'sock',
+		'cltAddr',
+		'lastActive',
+	)
+
+	def __init__(self, sock: socket.socket, cltAddr: Any, now: float) -> None:
+		super(_UDPSession, self).__init__()
+
+		self.sock = sock
+		self.cltAddr = cltAddr
+		self.lastActive = now
+
+
+class UDPServer(object):
+	'''
+	A UDP server that relays the datagrams of each client through its own
+	downstream socket (a session), from a single thread.
+
+	Each wakeup reads up to `batchSize` datagrams from a socket before
+	polling again, and sessions idle for longer than `sessionIdleTimeout`
+	seconds are closed. Datagrams from new clients are dropped while
+	`maxSessions` sessions are open.
+	With `gso`, the replies of a session read in one wakeup are sent to the
+	client with UDP GSO, i.e., one `sendmsg` for up to 64 datagrams.
+	'''
+
+	@classmethod
+	def FromConfig(
+		cls,
+		downstreamHandlerDict: _DownstreamHandlerDict,
+		*,
+		ip: str,
+		port: int,
+		downstream: str,
+		batchSize: int = 64,
+		sessionIdleTimeout: float = 60.0,
+		maxSessions: int = 65536,
+		gso: bool = False,
+		reusePort: bool = False,
+		socketOptions: dict | None = None,
+	) -> 'UDPServer':
+		'''
+		Create a UDP server from configuration.
+		'''
+		downstreamHandler = downstreamHandlerDict.GetHandler(downstream)
+
+		return cls(
+			server_address=(str(ip), int(port)),
+			downstreamHdlr=downstreamHandler,
+			batchSize=batchSize,
+			sessionIdleTimeout=sessionIdleTimeout,
+			maxSessions=maxSessions,
+			gso=gso,
+			listenerOptions=ListenerOptions(
+				reusePort=reusePort,
+				socketOptions=SocketOptions.FromConfig(socketOptions),
+			),
+		)
+
+	def __init__(
+		self,
+		server_address: Tuple[str, int],
+		downstreamHdlr: UDPRepeatHandler,
+		batchSize: int = 64,
+		sessionIdleTimeout: float = 60.0,
+		maxSessions: int = 65536,
+		gso: bool = False,
+		listenerOptions: ListenerOptions | None = None,
+	) -> None:
+		super(UDPServer, self).__init__()
+
+		if not hasattr(downstreamHdlr, 'CreateSession'):
+			raise TypeError(
+				f'{type(downstreamHdlr).__name__} does not support UDP servers'
+			)
+
+		self.downstreamHdlr = downstreamHdlr
+		self.listenerOptions = listenerOptions or ListenerOptions()
+
+		self._batchSize = max(1, batchSize)
+		self._sessionIdleTimeout = sessionIdleTimeout
+		self._maxSessions = maxSessions
+		# expired sessions are looked for a few times per idle timeout
+		self._sweepInterval = min(max(sessionIdleTimeout / 4, 0.05), 5.0)
+
+		self.terminateEvent = threading.Event()
+		self.terminateWaker = TerminateWaker()
+		self.handlerLogger = logging.getLogger(
+			f'{__name__}.{self.__class__.__name__}.Handler'
+		)
+		self._logger = logging.getLogger(f'{__name__}.{self.__class__.__name__}')
+
+		ip = ipaddress.ip_address(server_address[0])
+		family = socket.AF_INET if ip.version == 4 else socket.AF_INET6
+		self.socket = socket.socket(family, socket.SOCK_DGRAM)
+		try:
+			self.listenerOptions.ApplyBeforeBind(self.socket)
+			self.socket.bind(server_address)
+		except Exception:
+			self.socket.close()
+			raise
+		self.socket.setblocking(False)
+		self.server_address = self.socket.getsockname()
+
+		self._buf = bytearray(_MAX_DATAGRAM_SIZE)
+		self._view = memoryview(self._buf)
+		self._gsoBatcher = GSOBatcher(self.socket) if gso else None
+
+		self._selector = selectors.DefaultSelector()
+		self._sessions: Dict[Any, _UDPSession] = {}
+		self._thread: threading.Thread | None = None
+
+	def GetNumSessions(self) -> int:
+		return len(self._sessions)
+
+	def _OpenSession(self, cltAddr: Any, now: float) -> _UDPSession | None:
+		if len(self._sessions) >= self._maxSessions:
+			self.handlerLogger.debug(
+				f'Too many sessions; dropping datagram from {cltAddr}'
+			)
+			return None
+
+		try:
+			sock = self.downstreamHdlr.CreateSession()
+		except Exception as e:
+			self.handlerLogger.debug(
+				f'Handler for {cltAddr} failed with error: {e}'
+			)
+			return None
+
+		session = _UDPSession(sock, cltAddr, now)
+		self._sessions[cltAddr] = session
+		self._selector.register(sock, selectors.EVENT_READ, session)
+		self.handlerLogger.debug(f'Session for {cltAddr} opened')
+		return session
+
+	def _CloseSession(self, session: _UDPSession) -> None:
+		self._sessions.pop(session.cltAddr, None)
+		try:
+			self._selector.unregister(session.sock)
+		except KeyError:
+			pass
+		session.sock.close()
+
+	def _OnClientReadable(self, now: float) -> None:
+		# client --> server
+		for _ in range(self._batchSize):
+			try:
+				n, cltAddr = self.socket.recvfrom_into(self._buf)
+			except (BlockingIOError, InterruptedError):
+				return
+
+			session = self._sessions.get(cltAddr)
+			if session is None:
+				session = self._OpenSession(cltAddr, now)
+				if session is None:
+					continue
+			session.lastActive = now
+
+			try:
+				session.sock.send(self._view[:n])
+			except (BlockingIOError, InterruptedError):
+				# the socket buffer is full; drop the datagram
+				pass
+			except OSError as e:
+				self.handlerLogger.debug(
+					f'Session for {cltAddr} failed with error: {e}'
+				)
+				self._CloseSession(session)
+
+	def _OnSessionReadable(self, session: _UDPSession, now: float) -> None:
+		# server --> client
+		session.lastActive = now
+		try:
+			for _ in range(self._batchSize):
+				try:
+					n = session.sock.recv_into(self._buf)
+				except (BlockingIOError, InterruptedError):
+					break
+
+				if self._gsoBatcher is not None:
+					self._gsoBatcher.Add(session.cltAddr, self._view[:n])
+					continue
+				try:
+					self.socket.sendto(self._view[:n], session.cltAddr)
+				except (BlockingIOError, InterruptedError):
+					pass
+
+			if self._gsoBatcher is not None:
+				self._gsoBatcher.Flush()
+		except OSError as e:
+			# e.g., the downstream server refused the datagrams (ICMP)
+			self.handlerLogger.debug(
+				f'Session for {session.cltAddr} failed with error: {e}'
+			)
+			self._CloseSession(session)
+
+	def _ExpireSessions(self, now: float) -> None:
+		deadline = now - self._sessionIdleTimeout
+		expired = [
+			session for session in self._sessions.values()
+			if session.lastActive < deadline
+		]
+		for session in expired:
+			self.handlerLogger.debug(f'Session for {session.cltAddr} expired')
+			self._CloseSession(session)
+
+	def ServeUntilTerminate(self) -> None:
+		self._selector.register(self.socket, selectors.EVENT_READ)
+		self._selector.register(self.terminateWaker, selectors.EVENT_READ)
+
+		nextSweep = time.monotonic() + self._sweepInterval
+		try:
+			while not self.terminateEvent.is_set():
+				events = self._selector.select(self._sweepInterval)
+				# one clock reading per wakeup is precise enough for expiry
+				now = time.monotonic()
+
+				for key, mask in events:
+					if key.fileobj is self.socket:
+						self._OnClientReadable(now)
+					elif key.fileobj is self.terminateWaker:
+						# the server is terminating
+						return
+					elif key.data is not None:
+						self._OnSessionReadable(key.data, now)
+
+				if now >= nextSweep:
+					self._ExpireSessions(now)
+					nextSweep = now + self._sweepInterval
+		finally:
+			for session in list(self._sessions.values()):
+				self._CloseSession(session)
+
+	def ThreadedServeUntilTerminate(self) -> None:
+		self._thread = threading.Thread(
+			target=self.ServeUntilTerminate,
+			name=f'{self.__class__.__name__}-{self.server_address}',
+		)
+		self._thread.start()
+
+	def Terminate(self) -> None:
+		self.terminateEvent.set()
+		self.terminateWaker.Set()
+		if self._thread is not None:
+			self._thread.join()
+
+		self._selector.close()
+		self.socket.close()
+		self.terminateWaker.close()
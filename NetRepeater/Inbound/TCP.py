@@ -14,8 +14,12 @@ import socketserver
 
 from  ModularDNS.Server.Server import FromPySocketServer
 
+from ..Downstream.Relay.BufferPool import BufferPool
 from ..Outbound import Handler
+from ..Utils.Selector import ConnectionSelector
+from ..Utils.TerminateWaker import TerminateWakerMixin
 from .LegacyServer import Server as _Server
+from .Server.ListenerOptions import ListenerOptions, ListenerOptionsMixin
 from .Utils import (
 	_IP_ADDRESS_TYPES,
 	CreateServer as _CreateServer,
@@ -27,45 +31,58 @@ class TCPHandler(socketserver.StreamRequestHandler):
 
 	server: _Server
 
+	# relay buffers are reused across connections
+	bufferPool = BufferPool(4096)
+
 	def setup(self) -> None:
 		super(TCPHandler, self).setup()
 
-		self.pollInterval = self.server.handlerPollInterval
 		self.outHandler = self.server.handlerConnector.Connect()
-		self.readSize = 4096
-		self.cltAddrStr = f'{self.client_address[0]}:{self.client_address[1]}'
+		self.buffer = self.bufferPool.Acquire()
+
+	@property
+	def cltAddrStr(self) -> str:
+		# formatted on use, rather than kept for the life of every connection
+		return f'{self.client_address[0]}:{self.client_address[1]}'
 
 	def handle(self):
 		try:
-			with selectors.DefaultSelector() as selector:
+			with ConnectionSelector() as selector:
 				selector.register(self.request, selectors.EVENT_READ)
 				selector.register(self.outHandler, selectors.EVENT_READ)
+				# wakes us up when the server terminates,
+				# so there is no need to poll the terminate event
+				selector.register(self.server.terminateWaker, selectors.EVENT_READ)
 
 				while not self.server.terminateEvent.is_set():
-					for key, events in selector.select(self.pollInterval):
+					for key, events in selector.select():
 						if key.fileobj == self.request:
 							# client sent some data
 							# --> forward to server
-							data = self.request.recv(self.readSize)
-							if not data:
+							n = self.request.recv_into(self.buffer)
+							if n == 0:
 								# client closed the connection
 								self.server.handlerLogger.debug(
 									f'Client {self.cltAddrStr} closed the connection'
 								)
 								return
-							self.outHandler.sendall(data)
+							self.outHandler.sendall(self.buffer[:n])
 
 						elif key.fileobj == self.outHandler:
 							# server sent some data
 							# --> forward to client
-							data = self.outHandler.recv(self.readSize)
-							if not data:
+							n = self.outHandler.recv_into(self.buffer)
+							if n == 0:
 								# server closed the connection
 								self.server.handlerLogger.debug(
 									f'Server {self.outHandler.getpeername()} closed the connection'
 								)
 								return
-							self.request.sendall(data)
+							self.request.sendall(self.buffer[:n])
+
+						elif key.fileobj == self.server.terminateWaker:
+							# the server is terminating
+							return
 
 						else:
 							raise ValueError('Unknown file object')
@@ -76,21 +93,30 @@ class TCPHandler(socketserver.StreamRequestHandler):
 			pass
 
 	def finish(self) -> None:
+		self.bufferPool.Release(self.buffer)
 		self.outHandler.close()
 		self.server.handlerLogger.debug(f'Finishing {self.cltAddrStr} handler')
 		super(TCPHandler, self).finish()
 
 
 @FromPySocketServer
-class TCPServerV4(socketserver.ThreadingTCPServer):
+class _TCPServerV4(socketserver.ThreadingTCPServer):
 	address_family = socket.AF_INET
 
 
 @FromPySocketServer
-class TCPServerV6(socketserver.ThreadingTCPServer):
+class _TCPServerV6(socketserver.ThreadingTCPServer):
 	address_family = socket.AF_INET6
 
 
+class TCPServerV4(TerminateWakerMixin, ListenerOptionsMixin, _TCPServerV4):
+	pass
+
+
+class TCPServerV6(TerminateWakerMixin, ListenerOptionsMixin, _TCPServerV6):
+	pass
+
+
 class TCP:
 
 	@classmethod
@@ -99,8 +125,14 @@ class TCP:
 		address: _IP_ADDRESS_TYPES,
 		port: int,
 		handlerConnector: Handler.HandlerConnector,
+		listenerOptions: ListenerOptions | None = None,
 	) -> _Server:
-
+		'''
+		Without `listenerOptions`, the server keeps the socketserver
+		defaults (a backlog of 5, and one blocking accept per wakeup);
+		with many clients (re)connecting at once, e.g.,
+		`ListenerOptions(backlog=128, acceptBatch=16)` keeps up better.
+		'''
 		return _CreateServer(
 			address=address,
 			port=port,
@@ -108,5 +140,6 @@ class TCP:
 			handlerType=TCPHandler,
 			serverV4Type=TCPServerV4,
 			serverV6Type=TCPServerV6,
+			listenerOptions=listenerOptions,
 		)
 
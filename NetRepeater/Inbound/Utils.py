@@ -15,6 +15,7 @@ from typing import Type, Union
 
 from ..Outbound import Handler
 from .LegacyServer import Server as _Server
+from .Server.ListenerOptions import ListenerOptions
 
 
 _IP_ADDRESS_TYPES = Union[ ipaddress.IPv4Address, ipaddress.IPv6Address ]
@@ -27,7 +28,7 @@ def CreateServer(
 	handlerType: Type[socketserver.BaseRequestHandler],
 	serverV4Type: Type[_Server],
 	serverV6Type: Type[_Server],
-	handlerPollInterval: float = 0.5,
+	listenerOptions: ListenerOptions | None = None,
 ) -> _Server:
 
 	serverTypeMap = {
@@ -36,9 +37,12 @@ def CreateServer(
 	}
 	serverType = serverTypeMap[address.version]
 
-	serverInst = serverType((str(address), port), handlerType)
+	serverInst = serverType(
+		(str(address), port),
+		handlerType,
+		listenerOptions=listenerOptions,
+	)
 	serverInst.ServerInit({
-		'handlerPollInterval': handlerPollInterval,
 		'handlerConnector': handlerConnector,
 	})
 
@@ -27,6 +27,9 @@ class Handler(object):
 	def recv(self, bufsize: int) -> bytes:
 		raise NotImplementedError('recv() is not implemented')
 
+	def recv_into(self, buffer: memoryview) -> int:
+		raise NotImplementedError('recv_into() is not implemented')
+
 	def getpeername(self) -> str:
 		raise NotImplementedError('getpeername() is not implemented')
 
@@ -52,6 +55,9 @@ class SocketHandler(Handler):
 	def recv(self, bufsize: int) -> bytes:
 		return self.sock.recv(bufsize)
 
+	def recv_into(self, buffer: memoryview) -> int:
+		return self.sock.recv_into(buffer)
+
 	def getpeername(self) -> str:
 		return self.peername
 
@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+# -*- coding:utf-8 -*-
+###
+# Copyright (c) 2025 Haofan Zheng
+# Use of this source code is governed by an MIT-style
+# license that can be found in the LICENSE file or at
+# https://opensource.org/licenses/MIT.
+###
+
+
+import errno
+import ipaddress
+import selectors
+import socket
+import time
+
+from typing import Dict, List, Union
+
+from ..Utils.Selector import ConnectionSelector
+
+
+_IP_ADDRESS_TYPES = Union[ ipaddress.IPv4Address, ipaddress.IPv6Address ]
+
+# the delay between two connection attempts recommended by RFC 8305
+CONNECTION_ATTEMPT_DELAY = 0.25
+
+
+def SortAddrs(
+	addrs: List[_IP_ADDRESS_TYPES],
+	preferIPv6: bool,
+) -> List[_IP_ADDRESS_TYPES]:
+	'''
+	Drop duplicated addresses, and interleave the two address families,
+	starting with the preferred one (RFC 8305, section 4).
+	'''
+	preferred = 6 if preferIPv6 else 4
+	first: List[_IP_ADDRESS_TYPES] = []
+	second: List[_IP_ADDRESS_TYPES] = []
+	for addr in dict.fromkeys(addrs):
+		(first if addr.version == preferred else second).append(addr)
+
+	sortedAddrs = []
+	for i in range(max(len(first), len(second))):
+		sortedAddrs += first[i:i + 1] + second[i:i + 1]
+	return sortedAddrs
+
+
+def _StartAttempt(addr: _IP_ADDRESS_TYPES, port: int) -> socket.socket:
+	'''
+	Start a non-blocking connect.
+
+	:return: The socket; check `SO_ERROR` once it is writable.
+	'''
+	af = socket.AF_INET if addr.version == 4 else socket.AF_INET6
+	sock = socket.socket(af, socket.SOCK_STREAM)
+	try:
+		# set TCP_NODELAY to disable Nagle's algorithm
+		sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+		sock.setblocking(False)
+		err = sock.connect_ex((str(addr), port))
+		if err not in (0, errno.EINPROGRESS, errno.EAGAIN):
+			raise OSError(err, f'{errno.errorcode.get(err, err)} ({addr})')
+		return sock
+	except BaseException:
+		sock.close()
+		raise
+
+
+def HappyEyeballsConnect(
+	addrs: List[_IP_ADDRESS_TYPES],
+	port: int,
+	attemptDelay: float = CONNECTION_ATTEMPT_DELAY,
+	timeout: float | None = None,
+) -> socket.socket:
+	'''
+	Connect to the first of the given addresses that answers (RFC 8305):
+	an attempt is started every `attemptDelay` seconds, in order, or as
+	soon as the previous one fails, while the earlier attempts are kept
+	going; the first connection made wins, and the others are abandoned.
+
+	:return: The connected socket, in blocking mode.
+	:raises OSError: If every attempt failed, or `timeout` has passed.
+	'''
+	if not addrs:
+		raise OSError(errno.EADDRNOTAVAIL, 'No address to connect to')
+
+	deadline = None if timeout is None else (time.monotonic() + timeout)
+	pending: Dict[socket.socket, _IP_ADDRESS_TYPES] = {}
+	lastError: OSError | None = None
+	winner = None
+	nextIdx = 0
+	nextAttemptAt = time.monotonic()
+
+	with ConnectionSelector() as selector:
+		try:
+			while winner is None:
+				now = time.monotonic()
+				if (nextIdx < len(addrs)) and ((now >= nextAttemptAt) or (not pending)):
+					addr = addrs[nextIdx]
+					nextIdx += 1
+					nextAttemptAt = now + attemptDelay
+					try:
+						sock = _StartAttempt(addr, port)
+					except OSError as e:
+						lastError = e
+						nextAttemptAt = now
+						continue
+					pending[sock] = addr
+					selector.register(sock, selectors.EVENT_WRITE)
+
+				if not pending:
+					raise lastError
+
+				if (deadline is not None) and (now >= deadline):
+					raise TimeoutError(errno.ETIMEDOUT, 'Connection timed out')
+				waitUntil = nextAttemptAt if nextIdx < len(addrs) else None
+				if (deadline is not None) and (
+					(waitUntil is None) or (deadline < waitUntil)
+				):
+					waitUntil = deadline
+
+				for key, _ in selector.select(
+					None if waitUntil is None else max(waitUntil - now, 0.0)
+				):
+					sock = key.fileobj
+					addr = pending.pop(sock)
+					selector.unregister(sock)
+					err = sock.getsockopt(socket.SOL_SOCKET, socket.SO_ERROR)
+					if err == 0:
+						winner = sock
+						break
+					sock.close()
+					lastError = OSError(err, f'{errno.errorcode.get(err, err)} ({addr})')
+					# do not wait for the delay to try the next address
+					nextAttemptAt = time.monotonic()
+		finally:
+			for sock in pending:
+				sock.close()
+
+	winner.setblocking(True)
+	return winner
@@ -12,27 +12,49 @@ import ipaddress
 import logging
 import socket
 
-from typing import Callable, Union
+from typing import Callable, List, Union
 
 from .Handler import HandlerConnector, SocketHandler
+from .HappyEyeballs import (
+	CONNECTION_ATTEMPT_DELAY,
+	HappyEyeballsConnect,
+	SortAddrs,
+)
 
 
 _IP_ADDRESS_TYPES = Union[ ipaddress.IPv4Address, ipaddress.IPv6Address ]
 
 
 class TCPwDynamicIPConnector(HandlerConnector):
+	'''
+	Connect to the address `addrLookup` gives for the host name.
+
+	With `addrsLookup`, which gives the addresses of both families instead,
+	the addresses are raced (Happy Eyeballs, RFC 8305): a connection
+	attempt is started every `attemptDelay` seconds, starting with the
+	preferred family, until one of them connects, so a broken path of one
+	family does not stall the connection.
+	'''
 
 	def __init__(
 		self,
 		hostName: str,
 		port: int,
 		addrLookup: Callable[[str], _IP_ADDRESS_TYPES],
+		addrsLookup: Callable[[str], List[_IP_ADDRESS_TYPES]] | None = None,
+		preferIPv6: bool = False,
+		attemptDelay: float = CONNECTION_ATTEMPT_DELAY,
+		connectTimeout: float | None = None,
 	) -> None:
 		super(TCPwDynamicIPConnector, self).__init__()
 
 		self.hostName = hostName
 		self.port = port
 		self.addrLookup = addrLookup
+		self.addrsLookup = addrsLookup
+		self.preferIPv6 = preferIPv6
+		self.attemptDelay = attemptDelay
+		self.connectTimeout = connectTimeout
 
 		self.hostAddrStr = f'{self.hostName}:{self.port}'
 		self.logger = logging.getLogger(
@@ -40,6 +62,15 @@ class TCPwDynamicIPConnector(HandlerConnector):
 		)
 
 	def Connect(self) -> SocketHandler:
+		if self.addrsLookup is not None:
+			sock = HappyEyeballsConnect(
+				SortAddrs(self.addrsLookup(self.hostName), self.preferIPv6),
+				self.port,
+				attemptDelay=self.attemptDelay,
+				timeout=self.connectTimeout,
+			)
+			return SocketHandler(sock, logger=self.logger)
+
 		ipAddr = self.addrLookup(self.hostName)
 		if ipAddr.version == 4:
 			af = socket.AF_INET
@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+# -*- coding:utf-8 -*-
+###
+# Copyright (c) 2025 Haofan Zheng
+# Use of this source code is governed by an MIT-style
+# license that can be found in the LICENSE file or at
+# https://opensource.org/licenses/MIT.
+###
+
+
+import socket
+import sys
+import threading
+
+from typing import Dict
+
+
+# not exported by the socket module on older Python versions
+TCP_FASTOPEN_CONNECT = getattr(
+	socket,
+	'TCP_FASTOPEN_CONNECT',
+	30 if sys.platform.startswith('linux') else None,
+)
+# `tcpi_options` flag: data was sent or received in the SYN (see tcp.h)
+TCPI_OPT_SYN_DATA = 32
+# offset of `tcpi_options` in `struct tcp_info`
+_TCPI_OPTIONS_OFFSET = 5
+
+
+def IsFastOpenSupported() -> bool:
+	return hasattr(socket, 'TCP_FASTOPEN')
+
+
+def EnableFastOpenConnect(sock: socket.socket) -> bool:
+	'''
+	Let `connect` return right away, so that the first data written to the
+	socket is sent along with the SYN, when the kernel holds a Fast Open
+	cookie for the server.
+
+	:return: False if the platform does not support it.
+	'''
+	if TCP_FASTOPEN_CONNECT is None:
+		return False
+	try:
+		sock.setsockopt(socket.IPPROTO_TCP, TCP_FASTOPEN_CONNECT, 1)
+	except OSError:
+		return False
+	return True
+
+
+def IsFastOpenUsed(sock: socket.socket) -> bool:
+	'''
+	Check whether the SYN of a connected TCP socket carried data that the
+	server accepted, i.e., whether the connection was established with TCP
+	Fast Open.
+	With `TCP_FASTOPEN_CONNECT`, this is only known once the first data has
+	been written, since that is when the SYN is sent.
+	'''
+	if not hasattr(socket, 'TCP_INFO'):
+		return False
+	try:
+		info = sock.getsockopt(socket.IPPROTO_TCP, socket.TCP_INFO, 8)
+	except OSError:
+		return False
+	return bool(info[_TCPI_OPTIONS_OFFSET] & TCPI_OPT_SYN_DATA)
+
+
+class FastOpenCounters(object):
+	'''
+	Count the connections that were, or were not, established with TCP
+	Fast Open.
+	'''
+
+	def __init__(self) -> None:
+		super(FastOpenCounters, self).__init__()
+
+		self._lock = threading.Lock()
+		self._numConnections = 0
+		self._numFastOpen = 0
+
+	def Record(self, sock: socket.socket) -> bool:
+		isUsed = IsFastOpenUsed(sock)
+		with self._lock:
+			self._numConnections += 1
+			if isUsed:
+				self._numFastOpen += 1
+		return isUsed
+
+	def GetStats(self) -> Dict[str, int]:
+		with self._lock:
+			return {
+				'connections': self._numConnections,
+				'fastOpen': self._numFastOpen,
+			}
@@ -13,6 +13,7 @@ import logging
 import socket
 import subprocess
 import sys
+import threading
 import time
 
 from typing import Callable, Union
@@ -310,7 +311,9 @@ class IPManagerLinux(IPManager):
 
 class IPManagerLinuxDryRun(IPManagerLinux):
 
+	# shared by all instances, which may be used from different threads
 	_IP_LIST = {}
+	_IP_LIST_LOCK = threading.Lock()
 
 	@classmethod
 	def HasInterfaceIP(
@@ -319,9 +322,10 @@ class IPManagerLinuxDryRun(IPManagerLinux):
 		iface: str,
 		logger: Union[logging.Logger, None] = None,
 	) -> bool:
-		ifaceAddrs = cls._IP_LIST.get(iface, [])
+		with cls._IP_LIST_LOCK:
+			ifaceAddrs = cls._IP_LIST.get(iface, [])
 
-		return ip in ifaceAddrs
+			return ip in ifaceAddrs
 
 	@classmethod
 	def _RunSysCmd(cls, cmd: list) -> None:
@@ -331,14 +335,15 @@ class IPManagerLinuxDryRun(IPManagerLinux):
 
 		ip = ipaddress.ip_interface(ipWithPrefix).ip
 
-		if op == 'add':
-			if iface not in cls._IP_LIST:
-				cls._IP_LIST[iface] = []
-			cls._IP_LIST[iface].append(ip)
-		elif op == 'del':
-			cls._IP_LIST[iface].remove(ip)
-		else:
-			raise ValueError(f'Unknown operation: {op}')
+		with cls._IP_LIST_LOCK:
+			if op == 'add':
+				if iface not in cls._IP_LIST:
+					cls._IP_LIST[iface] = []
+				cls._IP_LIST[iface].append(ip)
+			elif op == 'del':
+				cls._IP_LIST[iface].remove(ip)
+			else:
+				raise ValueError(f'Unknown operation: {op}')
 
 	def __init__(
 		self,
@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+# -*- coding:utf-8 -*-
+###
+# Copyright (c) 2025 Haofan Zheng
+# Use of this source code is governed by an MIT-style
+# license that can be found in the LICENSE file or at
+# https://opensource.org/licenses/MIT.
+###
+
+
+import socket
+import ssl
+import sys
+import threading
+
+from typing import Dict, Tuple
+
+
+# from linux/tls.h; not exported by the socket module
+SOL_TLS = getattr(socket, 'SOL_TLS', 282)
+TLS_TX = 1
+TLS_RX = 2
+# large enough for any `tls12_crypto_info_*` struct
+_CRYPTO_INFO_SIZE = 64
+
+
+def IsKTLSSupported() -> bool:
+	'''
+	kTLS needs Linux, and a Python (3.12+) built against OpenSSL 3 that
+	exposes `OP_ENABLE_KTLS`.
+	'''
+	return sys.platform.startswith('linux') and hasattr(ssl, 'OP_ENABLE_KTLS')
+
+
+def EnableKTLS(sslContext: ssl.SSLContext) -> bool:
+	'''
+	Ask OpenSSL to hand the record encryption of the sockets wrapped by
+	this context over to the kernel, when the negotiated cipher allows it.
+
+	:return: False if kTLS is not supported on this platform.
+	'''
+	if not IsKTLSSupported():
+		return False
+	sslContext.options |= ssl.OP_ENABLE_KTLS
+	return True
+
+
+def _IsKTLSDirectionActive(sock: socket.socket, direction: int) -> bool:
+	try:
+		sock.getsockopt(SOL_TLS, direction, _CRYPTO_INFO_SIZE)
+	except OSError:
+		# the TLS ULP is not attached, or the keys of this direction
+		# have not been handed to the kernel
+		return False
+	return True
+
+
+def GetKTLSState(sock: socket.socket) -> Tuple[bool, bool]:
+	'''
+	Check whether the kernel took over the TX and RX directions of a
+	TLS socket that has completed its handshake.
+
+	:return: (TX is in the kernel, RX is in the kernel)
+	'''
+	if not isinstance(sock, ssl.SSLSocket):
+		return (False, False)
+	return (
+		_IsKTLSDirectionActive(sock, TLS_TX),
+		_IsKTLSDirectionActive(sock, TLS_RX),
+	)
+
+
+def IsKTLSFullyActive(sock: socket.socket) -> bool:
+	'''
+	Check whether the kernel handles both directions of a TLS socket, so
+	that the payload can be moved through the plain socket (e.g., with
+	`splice(2)`) without passing through OpenSSL.
+	'''
+	if not isinstance(sock, ssl.SSLSocket):
+		return False
+	# data that OpenSSL has already decrypted would be skipped otherwise
+	return (GetKTLSState(sock) == (True, True)) and (sock.pending() == 0)
+
+
+class KTLSCounters(object):
+	'''
+	Count the TLS sockets whose TX and RX directions were handled by the
+	kernel.
+	'''
+
+	def __init__(self) -> None:
+		super(KTLSCounters, self).__init__()
+
+		self._lock = threading.Lock()
+		self._numSockets = 0
+		self._numTx = 0
+		self._numRx = 0
+
+	def Record(self, sock: socket.socket) -> Tuple[bool, bool]:
+		isTx, isRx = GetKTLSState(sock)
+		with self._lock:
+			self._numSockets += 1
+			self._numTx += int(isTx)
+			self._numRx += int(isRx)
+		return (isTx, isRx)
+
+	def GetStats(self) -> Dict[str, int]:
+		with self._lock:
+			return {
+				'sockets': self._numSockets,
+				'tx': self._numTx,
+				'rx': self._numRx,
+			}
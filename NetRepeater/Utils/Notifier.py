@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+# -*- coding:utf-8 -*-
+###
+# Copyright (c) 2025 Haofan Zheng
+# Use of this source code is governed by an MIT-style
+# license that can be found in the LICENSE file or at
+# https://opensource.org/licenses/MIT.
+###
+
+
+import os
+
+
+class Notifier(object):
+	'''
+	A file descriptor that is readable after `Notify`, until `Clear`.
+	Unlike `TerminateWaker`, it can be reset, so a thread waiting on a
+	selector can be woken up for new work any number of times.
+	'''
+
+	def __init__(self) -> None:
+		super(Notifier, self).__init__()
+
+		if hasattr(os, 'eventfd'):
+			self._rfd = os.eventfd(0, os.EFD_CLOEXEC | os.EFD_NONBLOCK)
+			self._wfd = self._rfd
+		else:
+			self._rfd, self._wfd = os.pipe()
+			os.set_blocking(self._rfd, False)
+			os.set_blocking(self._wfd, False)
+
+	def fileno(self) -> int:
+		return self._rfd
+
+	def Notify(self) -> None:
+		try:
+			if self._wfd == self._rfd:
+				os.eventfd_write(self._wfd, 1)
+			else:
+				os.write(self._wfd, b'\x00')
+		except (BlockingIOError, OSError):
+			# already readable, or closed
+			pass
+
+	def Clear(self) -> None:
+		try:
+			os.read(self._rfd, 4096)
+		except BlockingIOError:
+			pass
+
+	def close(self) -> None:
+		os.close(self._rfd)
+		if self._wfd != self._rfd:
+			os.close(self._wfd)
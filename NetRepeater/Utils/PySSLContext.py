@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+# -*- coding:utf-8 -*-
+###
+# Copyright (c) 2025 Haofan Zheng
+# Use of this source code is governed by an MIT-style
+# license that can be found in the LICENSE file or at
+# https://opensource.org/licenses/MIT.
+###
+
+
+import os
+import ssl
+
+from typing import Any
+
+
+def GetPySSLContext(sslContext: Any) -> ssl.SSLContext:
+	'''
+	Get the Python `ssl.SSLContext` behind the given context object, for
+	the few places that have to configure a PyNetworkLib context further
+	(e.g., to enable kTLS); PyNetworkLib does not expose the context it
+	wraps, so it is looked up among the wrapper's attributes, and must be
+	the only one there. Where the context is made here, prefer making it
+	with the standard library in the first place (e.g., with
+	`CreateServerPySSLContext`).
+	'''
+	if isinstance(sslContext, ssl.SSLContext):
+		return sslContext
+
+	pySSLContexts = [
+		value for value in getattr(sslContext, '__dict__', {}).values()
+		if isinstance(value, ssl.SSLContext)
+	]
+	if len(pySSLContexts) != 1:
+		raise TypeError(
+			f'{type(sslContext).__name__} does not carry exactly one '
+			'Python ssl.SSLContext'
+		)
+	return pySSLContexts[0]
+
+
+def CreateServerPySSLContext(
+	*,
+	privKeyPath: os.PathLike,
+	certPath: os.PathLike,
+	caPEMorDER: str | bytes | None = None,
+	verifyClient: bool = False,
+) -> ssl.SSLContext:
+	'''
+	Create a Python `ssl.SSLContext` for the server side, which presents
+	the given certificate, and, with `verifyClient`, requires clients to
+	present one issued by `caPEMorDER` (or the default CAs).
+	'''
+	sslContext = ssl.create_default_context(
+		ssl.Purpose.CLIENT_AUTH,
+		cadata=caPEMorDER,
+	)
+	sslContext.verify_mode = ssl.CERT_REQUIRED if verifyClient else ssl.CERT_NONE
+	sslContext.load_cert_chain(certfile=certPath, keyfile=privKeyPath)
+	return sslContext
+
+
+def CreateClientPySSLContext(
+	*,
+	caPEMorDER: str | bytes | None = None,
+	privKeyPath: os.PathLike | None = None,
+	certPath: os.PathLike | None = None,
+) -> ssl.SSLContext:
+	'''
+	Create a Python `ssl.SSLContext` for the client side, which verifies
+	servers against `caPEMorDER` (or the default CAs), and presents a
+	client certificate if one is given.
+	Unlike PyNetworkLib's contexts, it can be used with all of the standard
+	library APIs, e.g., to resume TLS sessions.
+	'''
+	sslContext = ssl.create_default_context(
+		ssl.Purpose.SERVER_AUTH,
+		cadata=caPEMorDER,
+	)
+	if (privKeyPath is not None) and (certPath is not None):
+		sslContext.load_cert_chain(certfile=certPath, keyfile=privKeyPath)
+	return sslContext
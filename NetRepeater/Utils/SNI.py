@@ -0,0 +1,180 @@
+#!/usr/bin/env python3
+# -*- coding:utf-8 -*-
+###
+# Copyright (c) 2025 Haofan Zheng
+# Use of this source code is governed by an MIT-style
+# license that can be found in the LICENSE file or at
+# https://opensource.org/licenses/MIT.
+###
+
+
+import selectors
+import socket
+import struct
+import time
+
+from .Selector import ConnectionSelector
+
+
+_TLS_RECORD_HEADER_SIZE = 5
+_TLS_CONTENT_TYPE_HANDSHAKE = 22
+_TLS_HANDSHAKE_CLIENT_HELLO = 1
+_TLS_EXT_SERVER_NAME = 0
+_TLS_SERVER_NAME_HOST_NAME = 0
+# how often to look again at a ClientHello that has only partly arrived
+_PEEK_INTERVAL = 0.005
+# from linux/tcp.h; `tcpi_state` is the first byte of `struct tcp_info`
+_TCPI_STATE_OFFSET = 0
+_TCP_CLOSE_WAIT = 8
+
+
+class ClientHelloError(ValueError):
+	pass
+
+
+def ParseClientHelloSNI(hello: bytes) -> str | None:
+	'''
+	Get the server name (SNI) from a ClientHello handshake message
+	(starting with the handshake header).
+
+	:return: The lower-cased host name, or None if there is no SNI.
+	'''
+	try:
+		if hello[0] != _TLS_HANDSHAKE_CLIENT_HELLO:
+			raise ClientHelloError('Not a ClientHello')
+
+		# handshake header (4), legacy_version (2), random (32)
+		pos = 4 + 2 + 32
+		# legacy_session_id
+		pos += 1 + hello[pos]
+		# cipher_suites
+		pos += 2 + struct.unpack_from('!H', hello, pos)[0]
+		# legacy_compression_methods
+		pos += 1 + hello[pos]
+
+		if pos >= len(hello):
+			# no extensions at all
+			return None
+
+		extEnd = pos + 2 + struct.unpack_from('!H', hello, pos)[0]
+		pos += 2
+		while pos + 4 <= min(extEnd, len(hello)):
+			extType, extLen = struct.unpack_from('!HH', hello, pos)
+			pos += 4
+			if extType == _TLS_EXT_SERVER_NAME:
+				# server_name_list (2), then entries of
+				# name_type (1), name length (2), name
+				listEnd = pos + 2 + struct.unpack_from('!H', hello, pos)[0]
+				pos += 2
+				while pos + 3 <= listEnd:
+					nameType, nameLen = struct.unpack_from('!BH', hello, pos)
+					pos += 3
+					if nameType == _TLS_SERVER_NAME_HOST_NAME:
+						name = hello[pos:pos + nameLen]
+						if len(name) != nameLen:
+							raise ClientHelloError('Truncated server name')
+						return name.decode('ascii').lower()
+					pos += nameLen
+				return None
+			pos += extLen
+	except (IndexError, struct.error, UnicodeDecodeError) as e:
+		raise ClientHelloError(f'Malformed ClientHello: {e}')
+
+	return None
+
+
+def PeekClientHelloSNI(
+	sock: socket.socket,
+	maxSize: int = 16384,
+) -> str | None:
+	'''
+	Peek at the ClientHello waiting on a TCP socket and get its server name,
+	leaving all the data in the socket for whoever relays it next.
+	The socket's timeout bounds how long to wait for the ClientHello.
+
+	:return: The lower-cased host name, or None if there is no SNI.
+	'''
+	timeout = sock.gettimeout()
+	deadline = None if timeout is None else (time.monotonic() + timeout)
+
+	# the ClientHello may be fragmented across several records
+	hello = b''
+	helloLen = None
+	peekLen = 0
+	while (helloLen is None) or (len(hello) < helloLen):
+		header = _PeekExactly(
+			sock,
+			peekLen + _TLS_RECORD_HEADER_SIZE,
+			deadline,
+		)[peekLen:]
+		contentType, _, recordLen = struct.unpack('!BHH', header)
+		if (contentType != _TLS_CONTENT_TYPE_HANDSHAKE) or (recordLen == 0):
+			raise ClientHelloError('Not a TLS handshake record')
+
+		peekLen += _TLS_RECORD_HEADER_SIZE + recordLen
+		if peekLen > maxSize:
+			raise ClientHelloError('ClientHello is too large')
+		hello += _PeekExactly(sock, peekLen, deadline)[-recordLen:]
+
+		if (helloLen is None) and (len(hello) >= 4):
+			# handshake type (1), length (3)
+			helloLen = 4 + int.from_bytes(hello[1:4], 'big')
+
+	return ParseClientHelloSNI(hello[:helloLen])
+
+
+def _IsPeerClosed(sock: socket.socket) -> bool:
+	'''
+	Check whether the peer of a TCP socket has sent its FIN, so nothing
+	more than what is already buffered will arrive.
+	'''
+	if not hasattr(socket, 'TCP_INFO'):
+		return False
+	try:
+		info = sock.getsockopt(socket.IPPROTO_TCP, socket.TCP_INFO, 1)
+	except OSError:
+		# e.g., not a TCP socket
+		return False
+	return info[_TCPI_STATE_OFFSET] == _TCP_CLOSE_WAIT
+
+
+def _PeekExactly(
+	sock: socket.socket,
+	size: int,
+	deadline: float | None,
+) -> bytes:
+	'''
+	Peek at the first `size` bytes waiting on the socket, waiting for
+	them to arrive until the `deadline`, in `time.monotonic()` time.
+	MSG_WAITALL can not be used for this, since it is ignored on the
+	non-blocking sockets that timeouts are made of.
+	A peer that closes its side before all of them arrived is given up on
+	at once, rather than at the deadline.
+	'''
+	with ConnectionSelector() as selector:
+		selector.register(sock, selectors.EVENT_READ)
+		while True:
+			remaining = None
+			if deadline is not None:
+				remaining = deadline - time.monotonic()
+				if remaining <= 0:
+					raise TimeoutError('Timed out waiting for the ClientHello')
+			if not selector.select(remaining):
+				continue
+			# checked before peeking, so that nothing can arrive in between
+			isPeerClosed = _IsPeerClosed(sock)
+			try:
+				data = sock.recv(size, socket.MSG_PEEK)
+			except (BlockingIOError, InterruptedError):
+				continue
+			if len(data) == 0:
+				raise ClientHelloError('Connection closed before the ClientHello')
+			if len(data) >= size:
+				return data
+			if isPeerClosed:
+				raise ClientHelloError('Connection closed within the ClientHello')
+			# the socket stays readable until the rest arrives
+			time.sleep(
+				_PEEK_INTERVAL if remaining is None
+				else min(_PEEK_INTERVAL, remaining)
+			)
@@ -0,0 +1,19 @@
+#!/usr/bin/env python3
+# -*- coding:utf-8 -*-
+###
+# Copyright (c) 2025 Haofan Zheng
+# Use of this source code is governed by an MIT-style
+# license that can be found in the LICENSE file or at
+# https://opensource.org/licenses/MIT.
+###
+
+
+import selectors
+
+
+# The selector for loops that only watch the few file descriptors of one
+# connection. Every epoll selector holds a file descriptor, and kernel
+# memory, for as long as it lives, which adds up on servers with a thread
+# per connection; poll(2) has no such cost, and is just as fast for a
+# handful of file descriptors.
+ConnectionSelector = getattr(selectors, 'PollSelector', selectors.SelectSelector)
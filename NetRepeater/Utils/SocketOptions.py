@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+# -*- coding:utf-8 -*-
+###
+# Copyright (c) 2025 Haofan Zheng
+# Use of this source code is governed by an MIT-style
+# license that can be found in the LICENSE file or at
+# https://opensource.org/licenses/MIT.
+###
+
+
+import logging
+import socket
+import threading
+
+from typing import Any, Dict, List, Tuple
+
+
+SOCKET_OPTION_PROFILES: Dict[str, Dict[str, Any]] = {
+	# long fat pipes: large buffers to cover the bandwidth-delay product,
+	# and a congestion control that does not back off on random loss
+	'bulk-wan': {
+		'rcvBuf': 4 * 1024 * 1024,
+		'sndBuf': 4 * 1024 * 1024,
+		'notSentLowat': 128 * 1024,
+		'congestion': 'bbr',
+		'keepAlive': True,
+		'keepIdle': 60,
+		'keepInterval': 15,
+		'keepCount': 4,
+	},
+	# interactive traffic: keep little unsent data queued in the kernel,
+	# and give up on dead peers quickly
+	'low-latency': {
+		'notSentLowat': 16 * 1024,
+		'keepAlive': True,
+		'keepIdle': 30,
+		'keepInterval': 10,
+		'keepCount': 3,
+		'userTimeout': 30000,
+	},
+}
+
+
+class SocketOptions(object):
+	'''
+	Tuning options for TCP sockets; options left as None keep the system
+	defaults.
+
+	- `rcvBuf`/`sndBuf`: `SO_RCVBUF`/`SO_SNDBUF`, in bytes
+	- `notSentLowat`: `TCP_NOTSENT_LOWAT`, in bytes
+	- `congestion`: `TCP_CONGESTION`, e.g., "bbr" or "cubic"
+	- `keepAlive`, `keepIdle`, `keepInterval` (seconds) and `keepCount`:
+	  `SO_KEEPALIVE`, `TCP_KEEPIDLE`, `TCP_KEEPINTVL` and `TCP_KEEPCNT`
+	- `userTimeout`: `TCP_USER_TIMEOUT`, in milliseconds
+	'''
+
+	@classmethod
+	def FromConfig(cls, config: Dict[str, Any] | None) -> 'SocketOptions':
+		'''
+		Create the options from a `socketOptions` config section.
+		The section may name a `profile` from `SOCKET_OPTION_PROFILES`;
+		the other keys in the section override the ones of the profile.
+		'''
+		config = dict(config or {})
+
+		profileName = config.pop('profile', None)
+		options = {}
+		if profileName is not None:
+			if profileName not in SOCKET_OPTION_PROFILES:
+				raise ValueError(f'Unknown socket option profile: {profileName}')
+			options.update(SOCKET_OPTION_PROFILES[profileName])
+		options.update(config)
+
+		return cls(**options)
+
+	def __init__(
+		self,
+		rcvBuf: int | None = None,
+		sndBuf: int | None = None,
+		notSentLowat: int | None = None,
+		congestion: str | None = None,
+		keepAlive: bool | None = None,
+		keepIdle: int | None = None,
+		keepInterval: int | None = None,
+		keepCount: int | None = None,
+		userTimeout: int | None = None,
+	) -> None:
+		super(SocketOptions, self).__init__()
+
+		self._opts: List[Tuple[int, str, Any]] = []
+		self._AddOpt(socket.SOL_SOCKET, 'SO_RCVBUF', rcvBuf)
+		self._AddOpt(socket.SOL_SOCKET, 'SO_SNDBUF', sndBuf)
+		self._AddOpt(socket.IPPROTO_TCP, 'TCP_NOTSENT_LOWAT', notSentLowat)
+		self._AddOpt(
+			socket.IPPROTO_TCP,
+			'TCP_CONGESTION',
+			None if congestion is None else congestion.encode(),
+		)
+		self._AddOpt(
+			socket.SOL_SOCKET,
+			'SO_KEEPALIVE',
+			None if keepAlive is None else int(keepAlive),
+		)
+		self._AddOpt(socket.IPPROTO_TCP, 'TCP_KEEPIDLE', keepIdle)
+		self._AddOpt(socket.IPPROTO_TCP, 'TCP_KEEPINTVL', keepInterval)
+		self._AddOpt(socket.IPPROTO_TCP, 'TCP_KEEPCNT', keepCount)
+		self._AddOpt(socket.IPPROTO_TCP, 'TCP_USER_TIMEOUT', userTimeout)
+
+		self._logger = logging.getLogger(f'{__name__}.{self.__class__.__name__}')
+		# each failing option is only reported once
+		self._failedOpts: set[str] = set()
+		self._failedOptsLock = threading.Lock()
+
+	def _AddOpt(self, level: int, name: str, value: Any) -> None:
+		if value is None:
+			return
+		if not hasattr(socket, name):
+			logging.getLogger(
+				f'{__name__}.{self.__class__.__name__}'
+			).warning(f'{name} is not available on this platform')
+			return
+		self._opts.append((level, name, value))
+
+	def IsEmpty(self) -> bool:
+		return len(self._opts) == 0
+
+	def Apply(self, sock: socket.socket) -> None:
+		'''
+		Apply the options to the socket; buffer sizes only take full effect
+		if applied before the socket connects or listens.
+		An option the kernel rejects (e.g., a congestion control that is not
+		loaded) is skipped with a warning, rather than failing the socket.
+		'''
+		for level, name, value in self._opts:
+			try:
+				sock.setsockopt(level, getattr(socket, name), value)
+			except OSError as e:
+				with self._failedOptsLock:
+					isReported = name in self._failedOpts
+					self._failedOpts.add(name)
+				if not isReported:
+					self._logger.warning(f'Failed to set {name}={value}: {e}')
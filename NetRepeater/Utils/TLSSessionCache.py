@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+# -*- coding:utf-8 -*-
+###
+# Copyright (c) 2025 Haofan Zheng
+# Use of this source code is governed by an MIT-style
+# license that can be found in the LICENSE file or at
+# https://opensource.org/licenses/MIT.
+###
+
+
+import collections
+import ssl
+import threading
+import time
+
+from typing import Any, Dict, Hashable, Tuple
+
+
+class TLSSessionCache(object):
+	'''
+	The latest resumable TLS session of each server, keyed by, e.g.,
+	`(ip, port, serverHostName)`, so that new connections to it can skip
+	the full handshake.
+
+	At most `maxSize` servers are kept, least recently used first out, and
+	a session is kept for at most `lifetime` seconds, or less if the server
+	says so. Sessions can only be resumed with the `ssl.SSLContext` that
+	made them, so a cache must not be shared between contexts.
+	'''
+
+	def __init__(
+		self,
+		maxSize: int = 64,
+		lifetime: float = 3600.0,
+	) -> None:
+		super(TLSSessionCache, self).__init__()
+
+		self._maxSize = maxSize
+		self._lifetime = lifetime
+
+		self._lock = threading.Lock()
+		# key -> (session, expiry time), least recently used first
+		self._sessions: collections.OrderedDict[
+			Hashable, Tuple[ssl.SSLSession, float]
+		] = collections.OrderedDict()
+
+		self._numHandshakes = 0
+		self._numOffered = 0
+		self._numResumed = 0
+
+	def Get(self, key: Hashable) -> ssl.SSLSession | None:
+		now = time.monotonic()
+		with self._lock:
+			entry = self._sessions.get(key)
+			if entry is None:
+				return None
+			session, expiry = entry
+			if now >= expiry:
+				del self._sessions[key]
+				return None
+			self._sessions.move_to_end(key)
+			return session
+
+	def Put(self, key: Hashable, sock: ssl.SSLSocket) -> None:
+		'''
+		Keep the session of the given connection, if it can be resumed;
+		TLS 1.3 sessions can only be resumed once the server has sent a
+		ticket, which may come after the handshake.
+		'''
+		session = sock.session
+		if (session is None) or (
+			(sock.version() == 'TLSv1.3') and (not session.has_ticket)
+		):
+			return
+
+		lifetime = self._lifetime
+		if session.timeout > 0:
+			# the server's lifetime is counted from the first handshake
+			remaining = session.time + session.timeout - time.time()
+			lifetime = min(lifetime, remaining)
+		if lifetime <= 0:
+			return
+
+		expiry = time.monotonic() + lifetime
+		with self._lock:
+			self._sessions[key] = (session, expiry)
+			self._sessions.move_to_end(key)
+			while len(self._sessions) > self._maxSize:
+				self._sessions.popitem(last=False)
+
+	def RecordHandshake(self, sock: ssl.SSLSocket, isOffered: bool) -> bool:
+		'''
+		Count a completed handshake, and whether a cached session was
+		offered and resumed.
+
+		:return: True if the session was resumed.
+		'''
+		isResumed = sock.session_reused
+		with self._lock:
+			self._numHandshakes += 1
+			if isOffered:
+				self._numOffered += 1
+			if isResumed:
+				self._numResumed += 1
+		return isResumed
+
+	def GetStats(self) -> Dict[str, Any]:
+		with self._lock:
+			return {
+				'sessions': len(self._sessions),
+				'handshakes': self._numHandshakes,
+				'offered': self._numOffered,
+				'resumed': self._numResumed,
+				'hitRate': (
+					(self._numResumed / self._numHandshakes)
+					if self._numHandshakes > 0 else 0.0
+				),
+			}
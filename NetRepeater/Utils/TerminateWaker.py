@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+# -*- coding:utf-8 -*-
+###
+# Copyright (c) 2025 Haofan Zheng
+# Use of this source code is governed by an MIT-style
+# license that can be found in the LICENSE file or at
+# https://opensource.org/licenses/MIT.
+###
+
+
+import os
+import threading
+
+
+class TerminateWaker(object):
+	'''
+	A file descriptor that becomes readable, and stays readable, once `Set`
+	is called.
+	Loops waiting on a selector can register it instead of waking up every
+	poll interval to check a `threading.Event`; one waker can be shared by
+	any number of selectors.
+	'''
+
+	def __init__(self) -> None:
+		super(TerminateWaker, self).__init__()
+
+		if hasattr(os, 'eventfd'):
+			self._rfd = os.eventfd(0, os.EFD_CLOEXEC | os.EFD_NONBLOCK)
+			self._wfd = self._rfd
+		else:
+			self._rfd, self._wfd = os.pipe()
+			os.set_blocking(self._rfd, False)
+			os.set_blocking(self._wfd, False)
+
+		self._isSet = False
+		self._isClosed = False
+		self._lock = threading.Lock()
+
+	def fileno(self) -> int:
+		return self._rfd
+
+	def Set(self) -> None:
+		with self._lock:
+			if self._isSet or self._isClosed:
+				return
+			self._isSet = True
+
+			# nobody ever reads it back, so the fd stays readable
+			if self._wfd == self._rfd:
+				os.eventfd_write(self._wfd, 1)
+			else:
+				os.write(self._wfd, b'\x00')
+
+	def IsSet(self) -> bool:
+		return self._isSet
+
+	def close(self) -> None:
+		with self._lock:
+			if self._isClosed:
+				return
+			self._isClosed = True
+
+			os.close(self._rfd)
+			if self._wfd != self._rfd:
+				os.close(self._wfd)
+
+
+class TerminateWakerMixin(object):
+	'''
+	Give a server a `terminateWaker` that is set when the server terminates.
+	'''
+
+	def __init__(self, *args, **kwargs) -> None:
+		self.terminateWaker = TerminateWaker()
+
+		super(TerminateWakerMixin, self).__init__(*args, **kwargs)
+
+	def Terminate(self) -> None:
+		# wake up the handlers first, so they are not holding up the
+		# termination of the server
+		self.terminateWaker.Set()
+
+		super(TerminateWakerMixin, self).Terminate()
+
+	def server_close(self) -> None:
+		# handler threads are joined here, so nobody is using the waker anymore
+		super(TerminateWakerMixin, self).server_close()
+
+		self.terminateWaker.close()
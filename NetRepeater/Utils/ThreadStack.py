@@ -0,0 +1,46 @@
+#!/usr/bin/env python3
+# -*- coding:utf-8 -*-
+###
+# Copyright (c) 2025 Haofan Zheng
+# Use of this source code is governed by an MIT-style
+# license that can be found in the LICENSE file or at
+# https://opensource.org/licenses/MIT.
+###
+
+
+import logging
+import mmap
+import threading
+
+
+# the smallest stack size accepted by `threading.stack_size`
+MIN_THREAD_STACK_SIZE = 32768
+
+
+def SetThreadStackSize(size: int | None) -> int:
+	'''
+	Set the stack size of the threads started from now on, such as the
+	thread of each connection of the threaded servers; it has to be called
+	before the servers are started.
+
+	By default, every thread reserves the platform's default stack size
+	(8 MiB on most Linux systems), which counts against address space and
+	overcommit limits even though few pages of it are ever touched.
+	The relay loops need little stack; 256 KiB leaves room for OpenSSL.
+
+	:param size: Stack size in bytes, rounded up to a multiple of the page
+		size; None keeps the platform default.
+	:return: The stack size set, or 0 for the platform default.
+	'''
+	if size is None:
+		return 0
+
+	if size < MIN_THREAD_STACK_SIZE:
+		raise ValueError(
+			f'Thread stack size must be at least {MIN_THREAD_STACK_SIZE} bytes'
+		)
+	size = -(-size // mmap.PAGESIZE) * mmap.PAGESIZE
+
+	threading.stack_size(size)
+	logging.getLogger(__name__).info(f'Thread stack size set to {size} bytes')
+	return size
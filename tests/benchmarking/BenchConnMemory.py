@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+# -*- coding:utf-8 -*-
+###
+# Copyright (c) 2025 Haofan Zheng
+# Use of this source code is governed by an MIT-style
+# license that can be found in the LICENSE file or at
+# https://opensource.org/licenses/MIT.
+###
+
+
+'''
+Measure the resident memory of idle relayed connections, each relayed by
+a thread of its own, as the threaded servers do, including the thread,
+its relay buffer and sockets.
+
+The file descriptor limit is raised as needed, and the thread stack size
+is set as with the `threadStackSize` configuration; Linux only.
+
+Usage: python3 -m tests.benchmarking.BenchConnMemory
+	[--conns 1000 10000] [--stack-kib 256] [--buffer-size 4096]
+'''
+
+
+import argparse
+import gc
+import logging
+import mmap
+import resource
+import socket
+import threading
+import time
+
+from NetRepeater.Downstream.Relay.Copy import CopyRelay
+from NetRepeater.Utils.TerminateWaker import TerminateWaker
+from NetRepeater.Utils.ThreadStack import SetThreadStackSize
+
+
+# file descriptors per relayed connection: client, upstream, downstream and
+# server sockets
+_FDS_PER_CONN = 4
+
+
+def _GetRSS() -> int:
+	with open('/proc/self/statm', 'r') as f:
+		return int(f.read().split()[1]) * mmap.PAGESIZE
+
+
+def _RaiseFdLimit(numFds: int) -> None:
+	soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+	if (hard != resource.RLIM_INFINITY) and (hard < numFds):
+		raise RuntimeError(f'{numFds} file descriptors needed; the limit is {hard}')
+	if (soft != resource.RLIM_INFINITY) and (soft < numFds):
+		resource.setrlimit(resource.RLIMIT_NOFILE, (numFds, hard))
+
+
+def MeasureIdle(numConns: int, bufferSize: int) -> float:
+	'''
+	:return: The resident memory per idle relayed connection, in bytes.
+	'''
+	_RaiseFdLimit((numConns * _FDS_PER_CONN) + 256)
+
+	terminateEvent = threading.Event()
+	terminateWaker = TerminateWaker()
+	socks = []
+	threads = []
+
+	gc.collect()
+	rssBefore = _GetRSS()
+
+	try:
+		for _ in range(numConns):
+			client, upstream = socket.socketpair()
+			downstream, server = socket.socketpair()
+			socks += [client, upstream, downstream, server]
+
+			thread = threading.Thread(
+				target=CopyRelay,
+				kwargs={
+					'upstream': upstream,
+					'downstream': downstream,
+					'terminateEvent': terminateEvent,
+					'pollInterval': 1.0,
+					'buffer': memoryview(bytearray(bufferSize)),
+					'logger': logging.getLogger(__name__),
+					'upstreamAddr': 'bench-client',
+					'terminateWaker': terminateWaker,
+				},
+				daemon=True,
+			)
+			thread.start()
+			threads.append(thread)
+
+		# let every relay reach its idle wait
+		time.sleep(0.5)
+		gc.collect()
+		return (_GetRSS() - rssBefore) / numConns
+	finally:
+		terminateEvent.set()
+		terminateWaker.Set()
+		for thread in threads:
+			thread.join()
+		for sock in socks:
+			sock.close()
+		terminateWaker.close()
+
+
+def main() -> None:
+	parser = argparse.ArgumentParser(description=__doc__)
+	parser.add_argument('--conns', type=int, nargs='+', default=[ 1000, 10000 ])
+	parser.add_argument('--stack-kib', type=int, default=256)
+	parser.add_argument('--buffer-size', type=int, default=4096)
+	args = parser.parse_args()
+
+	SetThreadStackSize(args.stack_kib * 1024)
+
+	for numConns in args.conns:
+		rssPerConn = MeasureIdle(numConns, args.buffer_size)
+		print(
+			f'{numConns:6} connections: '
+			f'{rssPerConn / 1024:.1f} KiB RSS per idle relayed connection'
+		)
+
+
+if __name__ == '__main__':
+	main()
@@ -0,0 +1,235 @@
+#!/usr/bin/env python3
+# -*- coding:utf-8 -*-
+###
+# Copyright (c) 2025 Haofan Zheng
+# Use of this source code is governed by an MIT-style
+# license that can be found in the LICENSE file or at
+# https://opensource.org/licenses/MIT.
+###
+
+
+'''
+Measure the aggregate throughput of the copy relay with 1 to 64 concurrent
+bulk flows, each relayed by a thread of its own, as the threaded servers
+do; on the free-threaded build these threads can run on all cores.
+
+The clients and servers of the flows run in a forked child process, so
+they do not compete with the relays for the interpreter.
+
+Each given interpreter runs the benchmark in a subprocess; a free-threaded
+build runs it twice, with the GIL re-enabled (PYTHON_GIL=1) and without.
+
+Usage: python3 -m tests.benchmarking.BenchFreeThreaded
+	[--interpreters python3.13 python3.13t ...] [--flows 1 4 16 64]
+	[--size-mib N]
+'''
+
+
+import argparse
+import json
+import logging
+import os
+import socket
+import subprocess
+import sys
+import sysconfig
+import threading
+import time
+
+from typing import List
+
+from NetRepeater.Downstream.Relay.Copy import CopyRelay
+
+
+_MIB = 1024 * 1024
+_CHUNK_SIZE = 262144
+
+
+def _Feed(sock: socket.socket, totalSize: int) -> None:
+	chunk = b'\x00' * _CHUNK_SIZE
+	sent = 0
+	while sent < totalSize:
+		sock.sendall(chunk)
+		sent += len(chunk)
+	sock.shutdown(socket.SHUT_WR)
+
+
+def _Sink(sock: socket.socket) -> None:
+	buf = memoryview(bytearray(_CHUNK_SIZE))
+	while sock.recv_into(buf) > 0:
+		pass
+
+
+def _RunPeers(
+	clients: List[socket.socket],
+	servers: List[socket.socket],
+	flowSize: int,
+) -> None:
+	# in the child process; this function never returns
+	exitCode = 0
+	try:
+		threads = [
+			threading.Thread(target=_Feed, args=(client, flowSize))
+			for client in clients
+		] + [
+			threading.Thread(target=_Sink, args=(server,))
+			for server in servers
+		]
+		for thread in threads:
+			thread.start()
+		for thread in threads:
+			thread.join()
+	except BaseException:
+		exitCode = 1
+	finally:
+		os._exit(exitCode)
+
+
+def Measure(numFlows: int, totalSize: int, readSize: int) -> float:
+	'''
+	:return: The aggregate throughput, in MiB/s.
+	'''
+	flowSize = max(_CHUNK_SIZE, (totalSize // numFlows) // _CHUNK_SIZE * _CHUNK_SIZE)
+
+	# client <-> upstream   (relay)   downstream <-> server
+	clients, upstreams = zip(*(socket.socketpair() for _ in range(numFlows)))
+	downstreams, servers = zip(*(socket.socketpair() for _ in range(numFlows)))
+
+	pid = os.fork()
+	if pid == 0:
+		for sock in upstreams + downstreams:
+			sock.close()
+		_RunPeers(list(clients), list(servers), flowSize)
+	for sock in clients + servers:
+		sock.close()
+
+	def _Relay(upstream: socket.socket, downstream: socket.socket) -> None:
+		CopyRelay(
+			upstream=upstream,
+			downstream=downstream,
+			terminateEvent=threading.Event(),
+			pollInterval=0.1,
+			buffer=memoryview(bytearray(readSize)),
+			logger=logging.getLogger(__name__),
+			upstreamAddr='bench',
+		)
+		downstream.shutdown(socket.SHUT_WR)
+
+	relays = [
+		threading.Thread(target=_Relay, args=pair)
+		for pair in zip(upstreams, downstreams)
+	]
+	start = time.perf_counter()
+	for relay in relays:
+		relay.start()
+	for relay in relays:
+		relay.join()
+	_, status = os.waitpid(pid, 0)
+	elapsed = time.perf_counter() - start
+
+	for sock in upstreams + downstreams:
+		sock.close()
+	if os.waitstatus_to_exitcode(status) != 0:
+		raise RuntimeError('The flow peers failed')
+
+	return (flowSize * numFlows / _MIB) / elapsed
+
+
+def _IsFreeThreadedBuild() -> bool:
+	return bool(sysconfig.get_config_var('Py_GIL_DISABLED'))
+
+
+def _IsGILEnabled() -> bool:
+	isGILEnabled = getattr(sys, '_is_gil_enabled', None)
+	return True if isGILEnabled is None else isGILEnabled()
+
+
+def RunWorker(args: argparse.Namespace) -> None:
+	results = {
+		'interpreter': sys.executable,
+		'version': sys.version.split()[0],
+		'freeThreadedBuild': _IsFreeThreadedBuild(),
+		'gil': _IsGILEnabled(),
+		'throughput': {},
+	}
+	for numFlows in args.flows:
+		results['throughput'][numFlows] = Measure(
+			numFlows,
+			args.size_mib * _MIB,
+			args.read_size,
+		)
+	print(json.dumps(results))
+
+
+def RunComparison(args: argparse.Namespace) -> None:
+	interpreters = args.interpreters or [sys.executable]
+	workerArgs = [
+		'-m', 'tests.benchmarking.BenchFreeThreaded', '--worker',
+		'--size-mib', str(args.size_mib),
+		'--read-size', str(args.read_size),
+		'--flows', *(str(n) for n in args.flows),
+	]
+
+	rows = []
+	for interpreter in interpreters:
+		isFreeThreaded = subprocess.run(
+			[
+				interpreter, '-c',
+				'import sysconfig; '
+				'print(int(bool(sysconfig.get_config_var("Py_GIL_DISABLED"))))',
+			],
+			check=True,
+			capture_output=True,
+			text=True,
+		).stdout.strip() == '1'
+
+		for gilEnv in (('1', '0') if isFreeThreaded else (None,)):
+			env = dict(os.environ)
+			if gilEnv is not None:
+				env['PYTHON_GIL'] = gilEnv
+			proc = subprocess.run(
+				[interpreter, *workerArgs],
+				check=True,
+				capture_output=True,
+				text=True,
+				env=env,
+			)
+			rows.append(json.loads(proc.stdout.strip().splitlines()[-1]))
+
+	header = f'{"interpreter":32} {"GIL":>4}' + ''.join(
+		f' {f"{n} flows":>10}' for n in args.flows
+	)
+	print(header)
+	print('-' * len(header))
+	for row in rows:
+		name = f'{os.path.basename(row["interpreter"])} {row["version"]}'
+		print(
+			f'{name:32} {"on" if row["gil"] else "off":>4}' + ''.join(
+				f' {row["throughput"][str(n)]:>10.0f}' for n in args.flows
+			)
+		)
+	print('(aggregate throughput in MiB/s)')
+
+
+def main() -> None:
+	parser = argparse.ArgumentParser(description=__doc__)
+	parser.add_argument('--interpreters', nargs='+', default=None)
+	parser.add_argument(
+		'--flows',
+		nargs='+',
+		type=int,
+		default=[1, 2, 4, 8, 16, 32, 64],
+	)
+	parser.add_argument('--size-mib', type=int, default=1024)
+	parser.add_argument('--read-size', type=int, default=65536)
+	parser.add_argument('--worker', action='store_true', help=argparse.SUPPRESS)
+	args = parser.parse_args()
+
+	if args.worker:
+		RunWorker(args)
+	else:
+		RunComparison(args)
+
+
+if __name__ == '__main__':
+	main()
@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+# -*- coding:utf-8 -*-
+###
+# Copyright (c) 2025 Haofan Zheng
+# Use of this source code is governed by an MIT-style
+# license that can be found in the LICENSE file or at
+# https://opensource.org/licenses/MIT.
+###
+
+
+'''
+Measure the memory the copy relay allocates while relaying data.
+
+tracemalloc does not keep a running total of allocations, so the peak of
+traced memory above the baseline is reported instead; a relay that
+allocates per chunk shows at least one chunk there, while an allocation
+free steady state stays flat no matter how much data is relayed.
+
+Usage: python3 -m tests.benchmarking.BenchRelayAlloc [--size-mib N]
+'''
+
+
+import argparse
+import logging
+import selectors
+import socket
+import threading
+import tracemalloc
+
+from NetRepeater.Downstream.Relay.Copy import CopyRelay
+
+
+_MIB = 1024 * 1024
+
+
+def _LegacyRelay(
+	*,
+	upstream: socket.socket,
+	downstream: socket.socket,
+	terminateEvent: threading.Event,
+	pollInterval: float,
+	buffer: memoryview,
+	logger: logging.Logger,
+	upstreamAddr: str,
+) -> None:
+	# the recv()/sendall() loop CopyRelay used to be, for comparison
+	readSize = len(buffer)
+	with selectors.DefaultSelector() as selector:
+		selector.register(upstream, selectors.EVENT_READ)
+		selector.register(downstream, selectors.EVENT_READ)
+		while not terminateEvent.is_set():
+			for key, events in selector.select(pollInterval):
+				src = key.fileobj
+				dst = downstream if src is upstream else upstream
+				data = src.recv(readSize)
+				if not data:
+					return
+				dst.sendall(data)
+
+
+def _Feed(sock: socket.socket, totalSize: int, chunk: bytes) -> None:
+	sent = 0
+	while sent < totalSize:
+		sock.sendall(chunk)
+		sent += len(chunk)
+	sock.shutdown(socket.SHUT_WR)
+
+
+def _Sink(sock: socket.socket, buf: memoryview, result: list) -> None:
+	received = 0
+	while True:
+		n = sock.recv_into(buf)
+		if n == 0:
+			break
+		received += n
+	result.append(received)
+
+
+def Measure(relay, totalSize: int, readSize: int) -> dict:
+	client, upstream = socket.socketpair()
+	downstream, server = socket.socketpair()
+
+	chunk = b'\x00' * readSize
+	sinkBuf = memoryview(bytearray(readSize))
+	relayBuf = memoryview(bytearray(readSize))
+	received = []
+
+	feeder = threading.Thread(target=_Feed, args=(client, totalSize, chunk))
+	sink = threading.Thread(target=_Sink, args=(server, sinkBuf, received))
+
+	tracemalloc.start()
+	try:
+		feeder.start()
+		sink.start()
+
+		tracemalloc.reset_peak()
+		baseline, _ = tracemalloc.get_traced_memory()
+
+		relay(
+			upstream=upstream,
+			downstream=downstream,
+			terminateEvent=threading.Event(),
+			pollInterval=0.1,
+			buffer=relayBuf,
+			logger=logging.getLogger(__name__),
+			upstreamAddr='bench',
+		)
+		downstream.shutdown(socket.SHUT_WR)
+
+		feeder.join()
+		sink.join()
+
+		current, peak = tracemalloc.get_traced_memory()
+	finally:
+		tracemalloc.stop()
+		for sock in (client, upstream, downstream, server):
+			sock.close()
+
+	relayedMiB = received[0] / _MIB
+	return {
+		'relayedMiB': relayedMiB,
+		'peakOverBaseline': peak - baseline,
+		'peakOverBaselinePerMiB': (peak - baseline) / relayedMiB,
+		'netGrowth': current - baseline,
+	}
+
+
+def main() -> None:
+	parser = argparse.ArgumentParser(description=__doc__)
+	parser.add_argument('--size-mib', type=int, default=256)
+	parser.add_argument('--read-size', type=int, default=65536)
+	args = parser.parse_args()
+
+	totalSize = args.size_mib * _MIB
+
+	for name, relay in (
+		('recv/sendall (legacy)', _LegacyRelay),
+		('CopyRelay (recv_into)', CopyRelay),
+	):
+		res = Measure(relay, totalSize, args.read_size)
+		print(
+			f'{name:24}: '
+			f'relayed {res["relayedMiB"]:.0f} MiB, '
+			f'peak over baseline {res["peakOverBaseline"]} B '
+			f'({res["peakOverBaselinePerMiB"]:.1f} B/MiB), '
+			f'net growth {res["netGrowth"]} B'
+		)
+
+
+if __name__ == '__main__':
+	main()
@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+# -*- coding:utf-8 -*-
+###
+# Copyright (c) 2025 Haofan Zheng
+# Use of this source code is governed by an MIT-style
+# license that can be found in the LICENSE file or at
+# https://opensource.org/licenses/MIT.
+###
+
+
+import ipaddress
+import time
+import unittest
+
+import dns.rdatatype
+
+from NetRepeater.DNS.ResolutionCache import ResolutionCache
+
+
+class _FakeRData(object):
+
+	def __init__(self, address: str) -> None:
+		self.address = address
+
+
+class _FakeAnsEntry(object):
+
+	def __init__(self, rdType: int, address: str, ttl: int) -> None:
+		self.rdType = rdType
+		self.dataList = [ _FakeRData(address) ]
+		self.ttl = ttl
+
+
+class _CountingLookup(object):
+	'''A lookup of one name, counting how many times it is asked.'''
+
+	def __init__(self, ttl: int) -> None:
+		self.ttl = ttl
+		self.address = '192.0.2.1'
+		self.addressV6 = '2001:db8::1'
+		self.numLookups = 0
+
+	def HandleQuestion(self, msgEntry, senderAddr, recDepthStack):
+		self.numLookups += 1
+		if msgEntry.rdType == dns.rdatatype.AAAA:
+			return [ _FakeAnsEntry(dns.rdatatype.AAAA, self.addressV6, self.ttl) ]
+		return [ _FakeAnsEntry(dns.rdatatype.A, self.address, self.ttl) ]
+
+	def LookupIpAddr(self, domain, recDepthStack, preferIPv6=False):
+		self.numLookups += 1
+		return ipaddress.ip_address(self.address)
+
+
+class _NoTTLLookup(_CountingLookup):
+
+	HandleQuestion = None
+
+
+class TestResolutionCache(unittest.TestCase):
+
+	def setUp(self):
+		pass
+
+	def tearDown(self):
+		pass
+
+	def test_DNS_ResolutionCache_01TTL(self):
+		lookup = _CountingLookup(ttl=1)
+		cache = ResolutionCache(lookup, minTTL=0.2, refreshAhead=0.5)
+
+		for _ in range(10):
+			self.assertEqual(
+				cache.LookupIpAddr('example.com', [], preferIPv6=False),
+				ipaddress.ip_address('192.0.2.1'),
+			)
+		self.assertEqual(lookup.numLookups, 1)
+		# the IPv6 preference is looked up on its own, with AAAA only
+		self.assertEqual(
+			cache.LookupIpAddr('example.com', [], preferIPv6=True),
+			ipaddress.ip_address('2001:db8::1'),
+		)
+		self.assertEqual(lookup.numLookups, 2)
+
+		# a name in use is refreshed in the background before it expires
+		lookup.address = '192.0.2.2'
+		time.sleep(0.6)
+		self.assertEqual(
+			cache.LookupIpAddr('example.com', []),
+			ipaddress.ip_address('192.0.2.1'),
+		)
+		waitStart = time.monotonic()
+		while (
+			(cache.LookupIpAddr('example.com', []) != ipaddress.ip_address('192.0.2.2'))
+			and (time.monotonic() - waitStart < 5.0)
+		):
+			time.sleep(0.01)
+		self.assertEqual(
+			cache.LookupIpAddr('example.com', []),
+			ipaddress.ip_address('192.0.2.2'),
+		)
+		self.assertEqual(cache.GetStats()['refreshes'], 1)
+
+	def test_DNS_ResolutionCache_02FallbackTTL(self):
+		lookup = _NoTTLLookup(ttl=1)
+		cache = ResolutionCache(lookup, fallbackTTL=0.1)
+
+		cache.LookupIpAddr('example.com', [])
+		cache.LookupIpAddr('example.com', [])
+		self.assertEqual(lookup.numLookups, 1)
+
+		# expired, and looked up again
+		time.sleep(0.2)
+		cache.LookupIpAddr('example.com', [])
+		self.assertEqual(lookup.numLookups, 2)
+
+	def test_DNS_ResolutionCache_03FailedQuestion(self):
+		lookup = _CountingLookup(ttl=60)
+		cache = ResolutionCache(lookup, fallbackTTL=0.1)
+
+		origHandleQuestion = lookup.HandleQuestion
+		lookup.HandleQuestion = lambda *args, **kwargs: 1 / 0
+		cache.LookupIpAddr('example.com', [])
+		self.assertEqual(lookup.numLookups, 1)
+
+		# one failure does not stop TTLs from being looked up
+		lookup.HandleQuestion = origHandleQuestion
+		time.sleep(0.2)
+		cache.LookupIpAddr('example.com', [])
+		self.assertEqual(lookup.numLookups, 2)
+		cache.LookupIpAddr('example.com', [])
+		self.assertEqual(lookup.numLookups, 2)
@@ -0,0 +1,258 @@
+#!/usr/bin/env python3
+# -*- coding:utf-8 -*-
+###
+# Copyright (c) 2025 Haofan Zheng
+# Use of this source code is governed by an MIT-style
+# license that can be found in the LICENSE file or at
+# https://opensource.org/licenses/MIT.
+###
+
+
+import logging
+import os
+import resource
+import socket
+import threading
+import types
+import unittest
+
+from typing import Tuple
+
+from NetRepeater.Downstream.HTTP.KeepAlivePool import KeepAlivePool
+from NetRepeater.Downstream.Handler.HTTPRepeatHandler import HTTPRepeatHandler
+
+
+class _Backend:
+	'''A keep-alive HTTP backend that echoes request bodies.'''
+
+	def __init__(self):
+		self.numAccepted = 0
+		# close connections, without answering, after serving this many
+		self.dropAfter = None
+		self.listener = socket.create_server(('127.0.0.1', 0))
+		self.addr = self.listener.getsockname()
+		self.thread = threading.Thread(target=self._Accept, daemon=True)
+		self.thread.start()
+
+	def _Accept(self):
+		while True:
+			try:
+				conn, _ = self.listener.accept()
+			except OSError:
+				return
+			self.numAccepted += 1
+			threading.Thread(target=self._Serve, args=(conn,), daemon=True).start()
+
+	def _Serve(self, conn: socket.socket):
+		numServed = 0
+		with conn, conn.makefile('rb') as f:
+			while True:
+				lines = []
+				while True:
+					line = f.readline()
+					if not line:
+						return
+					if line == b'\r\n':
+						break
+					lines.append(line.decode('latin-1').lower())
+				body = b''
+				if 'transfer-encoding: chunked\r\n' in lines:
+					while True:
+						size = int(f.readline(), 16)
+						body += f.read(size)
+						f.readline()
+						if size == 0:
+							break
+				for line in lines:
+					if line.startswith('content-length:'):
+						body = f.read(int(line.split(':')[1]))
+				if (self.dropAfter is not None) and (numServed >= self.dropAfter):
+					return
+				numServed += 1
+				conn.sendall(
+					b'HTTP/1.1 200 OK\r\nTransfer-Encoding: chunked\r\n\r\n' +
+					b'%x\r\n' % (len(body) + 1) + b'>' + body + b'\r\n0\r\n\r\n'
+				)
+
+	def ConnectDownstream(self) -> socket.socket:
+		return socket.create_connection(self.addr)
+
+	def close(self):
+		self.listener.close()
+
+
+class TestHTTPRepeat(unittest.TestCase):
+
+	def setUp(self):
+		self.backend = _Backend()
+		self.handler = HTTPRepeatHandler(self.backend, clientIdleTimeout=5.0)
+
+	def tearDown(self):
+		self.handler.Terminate()
+		self.backend.close()
+
+	def _Serve(self) -> Tuple[socket.socket, threading.Thread]:
+		client, server = socket.socketpair()
+		pyHandler = types.SimpleNamespace(
+			request=server,
+			client_address=('127.0.0.1', 0),
+			server=types.SimpleNamespace(handlerLogger=logging.getLogger()),
+		)
+		thread = threading.Thread(
+			target=self.handler.HandleRequest,
+			kwargs={
+				'pyHandler': pyHandler,
+				'handlerState': None,
+				'reqState': {},
+				'terminateEvent': threading.Event(),
+			},
+			daemon=True,
+		)
+		thread.start()
+		self.addCleanup(server.close)
+		self.addCleanup(thread.join, 5.0)
+		self.addCleanup(client.close)
+		client.settimeout(5.0)
+		return client, thread
+
+	@staticmethod
+	def _RecvResponse(client: socket.socket) -> bytes:
+		resp = b''
+		while not resp.endswith(b'0\r\n\r\n'):
+			data = client.recv(4096)
+			if not data:
+				break
+			resp += data
+		return resp
+
+	def test_Downstream_HTTPRepeat_01KeepAlive(self):
+		logging.getLogger().info('')
+
+		for _ in range(2):
+			client, thread = self._Serve()
+			for _ in range(2):
+				client.sendall(b'GET / HTTP/1.1\r\nHost: example.com\r\n\r\n')
+				resp = self._RecvResponse(client)
+				self.assertTrue(resp.startswith(b'HTTP/1.1 200 OK\r\n'))
+				self.assertTrue(resp.endswith(b'1\r\n>\r\n0\r\n\r\n'))
+			client.shutdown(socket.SHUT_WR)
+			thread.join(5.0)
+			self.assertFalse(thread.is_alive())
+
+		# all four requests, from two clients, went over one connection
+		self.assertEqual(self.backend.numAccepted, 1)
+		self.assertEqual(self.handler.pool.GetStats()['hits'], 3)
+
+		self.handler.Terminate()
+		self.assertEqual(self.handler.pool.GetStats()['idle'], 0)
+
+	def test_Downstream_HTTPRepeat_02Bodies(self):
+		logging.getLogger().info('')
+
+		client, _ = self._Serve()
+		client.sendall(
+			b'POST / HTTP/1.1\r\nHost: example.com\r\nContent-Length: 5\r\n\r\nhello'
+			b'POST / HTTP/1.1\r\nHost: example.com\r\n'
+			b'Transfer-Encoding: chunked\r\n\r\n3\r\nwor\r\n2\r\nld\r\n0\r\n\r\n'
+		)
+		self.assertTrue(self._RecvResponse(client).endswith(b'6\r\n>hello\r\n0\r\n\r\n'))
+		self.assertTrue(self._RecvResponse(client).endswith(b'6\r\n>world\r\n0\r\n\r\n'))
+
+	def _AssertBadRequest(self, reqRaw: bytes):
+		client, thread = self._Serve()
+		client.sendall(reqRaw + b'0\r\n\r\n')
+		resp = b''
+		while not resp.endswith(b'\r\n\r\n'):
+			data = client.recv(4096)
+			if not data:
+				break
+			resp += data
+		self.assertTrue(resp.startswith(b'HTTP/1.1 400 Bad Request\r\n'))
+		# the handler is done with the connection
+		thread.join(5.0)
+		self.assertFalse(thread.is_alive())
+		# nothing reached the backend
+		self.assertEqual(self.backend.numAccepted, 0)
+
+	def test_Downstream_HTTPRepeat_03ChunkedNotLast(self):
+		logging.getLogger().info('')
+
+		self._AssertBadRequest(
+			b'POST / HTTP/1.1\r\nHost: example.com\r\n'
+			b'Transfer-Encoding: chunked, gzip\r\n\r\n'
+		)
+
+	def test_Downstream_HTTPRepeat_04SpaceBeforeColon(self):
+		logging.getLogger().info('')
+
+		self._AssertBadRequest(
+			b'POST / HTTP/1.1\r\nHost: example.com\r\n'
+			b'Transfer-Encoding : chunked\r\n\r\n'
+		)
+
+	def test_Downstream_HTTPRepeat_05ObsFold(self):
+		logging.getLogger().info('')
+
+		self._AssertBadRequest(
+			b'POST / HTTP/1.1\r\nHost: example.com\r\n'
+			b'Transfer-Encoding: gzip,\r\n chunked\r\n\r\n'
+		)
+
+	def test_Downstream_HTTPRepeat_06TEAndCL(self):
+		logging.getLogger().info('')
+
+		self._AssertBadRequest(
+			b'POST / HTTP/1.1\r\nHost: example.com\r\nContent-Length: 5\r\n'
+			b'Transfer-Encoding: chunked\r\n\r\n'
+		)
+
+	def test_Downstream_HTTPRepeat_07StaleRetry(self):
+		logging.getLogger().info('')
+
+		client, thread = self._Serve()
+		client.sendall(b'GET / HTTP/1.1\r\nHost: example.com\r\n\r\n')
+		self.assertTrue(self._RecvResponse(client).endswith(b'1\r\n>\r\n0\r\n\r\n'))
+
+		# the pooled connection is closed once the request is sent
+		self.backend.dropAfter = 1
+		client.sendall(
+			b'PUT / HTTP/1.1\r\nHost: example.com\r\nContent-Length: 5\r\n\r\nhello'
+		)
+		self.assertTrue(self._RecvResponse(client).endswith(b'6\r\n>hello\r\n0\r\n\r\n'))
+		self.assertEqual(self.backend.numAccepted, 2)
+
+		# which is not safe for a POST
+		client.sendall(
+			b'POST / HTTP/1.1\r\nHost: example.com\r\nContent-Length: 5\r\n\r\nhello'
+		)
+		thread.join(5.0)
+		self.assertFalse(thread.is_alive())
+		self.assertEqual(self.backend.numAccepted, 2)
+
+	def test_Downstream_HTTPRepeat_08HighFd(self):
+		logging.getLogger().info('')
+
+		# select(2) cannot watch fds above 1024
+		highFd = 1500
+		soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+		if (hard != resource.RLIM_INFINITY) and (hard <= highFd):
+			self.skipTest(f'RLIMIT_NOFILE is limited to {hard}')
+		if soft <= highFd:
+			resource.setrlimit(resource.RLIMIT_NOFILE, (highFd + 1, hard))
+			self.addCleanup(resource.setrlimit, resource.RLIMIT_NOFILE, (soft, hard))
+
+		sock, peer = socket.socketpair()
+		self.addCleanup(peer.close)
+		os.dup2(sock.fileno(), highFd)
+		sock.close()
+		sock = socket.socket(fileno=highFd)
+
+		pool = KeepAlivePool()
+		self.addCleanup(pool.close)
+		pool.Release(sock)
+		self.assertIs(pool.Acquire(), sock)
+
+		# closed by the peer
+		pool.Release(sock)
+		peer.close()
+		self.assertIsNone(pool.Acquire())
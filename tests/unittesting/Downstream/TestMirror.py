@@ -0,0 +1,48 @@
+#!/usr/bin/env python3
+# -*- coding:utf-8 -*-
+###
+# Copyright (c) 2025 Haofan Zheng
+# Use of this source code is governed by an MIT-style
+# license that can be found in the LICENSE file or at
+# https://opensource.org/licenses/MIT.
+###
+
+
+import logging
+import unittest
+
+from NetRepeater.Downstream.Handler.MirrorHandler import MirrorHandler
+from NetRepeater.Downstream.Handler.SNIRouteHandler import SNIRouteHandler
+from NetRepeater.Downstream.Handler.ShapeByRateHandler import ShapeByRateHandler
+from NetRepeater.Downstream.Handler.TCPRepeatHandler import TCPRepeatHandler
+
+
+class TestMirror(unittest.TestCase):
+
+	def setUp(self):
+		self.shadow = TCPRepeatHandler('127.0.0.1', 1)
+
+	def test_Downstream_Mirror_01Primary(self):
+		logging.getLogger().info('')
+
+		primary = TCPRepeatHandler('127.0.0.1', 1)
+		MirrorHandler(primary, self.shadow)
+		MirrorHandler(ShapeByRateHandler(primary, clientRate=65536), self.shadow)
+
+		# handlers that would not give the data to the tap
+		router = SNIRouteHandler(routes={}, defaultHandler=primary)
+		with self.assertRaises(TypeError):
+			MirrorHandler(router, self.shadow)
+		with self.assertRaises(TypeError):
+			MirrorHandler(ShapeByRateHandler(router, clientRate=65536), self.shadow)
+		with self.assertRaises(TypeError):
+			MirrorHandler(MirrorHandler(primary, self.shadow), self.shadow)
+
+	def test_Downstream_Mirror_02Terminate(self):
+		logging.getLogger().info('')
+
+		handler = MirrorHandler(TCPRepeatHandler('127.0.0.1', 1), self.shadow)
+		handler.mirrorCounters.RecordDropped(100)
+		with self.assertLogs(handler._logger, logging.INFO) as logs:
+			handler.Terminate()
+		self.assertIn(str(handler.mirrorCounters.GetStats()), logs.output[0])
@@ -0,0 +1,506 @@
+#!/usr/bin/env python3
+# -*- coding:utf-8 -*-
+###
+# Copyright (c) 2025 Haofan Zheng
+# Use of this source code is governed by an MIT-style
+# license that can be found in the LICENSE file or at
+# https://opensource.org/licenses/MIT.
+###
+
+
+import contextlib
+import logging
+import os
+import resource
+import socket
+import ssl
+import tempfile
+import threading
+import time
+import unittest
+
+from typing import Tuple
+
+from NetRepeater.Downstream.Relay.Coalesce import WriteCoalescer
+from NetRepeater.Downstream.Relay.Copy import CopyRelay
+from NetRepeater.Downstream.Relay.Mirror import MirrorCounters, MirrorTap
+from NetRepeater.Downstream.Relay.NonBlocking import NonBlockingRelay
+from NetRepeater.Downstream.Relay.ReadSizer import AdaptiveReadSizer
+from NetRepeater.Downstream.Relay.Shaper import (
+	RelayShaper,
+	SO_MAX_PACING_RATE,
+	SetMaxPacingRate,
+	ShapeCounters,
+	TokenBucket,
+)
+from NetRepeater.Downstream.Relay.ShardPool import ShardPool
+from NetRepeater.Downstream.Relay.WarmPool import IsWarmConnAlive, WarmPool
+from NetRepeater.Downstream.Relay.Splice import IsSpliceSupported, SpliceRelay
+from NetRepeater.Utils.KTLS import EnableKTLS, GetKTLSState
+from NetRepeater.Utils.TerminateWaker import TerminateWaker
+
+from ..MockCert import CreateMockCert
+
+
+class TestRelay(unittest.TestCase):
+
+	def setUp(self):
+		# client <-> upstream   (relay)   downstream <-> server
+		self.client, self.upstream = socket.socketpair()
+		self.downstream, self.server = socket.socketpair()
+		self.terminateEvent = threading.Event()
+
+	def tearDown(self):
+		self.terminateEvent.set()
+		for sock in (self.client, self.upstream, self.downstream, self.server):
+			sock.close()
+
+	def _StartRelay(self, relay, **relayKwargs) -> threading.Thread:
+		thread = threading.Thread(
+			target=relay,
+			kwargs={
+				'upstream': self.upstream,
+				'downstream': self.downstream,
+				'terminateEvent': self.terminateEvent,
+				'pollInterval': 0.1,
+				'logger': logging.getLogger(__name__),
+				'upstreamAddr': 'test-client',
+				**relayKwargs,
+			},
+		)
+		thread.start()
+		return thread
+
+	def _MoveToHighFd(self, sock: socket.socket, fd: int = 1500) -> socket.socket:
+		'''
+		Move a socket to an fd that `select(2)` cannot watch.
+		'''
+		soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+		if (hard != resource.RLIM_INFINITY) and (hard <= fd):
+			self.skipTest(f'RLIMIT_NOFILE is limited to {hard}')
+		if soft <= fd:
+			resource.setrlimit(resource.RLIMIT_NOFILE, (fd + 1, hard))
+			self.addCleanup(resource.setrlimit, resource.RLIMIT_NOFILE, (soft, hard))
+
+		os.dup2(sock.fileno(), fd)
+		sock.close()
+		return socket.socket(fileno=fd)
+
+	@staticmethod
+	def _ConnectTCP() -> Tuple[socket.socket, socket.socket]:
+		with socket.create_server(('127.0.0.1', 0)) as listener:
+			sock = socket.create_connection(listener.getsockname())
+			return sock, listener.accept()[0]
+
+	def _UseTCP(self) -> None:
+		'''Relay between loopback TCP connections, rather than socket pairs.'''
+		for sock in (self.client, self.upstream, self.downstream, self.server):
+			sock.close()
+		self.client, self.upstream = self._ConnectTCP()
+		self.downstream, self.server = self._ConnectTCP()
+
+	@staticmethod
+	def _RecvExactly(sock: socket.socket, size: int) -> bytes:
+		buf = b''
+		while len(buf) < size:
+			data = sock.recv(size - len(buf))
+			if not data:
+				break
+			buf += data
+		return buf
+
+	def _CheckRelay(self, relay, **relayKwargs) -> None:
+		thread = self._StartRelay(relay, **relayKwargs)
+
+		testData = b'Hello, World!' * 1024
+
+		# client --> server
+		self.client.sendall(testData)
+		self.assertEqual(self._RecvExactly(self.server, len(testData)), testData)
+
+		# server --> client
+		self.server.sendall(testData)
+		self.assertEqual(self._RecvExactly(self.client, len(testData)), testData)
+
+		# closing the client should end the relay
+		self.client.shutdown(socket.SHUT_WR)
+		thread.join(timeout=5.0)
+		self.assertFalse(thread.is_alive())
+
+	def test_Downstream_Relay_01Copy(self):
+		logging.getLogger().info('')
+		self._CheckRelay(CopyRelay, buffer=memoryview(bytearray(4096)))
+
+	def test_Downstream_Relay_02Splice(self):
+		logging.getLogger().info('')
+		if not IsSpliceSupported(self.upstream, self.downstream):
+			self.skipTest('splice(2) is not supported on this platform')
+		self._CheckRelay(SpliceRelay, readSize=4096)
+
+	def test_Downstream_Relay_03TerminateWaker(self):
+		logging.getLogger().info('')
+
+		with contextlib.closing(TerminateWaker()) as waker:
+			thread = self._StartRelay(
+				CopyRelay,
+				buffer=memoryview(bytearray(4096)),
+				# long enough that only the waker can end the relay in time
+				pollInterval=60.0,
+				terminateWaker=waker,
+			)
+
+			waker.Set()
+			thread.join(timeout=5.0)
+			self.assertFalse(thread.is_alive())
+
+	def test_Downstream_Relay_04AdaptiveRead(self):
+		logging.getLogger().info('')
+
+		sizer = AdaptiveReadSizer(minSize=4096, maxSize=16384)
+		sizer.Update(4096)
+		self.assertEqual(sizer.GetSize(), 8192)
+		sizer.Update(8192)
+		sizer.Update(16384)
+		self.assertEqual(sizer.GetSize(), 16384)
+		sizer.Update(1)
+		self.assertEqual(sizer.GetSize(), 8192)
+
+		self._CheckRelay(
+			CopyRelay,
+			buffer=memoryview(bytearray(65536)),
+			readSizers=(
+				AdaptiveReadSizer(4096, 65536),
+				AdaptiveReadSizer(4096, 65536),
+			),
+			drainBudget=1048576,
+		)
+
+	def test_Downstream_Relay_05NonBlocking(self):
+		logging.getLogger().info('')
+		self._CheckRelay(NonBlockingRelay, bufSize=4096)
+
+	def test_Downstream_Relay_06Backpressure(self):
+		logging.getLogger().info('')
+
+		thread = self._StartRelay(
+			NonBlockingRelay,
+			bufSize=4096,
+			highWatermark=4096,
+			lowWatermark=1024,
+		)
+
+		# the server does not read, so client --> server gets backlogged
+		bulkData = b'\x5a' * (4 * 1024 * 1024)
+		sender = threading.Thread(target=self.client.sendall, args=(bulkData,))
+		sender.start()
+
+		# server --> client must still flow
+		testData = b'Hello, World!'
+		self.server.sendall(testData)
+		self.assertEqual(self._RecvExactly(self.client, len(testData)), testData)
+
+		# once the server reads, the backlog drains
+		self.assertEqual(self._RecvExactly(self.server, len(bulkData)), bulkData)
+		sender.join(timeout=5.0)
+		self.assertFalse(sender.is_alive())
+
+		self.client.shutdown(socket.SHUT_WR)
+		thread.join(timeout=5.0)
+		self.assertFalse(thread.is_alive())
+
+	def test_Downstream_Relay_07Coalesce(self):
+		logging.getLogger().info('')
+		if not hasattr(socket, 'TCP_CORK'):
+			self.skipTest('TCP_CORK is not supported on this platform')
+		# socket pairs cannot be corked
+		self._UseTCP()
+
+		# small writes are held back until flushed
+		coalescer = WriteCoalescer(self.downstream, 16384, 5.0)
+		coalescer.Send(memoryview(b'x' * 100))
+		self.assertEqual(
+			self.downstream.getsockopt(socket.IPPROTO_TCP, socket.TCP_CORK),
+			1,
+		)
+		self.assertIsNotNone(coalescer.GetTimeout(time.monotonic()))
+		coalescer.Flush()
+		self.assertEqual(
+			self.downstream.getsockopt(socket.IPPROTO_TCP, socket.TCP_CORK),
+			0,
+		)
+		self.assertEqual(self._RecvExactly(self.server, 100), b'x' * 100)
+
+		coalescers = (
+			WriteCoalescer(self.downstream, 16384, 0.005),
+			WriteCoalescer(self.upstream, 16384, 0.005),
+		)
+		self._CheckRelay(
+			CopyRelay,
+			buffer=memoryview(bytearray(4096)),
+			drainBudget=65536,
+			coalescers=coalescers,
+		)
+		# corking did not turn itself off
+		for coalescer in coalescers:
+			self.assertTrue(coalescer._isCorkSupported)
+
+	def test_Downstream_Relay_08Mirror(self):
+		logging.getLogger().info('')
+
+		shadow, shadowServer = socket.socketpair()
+		self.addCleanup(shadowServer.close)
+		counters = MirrorCounters()
+		tap = MirrorTap(
+			connect=lambda: shadow,
+			maxQueueSize=1 << 20,
+			counters=counters,
+			logger=logging.getLogger(__name__),
+		)
+
+		self._CheckRelay(
+			NonBlockingRelay,
+			bufSize=65536,
+			upstreamTap=tap,
+		)
+		tap.close()
+
+		# only the data sent by the client is mirrored
+		testData = b'Hello, World!' * 1024
+		self.assertEqual(self._RecvExactly(shadowServer, len(testData) + 1), testData)
+		self.assertEqual(counters.GetStats()['bytesMirrored'], len(testData))
+		self.assertEqual(counters.GetStats()['bytesDropped'], 0)
+
+	def test_Downstream_Relay_09MirrorDrop(self):
+		logging.getLogger().info('')
+
+		# a shadow that never reads
+		shadow, shadowServer = socket.socketpair()
+		self.addCleanup(shadowServer.close)
+		counters = MirrorCounters()
+		tap = MirrorTap(
+			connect=lambda: shadow,
+			maxQueueSize=65536,
+			counters=counters,
+			logger=logging.getLogger(__name__),
+			closeTimeout=0.1,
+		)
+		chunk = memoryview(b'x' * 16384)
+		for _ in range(1024):
+			tap(chunk)
+		tap.close()
+		stats = counters.GetStats()
+		self.assertGreater(stats['chunksDropped'], 0)
+		self.assertEqual(stats['connections'], 1)
+
+		# a shadow that is down
+		def _Connect() -> socket.socket:
+			raise ConnectionRefusedError()
+
+		counters = MirrorCounters()
+		tap = MirrorTap(
+			connect=_Connect,
+			maxQueueSize=65536,
+			counters=counters,
+			logger=logging.getLogger(__name__),
+		)
+		tap._thread.join(5.0)
+		tap(chunk)
+		tap.close()
+		stats = counters.GetStats()
+		self.assertEqual(stats['failedConnections'], 1)
+		self.assertEqual(stats['bytesDropped'], len(chunk))
+
+	def test_Downstream_Relay_10Shape(self):
+		logging.getLogger().info('')
+
+		# 13KiB each way through buckets of 64KiB/s holding 4KiB at most
+		rate = 65536
+		counters = ShapeCounters()
+		shaper = RelayShaper(
+			toDown=[TokenBucket(rate, 4096)],
+			toUp=[TokenBucket(rate, 4096)],
+			pacingRate=rate,
+			terminateEvent=self.terminateEvent,
+			counters=counters,
+		)
+		# socket pairs cannot be paced by the kernel
+		self.assertFalse(shaper.Pace(self.upstream, self.downstream))
+
+		start = time.monotonic()
+		self._CheckRelay(
+			CopyRelay,
+			buffer=memoryview(bytearray(4096)),
+			throttles=shaper.GetThrottles(),
+		)
+		self.assertGreater(time.monotonic() - start, 0.25)
+		stats = counters.GetStats()
+		self.assertEqual(stats['connections'], 1)
+		self.assertEqual(stats['pacedConnections'], 0)
+		self.assertGreater(stats['delays'], 0)
+
+		# the bucket holds the sender to its rate once the burst is spent
+		bucket = TokenBucket(rate, 4096)
+		now = time.monotonic() + 1.0
+		self.assertEqual(bucket.Take(4096, now=now), 0.0)
+		self.assertAlmostEqual(bucket.Take(rate, now=now), 1.0)
+		self.assertEqual(bucket.Take(0, now=now + 1.0), 0.0)
+		self.assertFalse(bucket.IsFull(now=now + 1.0))
+		self.assertTrue(bucket.IsFull(now=now + 1.1))
+
+		# TCP sockets are paced by the kernel
+		with socket.create_server(('127.0.0.1', 0)) as server, \
+			socket.create_connection(server.getsockname()) as sock:
+			if not SetMaxPacingRate(sock, rate):
+				self.skipTest('SO_MAX_PACING_RATE is not supported')
+			self.assertEqual(
+				sock.getsockopt(socket.SOL_SOCKET, SO_MAX_PACING_RATE),
+				rate,
+			)
+
+	def test_Downstream_Relay_11WarmPool(self):
+		logging.getLogger().info('')
+
+		with socket.create_server(('127.0.0.1', 0)) as server:
+			server.settimeout(5.0)
+			pool = WarmPool(
+				connect=lambda: socket.create_connection(server.getsockname()),
+				logger=logging.getLogger(__name__),
+				size=2,
+			)
+			self.addCleanup(pool.close)
+
+			# the backlog holds the connections made by the pool
+			peers = [server.accept()[0] for _ in range(2)]
+			for peer in peers:
+				self.addCleanup(peer.close)
+			waitStart = time.monotonic()
+			while (
+				(pool.GetStats()['idle'] < 2) and
+				(time.monotonic() - waitStart < 5.0)
+			):
+				time.sleep(0.01)
+			self.assertEqual(pool.GetStats()['idle'], 2)
+
+			# the oldest connection is closed by the backend, and skipped
+			peers[0].close()
+			time.sleep(0.1)
+			with pool.Acquire() as sock:
+				sock.sendall(b'ping')
+				self.assertEqual(self._RecvExactly(peers[1], 4), b'ping')
+			stats = pool.GetStats()
+			self.assertEqual(stats['hits'], 1)
+			self.assertEqual(stats['expired'], 1)
+
+			# the pool is refilled in the background
+			peers += [server.accept()[0] for _ in range(2)]
+			for peer in peers[2:]:
+				self.addCleanup(peer.close)
+
+	def test_Downstream_Relay_12ShardPool(self):
+		logging.getLogger().info('')
+
+		pool = ShardPool(numShards=2, bufSize=4096, logger=logging.getLogger(__name__))
+		pool.Start()
+		pool.AddPair(self.upstream, self.downstream, 'test-client')
+
+		testData = b'Hello, World!' * 1024
+		self.client.sendall(testData)
+		self.assertEqual(self._RecvExactly(self.server, len(testData)), testData)
+
+		# the shards close the pairs they own
+		pool.Terminate()
+		self.assertEqual(self.upstream.fileno(), -1)
+		self.assertEqual(self.downstream.fileno(), -1)
+
+		# pairs handed over after the termination are closed right away
+		lateUp, lateDown = socket.socketpair()
+		pool.AddPair(lateUp, lateDown, 'late-client')
+		self.assertEqual(lateUp.fileno(), -1)
+		self.assertEqual(lateDown.fileno(), -1)
+
+		# so are those of a pool that never started
+		pool = ShardPool(numShards=1, bufSize=4096, logger=logging.getLogger(__name__))
+		lateUp, lateDown = socket.socketpair()
+		pool.AddPair(lateUp, lateDown, 'late-client')
+		pool.Terminate()
+		self.assertEqual(lateUp.fileno(), -1)
+		self.assertEqual(lateDown.fileno(), -1)
+
+	def test_Downstream_Relay_13WarmConnHighFd(self):
+		logging.getLogger().info('')
+
+		with tempfile.TemporaryDirectory() as tmpDir:
+			certPath, keyPath = CreateMockCert(tmpDir)
+			serverCtx = ssl.create_default_context(ssl.Purpose.CLIENT_AUTH)
+			serverCtx.load_cert_chain(certPath, keyPath)
+			clientCtx = ssl.create_default_context(cafile=certPath)
+
+		with socket.create_server(('127.0.0.1', 0)) as server:
+			server.settimeout(5.0)
+
+			# a plain connection
+			sock = self._MoveToHighFd(socket.create_connection(server.getsockname()))
+			peer = server.accept()[0]
+			self.assertTrue(IsWarmConnAlive(sock))
+			peer.close()
+			time.sleep(0.1)
+			self.assertFalse(IsWarmConnAlive(sock))
+			sock.close()
+
+			# a TLS connection, whose session tickets are not data
+			sock = self._MoveToHighFd(socket.create_connection(server.getsockname()))
+			peers = [server.accept()[0]]
+			thread = threading.Thread(
+				target=lambda: peers.append(
+					serverCtx.wrap_socket(peers[0], server_side=True)
+				),
+			)
+			thread.start()
+			with clientCtx.wrap_socket(sock, server_hostname='localhost') as sock:
+				thread.join(5.0)
+				peer = peers[-1]
+				time.sleep(0.1)
+				self.assertTrue(IsWarmConnAlive(sock))
+				peer.close()
+				time.sleep(0.1)
+				self.assertFalse(IsWarmConnAlive(sock))
+
+	def test_Downstream_Relay_14SpliceKTLS(self):
+		logging.getLogger().info('')
+
+		with tempfile.TemporaryDirectory() as tmpDir:
+			certPath, keyPath = CreateMockCert(tmpDir)
+			serverCtx = ssl.create_default_context(ssl.Purpose.CLIENT_AUTH)
+			serverCtx.load_cert_chain(certPath, keyPath)
+			clientCtx = ssl.create_default_context(cafile=certPath)
+		for ctx in (serverCtx, clientCtx):
+			ctx.minimum_version = ssl.TLSVersion.TLSv1_3
+			if not EnableKTLS(ctx):
+				self.skipTest('kTLS is not supported on this platform')
+
+		# the relay connects to a TLS 1.3 backend over kTLS
+		with socket.create_server(('127.0.0.1', 0)) as listener:
+			listener.settimeout(5.0)
+			sock = socket.create_connection(listener.getsockname())
+			peers = [listener.accept()[0]]
+			thread = threading.Thread(
+				target=lambda: peers.append(
+					serverCtx.wrap_socket(peers[0], server_side=True)
+				),
+			)
+			thread.start()
+			tlsSock = clientCtx.wrap_socket(sock, server_hostname='localhost')
+			thread.join(5.0)
+		backend = peers[-1]
+		self.addCleanup(backend.close)
+		self.downstream.close()
+		self.downstream = tlsSock
+		if GetKTLSState(self.downstream) != (True, True):
+			self.skipTest('the kernel did not take over the TLS connection')
+		self.assertTrue(IsSpliceSupported(self.upstream, self.downstream))
+
+		# the session tickets the backend sent after the handshake are
+		# records without data, which cannot be spliced
+		self.server.close()
+		self.server = backend
+		self._CheckRelay(SpliceRelay, readSize=4096)
@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+# -*- coding:utf-8 -*-
+###
+# Copyright (c) 2025 Haofan Zheng
+# Use of this source code is governed by an MIT-style
+# license that can be found in the LICENSE file or at
+# https://opensource.org/licenses/MIT.
+###
+
+
+import logging
+import socket
+import ssl
+import threading
+import time
+import unittest
+
+from NetRepeater.Downstream.Handler.SNIRouteHandler import SNIRouteHandler
+from NetRepeater.Utils.SNI import ClientHelloError, PeekClientHelloSNI
+
+
+def _GenClientHello(serverHostName: str | None) -> bytes:
+	'''Get the first flight of a TLS client, without any network.'''
+	ctx = ssl.create_default_context()
+	ctx.check_hostname = False
+	ctx.verify_mode = ssl.CERT_NONE
+
+	inBio = ssl.MemoryBIO()
+	outBio = ssl.MemoryBIO()
+	sslObj = ctx.wrap_bio(inBio, outBio, server_hostname=serverHostName)
+	try:
+		sslObj.do_handshake()
+	except ssl.SSLWantReadError:
+		pass
+	return outBio.read()
+
+
+class TestSNIRoute(unittest.TestCase):
+
+	def setUp(self):
+		self.client, self.server = socket.socketpair()
+		self.server.settimeout(5.0)
+
+	def tearDown(self):
+		self.client.close()
+		self.server.close()
+
+	def test_Downstream_SNIRoute_01Peek(self):
+		logging.getLogger().info('')
+
+		hello = _GenClientHello('Example.COM')
+		self.client.sendall(hello)
+
+		self.assertEqual(PeekClientHelloSNI(self.server), 'example.com')
+		# the ClientHello is left in the socket
+		self.assertEqual(self.server.recv(len(hello), socket.MSG_WAITALL), hello)
+
+	def test_Downstream_SNIRoute_02NoSNI(self):
+		logging.getLogger().info('')
+
+		self.client.sendall(_GenClientHello(None))
+		self.assertIsNone(PeekClientHelloSNI(self.server))
+
+	def test_Downstream_SNIRoute_03NotTLS(self):
+		logging.getLogger().info('')
+
+		self.client.sendall(b'GET / HTTP/1.1\r\nHost: example.com\r\n\r\n')
+		with self.assertRaises(ClientHelloError):
+			PeekClientHelloSNI(self.server)
+
+	def test_Downstream_SNIRoute_04Fragmented(self):
+		logging.getLogger().info('')
+
+		hello = _GenClientHello('example.com')
+		# the record header and part of the ClientHello come first
+		self.client.sendall(hello[:20])
+		timer = threading.Timer(0.2, self.client.sendall, args=(hello[20:],))
+		timer.start()
+		try:
+			self.assertEqual(PeekClientHelloSNI(self.server), 'example.com')
+		finally:
+			timer.join()
+		self.assertEqual(self.server.recv(len(hello), socket.MSG_WAITALL), hello)
+
+		# the rest never comes
+		self.client.sendall(hello[:20])
+		self.server.settimeout(0.2)
+		start = time.monotonic()
+		with self.assertRaises(TimeoutError):
+			PeekClientHelloSNI(self.server)
+		self.assertGreaterEqual(time.monotonic() - start, 0.2)
+
+		# a TCP peer closing within the ClientHello is given up on at once
+		with socket.create_server(('127.0.0.1', 0)) as listener, \
+			socket.create_connection(listener.getsockname()) as client, \
+			listener.accept()[0] as server:
+
+			client.sendall(hello[:20])
+			timer = threading.Timer(0.1, client.shutdown, args=(socket.SHUT_WR,))
+			timer.start()
+			server.settimeout(5.0)
+			start = time.monotonic()
+			try:
+				with self.assertRaises(ClientHelloError):
+					PeekClientHelloSNI(server)
+			finally:
+				timer.join()
+			self.assertLess(time.monotonic() - start, 1.0)
+
+	def test_Downstream_SNIRoute_05FindHandler(self):
+		logging.getLogger().info('')
+
+		exact = object()
+		wildcard = object()
+		longerWildcard = object()
+		default = object()
+		router = SNIRouteHandler(
+			routes={
+				'Example.com': exact,
+				'*.example.com': wildcard,
+				'*.api.example.com': longerWildcard,
+			},
+			defaultHandler=default,
+		)
+
+		self.assertIs(router.FindHandler('example.com'), exact)
+		self.assertIs(router.FindHandler('www.example.com'), wildcard)
+		self.assertIs(router.FindHandler('v1.api.example.com'), longerWildcard)
+		self.assertIs(router.FindHandler('example.org'), default)
+		self.assertIs(router.FindHandler('badexample.com'), default)
+		self.assertIs(router.FindHandler(None), default)
@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+# -*- coding:utf-8 -*-
+###
+# Copyright (c) 2025 Haofan Zheng
+# Use of this source code is governed by an MIT-style
+# license that can be found in the LICENSE file or at
+# https://opensource.org/licenses/MIT.
+###
+
+
+import logging
+import socket
+import threading
+import time
+import types
+import unittest
+
+from NetRepeater.Downstream.Handler.ShapeByRateHandler import ShapeByRateHandler
+from NetRepeater.Downstream.Handler.StreamRepeatHandlerBase import RELAY_SHAPER_KEY
+from NetRepeater.Downstream.Relay.Shaper import RelayShaper, SO_MAX_PACING_RATE
+
+
+class _ShaperRecorder:
+	'''A downstream handler keeping the shapers it was given.'''
+
+	def __init__(self):
+		self.shapers = []
+
+	def HandleRequest(self, *, pyHandler, handlerState, reqState, terminateEvent):
+		self.shapers.append(reqState[RELAY_SHAPER_KEY])
+
+
+class TestShapeByRate(unittest.TestCase):
+
+	def setUp(self):
+		self.recorder = _ShaperRecorder()
+		self.terminateEvent = threading.Event()
+
+	def _Handle(self, handler: ShapeByRateHandler, ip: str) -> RelayShaper:
+		handler.HandleRequest(
+			pyHandler=types.SimpleNamespace(client_address=(ip, 12345)),
+			handlerState=None,
+			reqState={},
+			terminateEvent=self.terminateEvent,
+		)
+		return self.recorder.shapers[-1]
+
+	def test_Downstream_ShapeByRate_01SharedBuckets(self):
+		logging.getLogger().info('')
+
+		handler = ShapeByRateHandler(
+			self.recorder,
+			clientRate=65536,
+			aggregateRate=1048576,
+		)
+		first = self._Handle(handler, '10.0.0.1')
+		second = self._Handle(handler, '10.0.0.1')
+		other = self._Handle(handler, '10.0.0.2')
+		self.assertEqual(handler.GetNumClients(), 2)
+
+		# [client bucket, aggregate bucket] in each direction
+		self.assertIs(first._toDown[0], second._toDown[0])
+		self.assertIs(first._toUp[0], second._toUp[0])
+		self.assertIsNot(first._toDown[0], other._toDown[0])
+		self.assertIs(first._toDown[1], other._toDown[1])
+		self.assertIs(first._toUp[1], other._toUp[1])
+		# the directions do not share a bucket
+		self.assertIsNot(first._toDown[0], first._toUp[0])
+		self.assertIsNot(first._toDown[1], first._toUp[1])
+
+		# what one connection takes, the next one of the client has to wait for
+		now = time.monotonic()
+		self.assertAlmostEqual(first._toDown[0].Take(65536 * 2, now), 1.0)
+		self.assertAlmostEqual(second._toDown[0].Take(0, now), 1.0)
+		self.assertEqual(other._toDown[0].Take(0, now), 0.0)
+
+	def test_Downstream_ShapeByRate_02Sweep(self):
+		logging.getLogger().info('')
+
+		handler = ShapeByRateHandler(self.recorder, clientRate=65536)
+		indebted = self._Handle(handler, '10.0.0.1')
+		self._Handle(handler, '10.0.0.2')
+		now = time.monotonic()
+		indebted._toUp[0].Take(65536 * 2, now)
+
+		with handler._clientsLock:
+			handler._SweepLockHeld(now)
+		# the client in debt keeps its bucket, so it cannot reconnect its
+		# way out of it
+		self.assertEqual(handler.GetNumClients(), 1)
+		self.assertIs(self._Handle(handler, '10.0.0.1')._toUp[0], indebted._toUp[0])
+
+		# the bucket is full again after its debt and burst are paid back
+		with handler._clientsLock:
+			handler._SweepLockHeld(now + 1.0)
+		self.assertEqual(handler.GetNumClients(), 1)
+		with handler._clientsLock:
+			handler._SweepLockHeld(now + 3.0)
+		self.assertEqual(handler.GetNumClients(), 0)
+
+		# clients with connections keep their buckets
+		sweepStart = time.monotonic()
+		handler._AcquireClient('10.0.0.3')
+		with handler._clientsLock:
+			handler._SweepLockHeld(sweepStart + 60.0)
+		self.assertEqual(handler.GetNumClients(), 1)
+
+	def test_Downstream_ShapeByRate_03PacingRate(self):
+		logging.getLogger().info('')
+
+		clientRate = 65536
+		aggregateRate = 1048576
+		with socket.create_server(('127.0.0.1', 0)) as server, \
+			socket.create_connection(server.getsockname()) as upstream, \
+			server.accept()[0] as downstream:
+
+			for kwargs, rate in (
+				({'clientRate': clientRate, 'aggregateRate': aggregateRate}, clientRate),
+				({'clientRate': aggregateRate, 'aggregateRate': clientRate}, clientRate),
+				({'aggregateRate': aggregateRate}, aggregateRate),
+			):
+				handler = ShapeByRateHandler(self.recorder, **kwargs)
+				shaper = self._Handle(handler, '10.0.0.1')
+				if not shaper.Pace(upstream, downstream):
+					self.skipTest('SO_MAX_PACING_RATE is not supported')
+				for sock in (upstream, downstream):
+					self.assertEqual(
+						sock.getsockopt(socket.SOL_SOCKET, SO_MAX_PACING_RATE),
+						rate,
+					)
+				self.assertEqual(handler.shapeCounters.GetStats()['pacedConnections'], 1)
+
+			# without kernel pacing, the sockets are left alone
+			handler = ShapeByRateHandler(
+				self.recorder,
+				clientRate=clientRate,
+				kernelPacing=False,
+			)
+			self.assertFalse(self._Handle(handler, '10.0.0.1').Pace(upstream, downstream))
+			self.assertEqual(handler.shapeCounters.GetStats()['pacedConnections'], 0)
@@ -0,0 +1,276 @@
+#!/usr/bin/env python3
+# -*- coding:utf-8 -*-
+###
+# Copyright (c) 2025 Haofan Zheng
+# Use of this source code is governed by an MIT-style
+# license that can be found in the LICENSE file or at
+# https://opensource.org/licenses/MIT.
+###
+
+
+import logging
+import os
+import socket
+import threading
+import time
+import types
+import unittest
+
+from NetRepeater.Downstream.Handler.TunnelClientHandler import TunnelClientHandler
+from NetRepeater.Downstream.Tunnel.Session import TunnelSession, TunnelStream
+from NetRepeater.Inbound.Server.Tunnel import _TunnelEndpoint
+
+
+_WINDOW_SIZE = 65536
+
+
+class _SlowConnector:
+	'''Carriers to nowhere; the first one takes until `release` is set.'''
+
+	def __init__(self):
+		self.release = threading.Event()
+		self.numConnects = 0
+		self.peers = []
+
+	def ConnectDownstream(self) -> socket.socket:
+		self.numConnects += 1
+		if self.numConnects == 1:
+			self.release.wait(5.0)
+		carrier, peer = socket.socketpair()
+		self.peers.append(peer)
+		return carrier
+
+
+class _RefusingConnector:
+	'''A backend that is down.'''
+
+	def ConnectDownstream(self) -> socket.socket:
+		raise ConnectionRefusedError('Connection refused')
+
+
+class TestTunnel(unittest.TestCase):
+
+	def setUp(self):
+		self.terminateEvent = threading.Event()
+		self.logger = logging.getLogger()
+		# the local end of each stream, on the server side
+		self.serverLocals = []
+
+		clientCarrier, serverCarrier = socket.socketpair()
+		self.client = TunnelSession(
+			clientCarrier,
+			logger=self.logger,
+			windowSize=_WINDOW_SIZE,
+			frameSize=4096,
+		)
+		self.server = TunnelSession(
+			serverCarrier,
+			logger=self.logger,
+			windowSize=_WINDOW_SIZE,
+			frameSize=4096,
+			onOpen=self._OnOpen,
+		)
+		self.threads = [
+			self._Start(session.Run, pollInterval=0.1)
+			for session in (self.client, self.server)
+		]
+
+	def tearDown(self):
+		self.terminateEvent.set()
+		for thread in self.threads:
+			thread.join(5.0)
+		for sock in self.serverLocals:
+			sock.close()
+
+	def _Start(self, target, **kwargs) -> threading.Thread:
+		thread = threading.Thread(
+			target=target,
+			kwargs={'terminateEvent': self.terminateEvent, **kwargs},
+			daemon=True,
+		)
+		thread.start()
+		return thread
+
+	def _Pump(self, stream: TunnelStream, local: socket.socket) -> None:
+		self.threads.append(self._Start(
+			stream.Pump,
+			local=local,
+			pollInterval=0.1,
+			logger=self.logger,
+		))
+
+	def _OnOpen(self, stream: TunnelStream, info: str) -> None:
+		local, peer = socket.socketpair()
+		peer.settimeout(5.0)
+		self.serverLocals.append(peer)
+		self._Pump(stream, local)
+
+	def _OpenStream(self) -> socket.socket:
+		local, peer = socket.socketpair()
+		peer.settimeout(5.0)
+		self.addCleanup(peer.close)
+		self._Pump(self.client.OpenStream('test'), local)
+		return peer
+
+	def test_Downstream_Tunnel_01Streams(self):
+		logging.getLogger().info('')
+
+		clients = [self._OpenStream() for _ in range(4)]
+		# several windows worth of data
+		data = [os.urandom(5 * _WINDOW_SIZE) for _ in clients]
+
+		def _Send(client: socket.socket, payload: bytes) -> None:
+			client.sendall(payload)
+			client.shutdown(socket.SHUT_WR)
+
+		for client, payload in zip(clients, data):
+			threading.Thread(target=_Send, args=(client, payload), daemon=True).start()
+		# the server side opens its local sockets in the order of the streams
+		for i, payload in enumerate(data):
+			while len(self.serverLocals) <= i:
+				threading.Event().wait(0.01)
+			server = self.serverLocals[i]
+			received = b''
+			while True:
+				chunk = server.recv(65536)
+				if not chunk:
+					break
+				received += chunk
+			self.assertEqual(received, payload)
+
+			# the other direction, after the first one was closed
+			server.sendall(payload[:1000])
+			server.close()
+			self.assertEqual(clients[i].recv(2000, socket.MSG_WAITALL), payload[:1000])
+			self.assertEqual(clients[i].recv(1), b'')
+
+	def test_Downstream_Tunnel_02FlowControl(self):
+		logging.getLogger().info('')
+
+		stalled = self._OpenStream()
+		# nobody reads the server side of this stream
+		stalled.setblocking(False)
+		numSent = 0
+		try:
+			for _ in range(1000):
+				numSent += stalled.send(b'x' * 65536)
+		except BlockingIOError:
+			pass
+		# the window, and the buffers of the local sockets, stop the sender
+		self.assertLess(numSent, 64 * _WINDOW_SIZE)
+
+		# other streams still flow
+		client = self._OpenStream()
+		client.sendall(b'hello')
+		while len(self.serverLocals) < 2:
+			threading.Event().wait(0.01)
+		self.assertEqual(self.serverLocals[1].recv(5, socket.MSG_WAITALL), b'hello')
+
+	def test_Downstream_Tunnel_03Reset(self):
+		logging.getLogger().info('')
+
+		client = self._OpenStream()
+		client.sendall(b'hello')
+		while not self.serverLocals:
+			threading.Event().wait(0.01)
+		self.serverLocals[0].recv(5, socket.MSG_WAITALL)
+
+		# losing the carrier aborts the streams
+		self.server.close()
+		self.assertEqual(client.recv(1), b'')
+		self.assertTrue(self.client.IsClosed() or self.client.GetNumStreams() == 0)
+
+	def test_Downstream_Tunnel_04ClientConnect(self):
+		logging.getLogger().info('')
+
+		connector = _SlowConnector()
+		handler = TunnelClientHandler(connector, numConnections=2)
+		self.addCleanup(handler.Terminate)
+		self.addCleanup(connector.release.set)
+		self.addCleanup(lambda: [ peer.close() for peer in connector.peers ])
+
+		sessions = []
+		slow = threading.Thread(target=lambda: sessions.append(handler.GetSession()))
+		slow.start()
+		while connector.numConnects < 1:
+			threading.Event().wait(0.01)
+
+		# a slow carrier does not hold up the others
+		fast = handler.GetSession()
+		self.assertEqual(connector.numConnects, 2)
+		self.assertTrue(slow.is_alive())
+
+		connector.release.set()
+		slow.join(5.0)
+		self.assertIsNot(sessions[0], fast)
+		# both slots are taken
+		self.assertIn(handler.GetSession(), (sessions[0], fast))
+		self.assertEqual(connector.numConnects, 2)
+
+		handler.Terminate()
+		self.assertTrue(fast.IsClosed())
+		self.assertTrue(sessions[0].IsClosed())
+		with self.assertRaises(ConnectionError):
+			handler.GetSession()
+
+	def test_Downstream_Tunnel_05RefusedStream(self):
+		logging.getLogger().info('')
+		if not os.path.isdir('/proc/self/fd'):
+			self.skipTest('/proc/self/fd is not available')
+
+		endpoint = _TunnelEndpoint(
+			_RefusingConnector(),
+			windowSize=_WINDOW_SIZE,
+			frameSize=4096,
+			maxStreams=16,
+			readSize=4096,
+			pollInterval=0.1,
+		)
+		clientCarrier, serverCarrier = socket.socketpair()
+		client = TunnelSession(
+			clientCarrier,
+			logger=self.logger,
+			windowSize=_WINDOW_SIZE,
+			frameSize=4096,
+		)
+		self.addCleanup(client.close)
+		self.threads.append(self._Start(client.Run, pollInterval=0.1))
+		self.threads.append(self._Start(
+			endpoint.HandleRequest,
+			pyHandler=types.SimpleNamespace(
+				request=serverCarrier,
+				client_address=('127.0.0.1', 0),
+				server=types.SimpleNamespace(handlerLogger=self.logger),
+			),
+			handlerState=None,
+			reqState={},
+		))
+
+		numFds = None
+		for i in range(8):
+			if i == 1:
+				# once the sessions are up and running
+				time.sleep(0.1)
+				numFds = len(os.listdir('/proc/self/fd'))
+			local, peer = socket.socketpair()
+			with peer:
+				stream = client.OpenStream('test')
+				pump = self._Start(
+					stream.Pump,
+					local=local,
+					pollInterval=0.1,
+					logger=self.logger,
+				)
+				# the stream is reset, as the backend refused it
+				pump.join(5.0)
+				self.assertFalse(pump.is_alive())
+				local.close()
+
+		# including the notifiers of the streams on the server side
+		waitStart = time.monotonic()
+		while (
+			(len(os.listdir('/proc/self/fd')) > numFds) and
+			(time.monotonic() - waitStart < 5.0)
+		):
+			time.sleep(0.01)
+		self.assertEqual(len(os.listdir('/proc/self/fd')), numFds)
@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+# -*- coding:utf-8 -*-
+###
+# Copyright (c) 2025 Haofan Zheng
+# Use of this source code is governed by an MIT-style
+# license that can be found in the LICENSE file or at
+# https://opensource.org/licenses/MIT.
+###
+
+
+import os
+import selectors
+import signal
+import time
+import unittest
+
+from NetRepeater.Func.StaticRepeat.WorkerSupervisor import WorkerSupervisor
+
+
+class TestWorkerSupervisor(unittest.TestCase):
+
+	def setUp(self):
+		# the workers report their pids through this pipe
+		self.rfd, self.wfd = os.pipe()
+		self.buf = b''
+
+	def tearDown(self):
+		os.close(self.rfd)
+		os.close(self.wfd)
+
+	def _ReadPid(self, timeout: float = 5.0) -> int:
+		deadline = time.monotonic() + timeout
+		with selectors.DefaultSelector() as selector:
+			selector.register(self.rfd, selectors.EVENT_READ)
+			while b'\n' not in self.buf:
+				remaining = deadline - time.monotonic()
+				self.assertGreater(remaining, 0, 'No worker started in time')
+				if selector.select(remaining):
+					self.buf += os.read(self.rfd, 4096)
+		line, self.buf = self.buf.split(b'\n', 1)
+		return int(line)
+
+	def _WaitExit(self, pid: int, timeout: float = 5.0) -> int:
+		deadline = time.monotonic() + timeout
+		while time.monotonic() < deadline:
+			waitedPid, status = os.waitpid(pid, os.WNOHANG)
+			if waitedPid == pid:
+				return os.waitstatus_to_exitcode(status)
+			time.sleep(0.01)
+		os.kill(pid, signal.SIGKILL)
+		os.waitpid(pid, 0)
+		self.fail(f'Process {pid} did not exit in time')
+
+	def _Worker(self, workerIdx: int) -> None:
+		os.write(self.wfd, f'{os.getpid()}\n'.encode())
+		while True:
+			signal.pause()
+
+	def _StartSupervisor(self, restartDelay: float) -> int:
+		supervisorPid = os.fork()
+		if supervisorPid == 0:
+			# the supervisor takes over the signals of its own process
+			exitCode = 1
+			try:
+				WorkerSupervisor(
+					numWorkers=1,
+					workerFunc=self._Worker,
+					restartDelay=restartDelay,
+				).Run()
+				exitCode = 0
+			finally:
+				os._exit(exitCode)
+		self.addCleanup(self._KillSupervisor, supervisorPid)
+		return supervisorPid
+
+	@staticmethod
+	def _KillSupervisor(supervisorPid: int) -> None:
+		try:
+			os.kill(supervisorPid, signal.SIGKILL)
+			os.waitpid(supervisorPid, 0)
+		except (ProcessLookupError, ChildProcessError):
+			pass
+
+	def test_Func_WorkerSupervisor_01RestartAndTerminate(self):
+		supervisorPid = self._StartSupervisor(restartDelay=0.05)
+		workerPid = self._ReadPid()
+
+		# a dead worker is restarted
+		os.kill(workerPid, signal.SIGKILL)
+		restartedPid = self._ReadPid()
+		self.assertNotEqual(restartedPid, workerPid)
+
+		# the workers terminate along with the supervisor
+		os.kill(supervisorPid, signal.SIGTERM)
+		self.assertEqual(self._WaitExit(supervisorPid), 0)
+		with self.assertRaises(ProcessLookupError):
+			os.kill(restartedPid, 0)
+
+	def test_Func_WorkerSupervisor_02TerminateWhileRestarting(self):
+		supervisorPid = self._StartSupervisor(restartDelay=30.0)
+		workerPid = self._ReadPid()
+
+		os.kill(workerPid, signal.SIGKILL)
+		time.sleep(0.1)
+		# the restart delay is cut short
+		os.kill(supervisorPid, signal.SIGTERM)
+		self.assertEqual(self._WaitExit(supervisorPid), 0)
+
+	def test_Func_WorkerSupervisor_03Backoff(self):
+		supervisor = WorkerSupervisor(
+			numWorkers=1,
+			workerFunc=self._Worker,
+			restartDelay=1.0,
+			maxRestartDelay=60.0,
+		)
+		# a worker that keeps dying right away waits longer each time
+		self.assertEqual(
+			[ supervisor._GetRestartDelay(0) for _ in range(8) ],
+			[ 1.0, 2.0, 4.0, 8.0, 16.0, 32.0, 60.0, 60.0 ],
+		)
+
+		# but not once it has run for a while
+		supervisor._restarts[0] = (time.monotonic() - 60.0, 60.0)
+		self.assertEqual(supervisor._GetRestartDelay(0), 1.0)
@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+# -*- coding:utf-8 -*-
+###
+# Copyright (c) 2025 Haofan Zheng
+# Use of this source code is governed by an MIT-style
+# license that can be found in the LICENSE file or at
+# https://opensource.org/licenses/MIT.
+###
+
+
+import ipaddress
+import logging
+import socket
+import time
+import unittest
+
+from typing import List
+
+from NetRepeater.Downstream.Handler.HandlerDict import HandlerDict
+from NetRepeater.Downstream.Handler.TCPRepeatHandler import TCPRepeatHandler
+from NetRepeater.Inbound.Server.AsyncTCP import AsyncTCPServer
+
+from ..MockServer import CreateMockTCPServer
+
+
+class TestAsyncTCPServer(unittest.TestCase):
+
+	def setUp(self):
+		self.localhostAddrV4 = ipaddress.ip_address('127.0.0.1')
+		self.localhostAfV4 = socket.AF_INET
+
+		self.testByteRecv: List[int] = []
+
+		# setup the mock TCP server
+		self.mockServer = CreateMockTCPServer(
+			self.localhostAddrV4,
+			self.testByteRecv,
+		)
+		self.mockServer.ThreadedServeUntilTerminate()
+		self.mockServerPort = self.mockServer.server_address[1]
+
+		# setup the asyncio TCP server
+		self.handlerDict = HandlerDict()
+		self.handlerDict.AddHandler(
+			'mock',
+			TCPRepeatHandler(
+				ip=str(self.localhostAddrV4),
+				port=self.mockServerPort,
+			),
+		)
+		self.testServer = AsyncTCPServer.FromConfig(
+			self.handlerDict,
+			ip=str(self.localhostAddrV4),
+			port=0,
+			downstream='mock',
+		)
+		self.testServerPort = self.testServer.server_address[1]
+		self.testServer.ThreadedServeUntilTerminate()
+
+	def tearDown(self):
+		self.testServer.Terminate()
+		self.assertTrue(self.testServer.terminateEvent.is_set())
+
+		self.mockServer.Terminate()
+		self.assertTrue(self.mockServer.terminateEvent.is_set())
+
+	def test_Inbound_AsyncTCP_01ServerReceive(self):
+		logging.getLogger().info('')
+		waitInterval = 0.1
+		waitExpire = 5.0
+
+		testData = b'Hello, World!'
+
+		with socket.socket(self.localhostAfV4, socket.SOCK_STREAM) as s:
+			s.connect((str(self.localhostAddrV4), self.testServerPort))
+			s.sendall(testData)
+
+		waitStart = time.time()
+		while (
+			(bytes(self.testByteRecv) != testData)
+			and (time.time() - waitStart < waitExpire)
+		):
+			time.sleep(waitInterval)
+
+		self.assertEqual(bytes(self.testByteRecv), testData)
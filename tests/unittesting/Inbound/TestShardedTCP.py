@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+# -*- coding:utf-8 -*-
+###
+# Copyright (c) 2025 Haofan Zheng
+# Use of this source code is governed by an MIT-style
+# license that can be found in the LICENSE file or at
+# https://opensource.org/licenses/MIT.
+###
+
+
+import gc
+import ipaddress
+import logging
+import socket
+import threading
+import time
+import unittest
+import warnings
+
+from typing import List
+
+from NetRepeater.Downstream.Handler.HandlerDict import HandlerDict
+from NetRepeater.Downstream.Handler.TCPRepeatHandler import TCPRepeatHandler
+from NetRepeater.Inbound.Server.ShardedTCP import ShardedTCPServer
+
+from ..MockServer import CreateMockTCPServer
+
+
+class _BlockingConnector:
+	'''A backend that takes until `release` is set, and then refuses.'''
+
+	def __init__(self):
+		self.release = threading.Event()
+		self.numConnects = 0
+
+	def ConnectDownstream(self) -> socket.socket:
+		self.numConnects += 1
+		self.release.wait(5.0)
+		raise ConnectionRefusedError('Connection refused')
+
+
+class TestShardedTCPServer(unittest.TestCase):
+
+	def setUp(self):
+		self.localhostAddrV4 = ipaddress.ip_address('127.0.0.1')
+		self.localhostAfV4 = socket.AF_INET
+
+		self.testByteRecv: List[int] = []
+
+		# setup the mock TCP server
+		self.mockServer = CreateMockTCPServer(
+			self.localhostAddrV4,
+			self.testByteRecv,
+		)
+		self.mockServer.ThreadedServeUntilTerminate()
+		self.mockServerPort = self.mockServer.server_address[1]
+
+		# setup the sharded TCP server
+		self.handlerDict = HandlerDict()
+		self.handlerDict.AddHandler(
+			'mock',
+			TCPRepeatHandler(
+				ip=str(self.localhostAddrV4),
+				port=self.mockServerPort,
+			),
+		)
+		self.testServer = ShardedTCPServer.FromConfig(
+			self.handlerDict,
+			ip=str(self.localhostAddrV4),
+			port=0,
+			downstream='mock',
+			numShards=2,
+		)
+		self.testServerPort = self.testServer.server_address[1]
+		self.testServer.ThreadedServeUntilTerminate()
+
+	def tearDown(self):
+		self.testServer.Terminate()
+		self.assertTrue(self.testServer.terminateEvent.is_set())
+
+		self.mockServer.Terminate()
+		self.assertTrue(self.mockServer.terminateEvent.is_set())
+
+	def test_Inbound_ShardedTCP_01ServerReceive(self):
+		logging.getLogger().info('')
+		waitInterval = 0.1
+		waitExpire = 5.0
+
+		testData = b'Hello, World!'
+
+		with socket.socket(self.localhostAfV4, socket.SOCK_STREAM) as s:
+			s.connect((str(self.localhostAddrV4), self.testServerPort))
+			s.sendall(testData)
+
+		waitStart = time.time()
+		while (
+			(bytes(self.testByteRecv) != testData)
+			and (time.time() - waitStart < waitExpire)
+		):
+			time.sleep(waitInterval)
+
+		self.assertEqual(bytes(self.testByteRecv), testData)
+
+	def test_Inbound_ShardedTCP_02FastOpenCounted(self):
+		logging.getLogger().info('')
+		waitInterval = 0.1
+		waitExpire = 5.0
+
+		handler = TCPRepeatHandler(
+			ip=str(self.localhostAddrV4),
+			port=self.mockServerPort,
+			fastOpen=True,
+		)
+		self.handlerDict.AddHandler('fastOpen', handler)
+		server = ShardedTCPServer.FromConfig(
+			self.handlerDict,
+			ip=str(self.localhostAddrV4),
+			port=0,
+			downstream='fastOpen',
+			numShards=1,
+		)
+		server.ThreadedServeUntilTerminate()
+		try:
+			testData = b'Hello, Fast Open!'
+			with socket.socket(self.localhostAfV4, socket.SOCK_STREAM) as s:
+				s.connect((str(self.localhostAddrV4), server.server_address[1]))
+				s.sendall(testData)
+
+			waitStart = time.time()
+			while (
+				(bytes(self.testByteRecv) != testData)
+				and (time.time() - waitStart < waitExpire)
+			):
+				time.sleep(waitInterval)
+			self.assertEqual(bytes(self.testByteRecv), testData)
+		finally:
+			server.Terminate()
+			handler.Terminate()
+
+		# counted when the shard is done with the connection, not when
+		# relayed by the handler
+		self.assertEqual(handler.fastOpenCounters.GetStats()['connections'], 1)
+
+	def test_Inbound_ShardedTCP_03TerminateQueuedSetups(self):
+		logging.getLogger().info('')
+
+		connector = _BlockingConnector()
+		server = ShardedTCPServer(
+			(str(self.localhostAddrV4), 0),
+			connector,
+			numShards=1,
+			numSetupWorkers=1,
+		)
+		server.ThreadedServeUntilTerminate()
+
+		clients = [
+			socket.create_connection(server.server_address[:2], timeout=5.0)
+			for _ in range(3)
+		]
+		for client in clients:
+			self.addCleanup(client.close)
+		# one setup is running, and the others are queued behind it
+		while connector.numConnects < 1:
+			time.sleep(0.01)
+		time.sleep(0.1)
+
+		threading.Timer(0.1, connector.release.set).start()
+		with warnings.catch_warnings(record=True) as caught:
+			warnings.simplefilter('always', ResourceWarning)
+			server.Terminate()
+			gc.collect()
+		self.assertEqual(
+			[ w for w in caught if issubclass(w.category, ResourceWarning) ],
+			[],
+		)
+
+		self.assertEqual(connector.numConnects, 1)
+		for client in clients:
+			self.assertEqual(client.recv(1), b'')
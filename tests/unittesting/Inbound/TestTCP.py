@@ -16,6 +16,7 @@ import unittest
 
 from typing import List
 
+from NetRepeater.Inbound.Server.ListenerOptions import ListenerOptions
 from NetRepeater.Inbound.TCP import TCP
 from NetRepeater.Outbound.TCP import TCPwStaticIPConnector
 
@@ -115,3 +116,39 @@ class TestTCPServer(unittest.TestCase):
 
 		self.assertEqual(bytes(self.testByteRecv), testData)
 
+
+	def test_Inbound_TCP_02ListenerOptions(self):
+		logging.getLogger().info('')
+
+		# without options, the socketserver defaults are kept
+		self.assertTrue(self.testServer1.socket.getblocking())
+		self.assertEqual(self.testServer1.request_queue_size, 5)
+
+		server = TCP.CreateServer(
+			self.localhostAddrV4,
+			0,
+			TCPwStaticIPConnector(self.mockServerAddr, self.mockServerPort),
+			listenerOptions=ListenerOptions.FromConfig({
+				'backlog': 128,
+				'acceptBatch': 16,
+			}),
+		)
+		server.ThreadedServeUntilTerminate()
+		try:
+			self.assertFalse(server.socket.getblocking())
+			self.assertEqual(server.request_queue_size, 128)
+
+			testData = b'listener options'
+			with socket.socket(self.localhostAfV4, socket.SOCK_STREAM) as s:
+				s.connect((str(self.localhostAddrV4), server.server_address[1]))
+				s.sendall(testData)
+
+			waitStart = time.time()
+			while (
+				(bytes(self.testByteRecv) != testData)
+				and (time.time() - waitStart < 5.0)
+			):
+				time.sleep(0.01)
+			self.assertEqual(bytes(self.testByteRecv), testData)
+		finally:
+			server.Terminate()
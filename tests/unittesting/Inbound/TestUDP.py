@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+# -*- coding:utf-8 -*-
+###
+# Copyright (c) 2025 Haofan Zheng
+# Use of this source code is governed by an MIT-style
+# license that can be found in the LICENSE file or at
+# https://opensource.org/licenses/MIT.
+###
+
+
+import ipaddress
+import logging
+import selectors
+import socket
+import threading
+import time
+import unittest
+
+from NetRepeater.Downstream.Handler.HandlerDict import HandlerDict
+from NetRepeater.Downstream.Handler.UDPRepeatHandler import UDPRepeatHandler
+from NetRepeater.Inbound.Server.UDP import UDPServer
+
+
+class TestUDPServer(unittest.TestCase):
+
+	def setUp(self):
+		self.localhostAddrV4 = ipaddress.ip_address('127.0.0.1')
+		self.localhostAfV4 = socket.AF_INET
+
+		# setup the mock UDP echo server
+		self.echoSock = socket.socket(self.localhostAfV4, socket.SOCK_DGRAM)
+		self.echoSock.bind((str(self.localhostAddrV4), 0))
+		self.echoTerminate = threading.Event()
+		self.echoThread = threading.Thread(target=self._EchoServe)
+		self.echoThread.start()
+
+	def tearDown(self):
+		self.echoTerminate.set()
+		self.echoThread.join()
+		self.echoSock.close()
+
+	def _EchoServe(self):
+		with selectors.DefaultSelector() as selector:
+			selector.register(self.echoSock, selectors.EVENT_READ)
+			while not self.echoTerminate.is_set():
+				for key, events in selector.select(0.1):
+					data, addr = self.echoSock.recvfrom(65535)
+					self.echoSock.sendto(data, addr)
+
+	def _CreateServer(self, **kwargs) -> UDPServer:
+		handlerDict = HandlerDict()
+		handlerDict.AddHandler(
+			'mock',
+			UDPRepeatHandler(
+				ip=str(self.localhostAddrV4),
+				port=self.echoSock.getsockname()[1],
+			),
+		)
+		server = UDPServer.FromConfig(
+			handlerDict,
+			ip=str(self.localhostAddrV4),
+			port=0,
+			downstream='mock',
+			**kwargs,
+		)
+		server.ThreadedServeUntilTerminate()
+		return server
+
+	def test_Inbound_UDP_01Echo(self):
+		logging.getLogger().info('')
+
+		server = self._CreateServer()
+		try:
+			clients = [
+				socket.socket(self.localhostAfV4, socket.SOCK_DGRAM)
+				for _ in range(3)
+			]
+			for i, clt in enumerate(clients):
+				clt.settimeout(5.0)
+				clt.connect(server.server_address)
+				for j in range(4):
+					testData = f'client {i} datagram {j}'.encode()
+					clt.send(testData)
+					self.assertEqual(clt.recv(65535), testData)
+
+			self.assertEqual(server.GetNumSessions(), len(clients))
+			for clt in clients:
+				clt.close()
+		finally:
+			server.Terminate()
+		self.assertTrue(server.terminateEvent.is_set())
+
+	def test_Inbound_UDP_02IdleExpiry(self):
+		logging.getLogger().info('')
+
+		server = self._CreateServer(sessionIdleTimeout=0.2)
+		try:
+			with socket.socket(self.localhostAfV4, socket.SOCK_DGRAM) as clt:
+				clt.settimeout(5.0)
+				clt.connect(server.server_address)
+				clt.send(b'Hello, World!')
+				self.assertEqual(clt.recv(65535), b'Hello, World!')
+				self.assertEqual(server.GetNumSessions(), 1)
+
+				waitStart = time.time()
+				while (
+					(server.GetNumSessions() > 0) and
+					(time.time() - waitStart < 5.0)
+				):
+					time.sleep(0.05)
+				self.assertEqual(server.GetNumSessions(), 0)
+		finally:
+			server.Terminate()
+
+	def test_Inbound_UDP_03GSO(self):
+		logging.getLogger().info('')
+
+		server = self._CreateServer(gso=True)
+		try:
+			with socket.socket(self.localhostAfV4, socket.SOCK_DGRAM) as clt:
+				clt.settimeout(5.0)
+				clt.connect(server.server_address)
+
+				testData = [ bytes([i]) * 1000 for i in range(16) ] + [ b'end' ]
+				for data in testData:
+					clt.send(data)
+				received = [ clt.recv(65535) for _ in testData ]
+				# datagram boundaries must survive the segmentation offload
+				self.assertEqual(sorted(received), sorted(testData))
+
+				# empty datagrams can not be segments
+				testData = [ b'a' * 1000, b'', b'b' * 1000, b'', b'end' ]
+				for data in testData:
+					clt.send(data)
+				received = [ clt.recv(65535) for _ in testData ]
+				self.assertEqual(sorted(received), sorted(testData))
+		finally:
+			server.Terminate()
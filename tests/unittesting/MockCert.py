@@ -0,0 +1,46 @@
+#!/usr/bin/env python3
+# -*- coding:utf-8 -*-
+###
+# Copyright (c) 2025 Haofan Zheng
+# Use of this source code is governed by an MIT-style
+# license that can be found in the LICENSE file or at
+# https://opensource.org/licenses/MIT.
+###
+
+
+import os
+import shutil
+import subprocess
+import unittest
+
+from typing import Tuple
+
+
+def CreateMockCert(dirPath: str) -> Tuple[str, str]:
+	'''
+	Create a self-signed certificate for `localhost` and `127.0.0.1` in the
+	given directory, with the `openssl` command.
+
+	:return: The paths of the certificate and of its private key.
+	:raises unittest.SkipTest: If `openssl` is not available.
+	'''
+	if shutil.which('openssl') is None:
+		raise unittest.SkipTest('openssl is not available')
+
+	certPath = os.path.join(dirPath, 'cert.pem')
+	keyPath = os.path.join(dirPath, 'key.pem')
+	subprocess.run(
+		[
+			'openssl', 'req', '-x509',
+			'-newkey', 'ec', '-pkeyopt', 'ec_paramgen_curve:prime256v1',
+			'-nodes', '-days', '1',
+			'-subj', '/CN=localhost',
+			'-addext', 'subjectAltName=DNS:localhost,IP:127.0.0.1',
+			'-keyout', keyPath,
+			'-out', certPath,
+		],
+		check=True,
+		capture_output=True,
+	)
+	return certPath, keyPath
+
@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+# -*- coding:utf-8 -*-
+###
+# Copyright (c) 2025 Haofan Zheng
+# Use of this source code is governed by an MIT-style
+# license that can be found in the LICENSE file or at
+# https://opensource.org/licenses/MIT.
+###
+
+
+import ipaddress
+import socket
+import time
+import unittest
+
+from NetRepeater.Outbound.HappyEyeballs import HappyEyeballsConnect, SortAddrs
+
+
+class TestHappyEyeballs(unittest.TestCase):
+
+	def setUp(self):
+		pass
+
+	def tearDown(self):
+		pass
+
+	def test_Outbound_HappyEyeballs_01SortAddrs(self):
+		v4a = ipaddress.ip_address('192.0.2.1')
+		v4b = ipaddress.ip_address('192.0.2.2')
+		v6a = ipaddress.ip_address('2001:db8::1')
+
+		self.assertEqual(
+			SortAddrs([v4a, v4b, v6a, v4a], preferIPv6=True),
+			[v6a, v4a, v4b],
+		)
+		self.assertEqual(
+			SortAddrs([v6a, v4a, v4b], preferIPv6=False),
+			[v4a, v6a, v4b],
+		)
+
+	def test_Outbound_HappyEyeballs_02Race(self):
+		# a server whose accept queue is full never answers new SYNs
+		with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as stalled:
+			stalled.bind(('127.0.0.1', 0))
+			stalled.listen(0)
+			port = stalled.getsockname()[1]
+			fillers = []
+			self.addCleanup(lambda: [s.close() for s in fillers])
+			for _ in range(4):
+				filler = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+				filler.setblocking(False)
+				filler.connect_ex(('127.0.0.1', port))
+				fillers.append(filler)
+			time.sleep(0.1)
+
+			try:
+				working = socket.create_server(('127.0.0.2', port))
+			except OSError:
+				self.skipTest('127.0.0.2 is not usable on this host')
+			with working:
+				addrs = [
+					ipaddress.ip_address('127.0.0.1'),
+					ipaddress.ip_address('127.0.0.2'),
+				]
+
+				start = time.monotonic()
+				with HappyEyeballsConnect(addrs, port, attemptDelay=0.1) as sock:
+					self.assertEqual(sock.getpeername()[0], '127.0.0.2')
+					self.assertTrue(sock.getblocking())
+				# the second attempt starts after the delay, not the OS timeout
+				self.assertLess(time.monotonic() - start, 2.0)
+
+				# only the stalled address: the timeout is kept to
+				with self.assertRaises(OSError):
+					HappyEyeballsConnect(addrs[:1], port, timeout=0.2)
+
+		# a refused attempt moves on to the next address right away
+		with socket.create_server(('127.0.0.1', 0)) as server:
+			port = server.getsockname()[1]
+			start = time.monotonic()
+			with HappyEyeballsConnect(
+				[
+					ipaddress.ip_address('127.0.0.3'),
+					ipaddress.ip_address('127.0.0.1'),
+				],
+				port,
+				attemptDelay=5.0,
+			) as sock:
+				self.assertEqual(sock.getpeername()[0], '127.0.0.1')
+			self.assertLess(time.monotonic() - start, 2.0)
+
+			# every attempt refused
+			with self.assertRaises(OSError):
+				HappyEyeballsConnect([ipaddress.ip_address('127.0.0.3')], port)
@@ -11,11 +11,30 @@
 from .DNS.TestServerManager import TestServerManager
 from .DNS.TestModuleManagerLoaders import TestModuleManagerLoaders
 from .DNS.TestNetRepeaterMod import TestNetRepeaterMod
+from .DNS.TestResolutionCache import TestResolutionCache
 
+from .Downstream.TestRelay import TestRelay
+from .Downstream.TestHTTPRepeat import TestHTTPRepeat
+from .Downstream.TestMirror import TestMirror
+from .Downstream.TestShapeByRate import TestShapeByRate
+from .Downstream.TestSNIRoute import TestSNIRoute
+from .Downstream.TestTunnel import TestTunnel
+
+from .Func.TestWorkerSupervisor import TestWorkerSupervisor
+
+from .Inbound.TestAsyncTCP import TestAsyncTCPServer
+from .Inbound.TestShardedTCP import TestShardedTCPServer
 from .Inbound.TestTCP import TestTCPServer
+from .Inbound.TestUDP import TestUDPServer
 
+from .Outbound.TestHappyEyeballs import TestHappyEyeballs
 from .Outbound.TestTCP import TestTCPHandler
 
 from .Utils.IfaceSetup.TestIPManager import TestIPManager
+from .Utils.TestConnMemory import TestConnMemory
+from .Utils.TestFastOpen import TestFastOpen
+from .Utils.TestPySSLContext import TestPySSLContext
 from .Utils.TestRandIPGenerator import TestRandIPGenerator
+from .Utils.TestSocketOptions import TestSocketOptions
+from .Utils.TestTLSSessionCache import TestTLSSessionCache
 
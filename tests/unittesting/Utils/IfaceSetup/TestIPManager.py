@@ -10,6 +10,7 @@
 
 import ipaddress
 import logging
+import threading
 import unittest
 
 from NetRepeater.Utils.IfaceSetup.IPManager import CreateIPManager
@@ -56,3 +57,38 @@ class TestIPManager(unittest.TestCase):
 		with self.assertRaises(TimeoutError):
 			ipMgr.WaitBindable(timeout=0.5)
 
+	def test_Utils_IfaceSetup_IPManager_03ConcurrentDryRun(self):
+		logging.getLogger().info('')
+
+		errors = []
+
+		def _AddAndRemove(idx: int) -> None:
+			ipMgr = CreateIPManager(
+				mode='linux-dry-run',
+				ipAndNet=ipaddress.ip_interface(f'fd00::{idx + 1:x}/128'),
+				iface='eth-concurrent',
+			)
+			try:
+				for _ in range(200):
+					ipMgr.AddIP(waitConfirm=False)
+					ipMgr.RemoveIP(waitConfirm=False)
+			except Exception as e:
+				errors.append(e)
+
+		threads = [
+			threading.Thread(target=_AddAndRemove, args=(i,))
+			for i in range(16)
+		]
+		for thread in threads:
+			thread.start()
+		for thread in threads:
+			thread.join()
+
+		self.assertEqual(errors, [])
+		for i in range(16):
+			ipMgr = CreateIPManager(
+				mode='linux-dry-run',
+				ipAndNet=ipaddress.ip_interface(f'fd00::{i + 1:x}/128'),
+				iface='eth-concurrent',
+			)
+			self.assertFalse(ipMgr.HasIPAdded())
@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+# -*- coding:utf-8 -*-
+###
+# Copyright (c) 2025 Haofan Zheng
+# Use of this source code is governed by an MIT-style
+# license that can be found in the LICENSE file or at
+# https://opensource.org/licenses/MIT.
+###
+
+
+import logging
+import mmap
+import selectors
+import socket
+import threading
+import unittest
+
+from NetRepeater.Utils.Selector import ConnectionSelector
+from NetRepeater.Utils.ThreadStack import (
+	MIN_THREAD_STACK_SIZE,
+	SetThreadStackSize,
+)
+
+
+# the memory of idle connections is measured by
+# tests/benchmarking/BenchConnMemory.py
+class TestConnMemory(unittest.TestCase):
+
+	def test_Utils_ConnMemory_01ThreadStackSize(self):
+		logging.getLogger().info('')
+
+		self.assertEqual(SetThreadStackSize(None), 0)
+		with self.assertRaises(ValueError):
+			SetThreadStackSize(MIN_THREAD_STACK_SIZE - 1)
+
+		oldStackSize = threading.stack_size()
+		self.addCleanup(threading.stack_size, oldStackSize)
+
+		# rounded up to the page size
+		size = SetThreadStackSize(256 * 1024 + 1)
+		self.assertEqual(size % mmap.PAGESIZE, 0)
+		self.assertGreater(size, 256 * 1024)
+		self.assertEqual(threading.stack_size(), size)
+
+		# threads can still be started, and run
+		isRun = []
+		thread = threading.Thread(target=isRun.append, args=(True,))
+		thread.start()
+		thread.join()
+		self.assertEqual(isRun, [ True ])
+
+	def test_Utils_ConnMemory_02ConnectionSelector(self):
+		logging.getLogger().info('')
+
+		a, b = socket.socketpair()
+		self.addCleanup(a.close)
+		self.addCleanup(b.close)
+
+		with ConnectionSelector() as selector:
+			if hasattr(selectors, 'PollSelector'):
+				# no file descriptor held per selector
+				self.assertIsInstance(selector, selectors.PollSelector)
+			selector.register(a, selectors.EVENT_READ)
+			self.assertEqual(selector.select(0), [])
+
+			b.sendall(b'x')
+			events = selector.select(5.0)
+			self.assertEqual(len(events), 1)
+			self.assertIs(events[0][0].fileobj, a)
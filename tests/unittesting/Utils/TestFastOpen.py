@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+# -*- coding:utf-8 -*-
+###
+# Copyright (c) 2025 Haofan Zheng
+# Use of this source code is governed by an MIT-style
+# license that can be found in the LICENSE file or at
+# https://opensource.org/licenses/MIT.
+###
+
+
+import socket
+import unittest
+
+from NetRepeater.Downstream.Handler.TCPRepeatHandler import TCPRepeatHandler
+from NetRepeater.Utils.FastOpen import (
+	EnableFastOpenConnect,
+	IsFastOpenSupported,
+	IsFastOpenUsed,
+)
+
+
+class TestFastOpen(unittest.TestCase):
+
+	def setUp(self):
+		if not IsFastOpenSupported():
+			self.skipTest('TCP Fast Open is not supported on this platform')
+		self.server = socket.create_server(('127.0.0.1', 0))
+		self.server.setsockopt(socket.IPPROTO_TCP, socket.TCP_FASTOPEN, 16)
+		self.server.settimeout(5.0)
+
+	def tearDown(self):
+		self.server.close()
+
+	def _Connect(self, data: bytes) -> socket.socket:
+		sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+		if not EnableFastOpenConnect(sock):
+			sock.close()
+			self.skipTest('TCP_FASTOPEN_CONNECT is not supported')
+		sock.connect(self.server.getsockname())
+		# the SYN has not been sent yet if the connect was deferred
+		self.assertFalse(IsFastOpenUsed(sock))
+		sock.sendall(data)
+		with self.server.accept()[0] as peer:
+			self.assertEqual(peer.recv(len(data), socket.MSG_WAITALL), data)
+		return sock
+
+	def test_Utils_FastOpen_01Used(self):
+		# the first connection fetches the cookie, unless the kernel has it
+		self._Connect(b'hello').close()
+
+		with self._Connect(b'hello') as sock:
+			if not IsFastOpenUsed(sock):
+				self.skipTest('TCP Fast Open is not enabled for clients and servers')
+
+	def test_Utils_FastOpen_02Record(self):
+		handler = TCPRepeatHandler(
+			'127.0.0.1',
+			self.server.getsockname()[1],
+			fastOpen=True,
+		)
+		for _ in range(2):
+			with self._Connect(b'hello') as sock:
+				handler.RecordDownstream(sock)
+		stats = handler.fastOpenCounters.GetStats()
+		self.assertEqual(stats['connections'], 2)
+		if stats['fastOpen'] == 0:
+			self.skipTest('TCP Fast Open is not enabled for clients and servers')
+		self.assertGreaterEqual(stats['fastOpen'], 1)
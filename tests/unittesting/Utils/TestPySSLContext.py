@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+# -*- coding:utf-8 -*-
+###
+# Copyright (c) 2025 Haofan Zheng
+# Use of this source code is governed by an MIT-style
+# license that can be found in the LICENSE file or at
+# https://opensource.org/licenses/MIT.
+###
+
+
+import socket
+import ssl
+import tempfile
+import threading
+import types
+import unittest
+
+from NetRepeater.Utils.PySSLContext import (
+	CreateClientPySSLContext,
+	CreateServerPySSLContext,
+	GetPySSLContext,
+)
+
+from ..MockCert import CreateMockCert
+
+
+class TestPySSLContext(unittest.TestCase):
+
+	def setUp(self):
+		pass
+
+	def tearDown(self):
+		pass
+
+	def test_Utils_PySSLContext_01Get(self):
+		pySSLContext = ssl.SSLContext(ssl.PROTOCOL_TLS_CLIENT)
+		self.assertIs(GetPySSLContext(pySSLContext), pySSLContext)
+		self.assertIs(
+			GetPySSLContext(types.SimpleNamespace(ctx=pySSLContext, name='x')),
+			pySSLContext,
+		)
+
+		# no guessing which one is meant
+		with self.assertRaises(TypeError):
+			GetPySSLContext(types.SimpleNamespace(name='x'))
+		with self.assertRaises(TypeError):
+			GetPySSLContext(types.SimpleNamespace(
+				a=pySSLContext,
+				b=ssl.SSLContext(ssl.PROTOCOL_TLS_CLIENT),
+			))
+
+	def test_Utils_PySSLContext_02Server(self):
+		with tempfile.TemporaryDirectory() as tmpDir:
+			certPath, keyPath = CreateMockCert(tmpDir)
+			with open(certPath) as certFile:
+				certPEM = certFile.read()
+			serverCtx = CreateServerPySSLContext(
+				privKeyPath=keyPath,
+				certPath=certPath,
+			)
+			verifyingCtx = CreateServerPySSLContext(
+				privKeyPath=keyPath,
+				certPath=certPath,
+				caPEMorDER=certPEM,
+				verifyClient=True,
+			)
+			clientCtx = CreateClientPySSLContext(caPEMorDER=certPEM)
+			certClientCtx = CreateClientPySSLContext(
+				caPEMorDER=certPEM,
+				privKeyPath=keyPath,
+				certPath=certPath,
+			)
+		self.assertEqual(serverCtx.verify_mode, ssl.CERT_NONE)
+		self.assertEqual(verifyingCtx.verify_mode, ssl.CERT_REQUIRED)
+
+		def _Handshake(serverCtx: ssl.SSLContext, clientCtx: ssl.SSLContext) -> None:
+			with socket.create_server(('127.0.0.1', 0)) as listener:
+				listener.settimeout(5.0)
+				client = socket.create_connection(listener.getsockname())
+				peers = [listener.accept()[0]]
+				errors = []
+
+				def _Serve():
+					try:
+						with serverCtx.wrap_socket(peers[0], server_side=True) as peer:
+							peer.sendall(b'x')
+					except (ssl.SSLError, OSError) as e:
+						errors.append(e)
+						peers[0].close()
+
+				thread = threading.Thread(target=_Serve)
+				thread.start()
+				try:
+					with clientCtx.wrap_socket(client, server_hostname='localhost') as sock:
+						sock.recv(1)
+				finally:
+					thread.join(5.0)
+				if errors:
+					raise errors[0]
+
+		_Handshake(serverCtx, clientCtx)
+		_Handshake(verifyingCtx, certClientCtx)
+		# a client without a certificate is refused
+		with self.assertRaises((ssl.SSLError, OSError)):
+			_Handshake(verifyingCtx, clientCtx)
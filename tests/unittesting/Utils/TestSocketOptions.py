@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+# -*- coding:utf-8 -*-
+###
+# Copyright (c) 2025 Haofan Zheng
+# Use of this source code is governed by an MIT-style
+# license that can be found in the LICENSE file or at
+# https://opensource.org/licenses/MIT.
+###
+
+
+import socket
+import unittest
+
+from NetRepeater.Utils.SocketOptions import SocketOptions
+
+
+class TestSocketOptions(unittest.TestCase):
+
+	def setUp(self):
+		pass
+
+	def tearDown(self):
+		pass
+
+	def test_Utils_SocketOptions_01Profile(self):
+		# keys in the section override the ones of the profile
+		opts = SocketOptions.FromConfig({
+			'profile': 'low-latency',
+			'keepIdle': 45,
+		})
+
+		with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+			opts.Apply(sock)
+
+			self.assertEqual(
+				sock.getsockopt(socket.SOL_SOCKET, socket.SO_KEEPALIVE),
+				1
+			)
+			if hasattr(socket, 'TCP_KEEPIDLE'):
+				self.assertEqual(
+					sock.getsockopt(socket.IPPROTO_TCP, socket.TCP_KEEPIDLE),
+					45
+				)
+			if hasattr(socket, 'TCP_NOTSENT_LOWAT'):
+				self.assertEqual(
+					sock.getsockopt(socket.IPPROTO_TCP, socket.TCP_NOTSENT_LOWAT),
+					16 * 1024
+				)
+
+	def test_Utils_SocketOptions_02Invalid(self):
+		with self.assertRaises(ValueError):
+			SocketOptions.FromConfig({ 'profile': 'no-such-profile' })
+
+		with self.assertRaises(TypeError):
+			SocketOptions.FromConfig({ 'noSuchOption': 1 })
+
+		# rejected options are skipped rather than failing the socket
+		opts = SocketOptions(congestion='no-such-congestion-control')
+		with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+			opts.Apply(sock)
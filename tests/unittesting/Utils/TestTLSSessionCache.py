@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+# -*- coding:utf-8 -*-
+###
+# Copyright (c) 2025 Haofan Zheng
+# Use of this source code is governed by an MIT-style
+# license that can be found in the LICENSE file or at
+# https://opensource.org/licenses/MIT.
+###
+
+
+import socket
+import ssl
+import tempfile
+import threading
+import time
+import unittest
+
+from NetRepeater.Utils.PySSLContext import CreateClientPySSLContext
+from NetRepeater.Utils.TLSSessionCache import TLSSessionCache
+
+from ..MockCert import CreateMockCert
+
+
+class _FakeSession(object):
+
+	def __init__(self, hasTicket: bool = True, timeout: int = 7200) -> None:
+		self.has_ticket = hasTicket
+		self.timeout = timeout
+		self.time = int(time.time())
+
+
+class _FakeSSLSocket(object):
+
+	def __init__(
+		self,
+		session: _FakeSession,
+		version: str = 'TLSv1.3',
+		isReused: bool = False,
+	) -> None:
+		self.session = session
+		self._version = version
+		self.session_reused = isReused
+
+	def version(self) -> str:
+		return self._version
+
+
+class TestTLSSessionCache(unittest.TestCase):
+
+	def setUp(self):
+		pass
+
+	def tearDown(self):
+		pass
+
+	def test_Utils_TLSSessionCache_01PutGet(self):
+		cache = TLSSessionCache(maxSize=2)
+
+		# a TLS 1.3 session without a ticket cannot be resumed
+		cache.Put('a', _FakeSSLSocket(_FakeSession(hasTicket=False)))
+		self.assertIsNone(cache.Get('a'))
+		# a TLS 1.2 session can be resumed by its ID
+		sessionA = _FakeSession(hasTicket=False)
+		cache.Put('a', _FakeSSLSocket(sessionA, version='TLSv1.2'))
+		self.assertIs(cache.Get('a'), sessionA)
+
+		# the least recently used server is dropped first
+		sessionB = _FakeSession()
+		cache.Put('b', _FakeSSLSocket(sessionB))
+		cache.Get('a')
+		cache.Put('c', _FakeSSLSocket(_FakeSession()))
+		self.assertIsNone(cache.Get('b'))
+		self.assertIs(cache.Get('a'), sessionA)
+
+		# resumed handshakes are counted
+		cache.RecordHandshake(_FakeSSLSocket(sessionA, isReused=True), True)
+		cache.RecordHandshake(_FakeSSLSocket(sessionB), False)
+		stats = cache.GetStats()
+		self.assertEqual(stats['handshakes'], 2)
+		self.assertEqual(stats['offered'], 1)
+		self.assertEqual(stats['resumed'], 1)
+		self.assertEqual(stats['hitRate'], 0.5)
+
+	def test_Utils_TLSSessionCache_02Expiry(self):
+		cache = TLSSessionCache(lifetime=0.05)
+		cache.Put('a', _FakeSSLSocket(_FakeSession()))
+		self.assertIsNotNone(cache.Get('a'))
+		time.sleep(0.1)
+		self.assertIsNone(cache.Get('a'))
+
+		# the server's own lifetime is kept to
+		expired = _FakeSession(timeout=10)
+		expired.time -= 20
+		cache = TLSSessionCache()
+		cache.Put('a', _FakeSSLSocket(expired))
+		self.assertIsNone(cache.Get('a'))
+
+	def test_Utils_TLSSessionCache_03Loopback(self):
+		with tempfile.TemporaryDirectory() as tmpDir:
+			certPath, keyPath = CreateMockCert(tmpDir)
+			serverCtx = ssl.create_default_context(ssl.Purpose.CLIENT_AUTH)
+			serverCtx.load_cert_chain(certPath, keyPath)
+			with open(certPath) as certFile:
+				clientCtx = CreateClientPySSLContext(caPEMorDER=certFile.read())
+
+		def _Serve(server: socket.socket) -> None:
+			for _ in range(2):
+				conn = server.accept()[0]
+				with serverCtx.wrap_socket(conn, server_side=True) as conn:
+					# echo one byte, so the client reads the session ticket
+					conn.sendall(conn.recv(1))
+
+		cache = TLSSessionCache()
+		with socket.create_server(('127.0.0.1', 0)) as server:
+			server.settimeout(5.0)
+			thread = threading.Thread(target=_Serve, args=(server,))
+			thread.start()
+
+			isReused = []
+			for _ in range(2):
+				session = cache.Get('server')
+				sock = socket.create_connection(server.getsockname(), timeout=5.0)
+				with clientCtx.wrap_socket(
+					sock,
+					server_hostname='localhost',
+					session=session,
+				) as sock:
+					isReused.append(cache.RecordHandshake(sock, session is not None))
+					sock.sendall(b'x')
+					self.assertEqual(sock.recv(1), b'x')
+					cache.Put('server', sock)
+			thread.join(5.0)
+
+		self.assertEqual(isReused, [False, True])
+		self.assertEqual(cache.GetStats()['resumed'], 1)